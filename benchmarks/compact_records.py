@@ -0,0 +1,101 @@
+"""
+Compare memory per record of result object representations
+
+Decodes the same users with game profiles into validated pydantic objects,
+:class:`CompactUser` records and :class:`RecordTable`, and reports
+memory retained per user measured with :mod:`tracemalloc`,
+along with build time including validation.
+
+Usage::
+
+    python -m benchmarks.compact_records [users] [profiles per user]
+
+Run it from the repository root, so the package is importable without installation.
+
+Results on CPython 3.11, pydantic 2.10, bytes per user:
+
+============================  ========  ===========  ===========
+game profiles per user        pydantic  CompactUser  RecordTable
+============================  ========  ===========  ===========
+0                             1820      322          135
+4                             7810      1679         896
+20                            31763     6946         3917
+============================  ========  ===========  ===========
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, List
+
+COUNTRIES = ["UA", "PL", "DE", "US", "KZ", "RU", "GB", "FR"]
+
+
+def payload(users: int, profiles: int) -> List[dict]:
+    return [
+        {
+            "id": index,
+            "rate": index % 1000,
+            "telegram_id": 100_000_000 + index,
+            "name": f"user{index}",
+            "age": 18 + index % 40,
+            "sex": "m" if index % 2 else "f",
+            "country": COUNTRIES[index % len(COUNTRIES)],
+            "is_deleted": False,
+            "is_premium": index % 3 == 0,
+            "is_bot": False,
+            "create_at": "2024-01-01T00:00:00",
+            "game_profiles": [
+                {
+                    "id": index * profiles + number,
+                    "xbox": f"gamer{index}_{number}",
+                    "xuid": 2_535_000_000_000_000 + index * profiles + number,
+                    "uuid": f"{index:08x}-0000-4000-8000-{number:012x}",
+                    "create_at": "2024-01-02T00:00:00",
+                }
+                for number in range(profiles)
+            ],
+        }
+        for index in range(users)
+    ]
+
+
+def measure(name: str, users: int, build: Callable[[], Any]) -> Any:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"{name:>15}: {size / users:8.0f} bytes/user, "
+        f"{elapsed / users * 1e6:6.1f} us/user to build"
+    )
+    return result
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    profiles = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    from berrycorepy.types.compact import CompactUser, RecordTable
+    from berrycorepy.types.User import User
+
+    # Each user is decoded from its own JSON, so no strings are shared with the source
+    blobs = [json.dumps(item).encode() for item in payload(users, profiles)]
+
+    def decode() -> Iterator[User]:
+        return (User.model_validate_json(blob) for blob in blobs)
+
+    models = measure("pydantic", users, lambda: list(decode()))
+    records = measure("CompactUser", users, lambda: [CompactUser.from_model(m) for m in decode()])
+    table = measure("RecordTable", users, lambda: RecordTable.from_models(User, decode()))
+
+    assert records[-1].to_model() == models[-1]
+    assert table.to_model(-1) == models[-1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compare client-side cost of session backends
+
+Starts a local API stub in a subprocess and sends the same batch of ``getUser``
+calls through :class:`AiohttpSession` and :class:`StreamsSession`,
+reporting wall time, client CPU time per request and cold import time.
+
+Usage::
+
+    python -m benchmarks.session_backends [requests] [concurrency]
+
+Run it from the repository root, so the package is importable without installation.
+"""
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+SERVER = r"""
+import sys
+from aiohttp import web
+
+USER = (
+    b'{"ok":true,"result":{"id":1,"rate":2,"telegram_id":3,"name":"n","age":4,"sex":"m",'
+    b'"country":"UA","is_deleted":false,"is_premium":true,"is_bot":false,'
+    b'"create_at":"2024-01-01T00:00:00","game_profiles":[]}}'
+)
+
+async def handler(request):
+    await request.read()
+    return web.Response(body=USER, content_type="application/json")
+
+app = web.Application()
+app.router.add_post("/client{token}/{method}", handler)
+web.run_app(app, host="127.0.0.1", port=int(sys.argv[1]), print=None)
+"""
+
+IMPORT = {
+    "aiohttp": "import berrycorepy.client.session.aiohttp",
+    "streams": "import berrycorepy.client.session.streams",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time(statement: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True)
+    return time.perf_counter() - started
+
+
+async def run(
+    session_type: type, base: str, requests: int, concurrency: int, **kwargs: object
+) -> None:
+    from berrycorepy.client.client import Client
+    from berrycorepy.client.dangerous import DangerousAPIServer
+    from berrycorepy.methods.get_user import GetChat
+
+    session = session_type(api=DangerousAPIServer.from_base(base), limit=concurrency, **kwargs)
+    async with Client("token", session=session) as client:
+        await client.gather([GetChat(chat_id=i) for i in range(concurrency)])  # warm up
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        results = await client.gather(
+            (GetChat(chat_id=i) for i in range(requests)), concurrency=concurrency
+        )
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    errors = sum(isinstance(result, BaseException) for result in results)
+    print(
+        f"{session_type.__name__:>15}: {requests / wall:8.0f} req/s, "
+        f"{cpu / requests * 1e6:6.1f} us CPU/req, {errors} errors"
+    )
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    from berrycorepy.client.session.aiohttp import AiohttpSession
+    from berrycorepy.client.session.streams import StreamsSession
+
+    for name, statement in IMPORT.items():
+        print(f"{name:>15}: {import_time(statement) * 1000:8.0f} ms cold import")
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "-c", SERVER, str(port)])
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        base = f"http://127.0.0.1:{port}"
+        # Both backends send JSON bodies, so only transport overhead is compared
+        asyncio.run(run(AiohttpSession, base, requests, concurrency, json_body=True))
+        asyncio.run(run(StreamsSession, base, requests, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
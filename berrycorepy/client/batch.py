@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Deque,
+    Generic,
+    Iterable,
+    Optional,
+    Set,
+    TypeVar,
+    Union,
+)
+
+from berrycorepy.methods.base import DangerousMethod
+
+if TYPE_CHECKING:
+    from berrycorepy.client.client import Client
+
+T = TypeVar("T")
+
+DEFAULT_BATCH_CONCURRENCY = 100
+
+MethodsSource = Union[Iterable[DangerousMethod[Any]], AsyncIterable[DangerousMethod[Any]]]
+
+
+@dataclass(frozen=True)
+class BatchResult(Generic[T]):
+    """
+    Outcome of a single method call in batch
+    """
+
+    index: int
+    """Position of the method in source iterable"""
+    method: DangerousMethod[T]
+    """Called method"""
+    result: Optional[T] = None
+    """Method result, if call succeeded"""
+    exception: Optional[BaseException] = None
+    """Raised exception, if call failed"""
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None
+
+    def unwrap(self) -> T:
+        """
+        Get result or raise the exception of failed call
+        """
+        if self.exception is not None:
+            raise self.exception
+        return self.result  # type: ignore
+
+
+async def _iterate(methods: MethodsSource) -> AsyncIterator[DangerousMethod[Any]]:
+    if isinstance(methods, AsyncIterable):
+        iterator = methods.__aiter__()
+        try:
+            async for method in iterator:
+                yield method
+        finally:
+            # Source left behind by abandoned batch is closed too
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+    else:
+        for method in methods:
+            yield method
+
+
+async def _call(
+    client: Client, index: int, method: DangerousMethod[Any], request_timeout: Optional[int]
+) -> BatchResult[Any]:
+    try:
+        result = await client(method, request_timeout=request_timeout)
+    except Exception as e:
+        return BatchResult(index=index, method=method, exception=e)
+    return BatchResult(index=index, method=method, result=result)
+
+
+async def run_batch(
+    client: Client,
+    methods: MethodsSource,
+    concurrency: int,
+    ordered: bool = True,
+    request_timeout: Optional[int] = None,
+) -> AsyncIterator[BatchResult[Any]]:
+    """
+    Call methods with bounded concurrency
+
+    Source is consumed lazily, so at most :code:`concurrency` methods are materialized
+    and called at the same time. Exceptions are collected into results
+    and never cancel the rest of the batch.
+
+    :param client: Client instance
+    :param methods: iterable or async iterable of methods
+    :param concurrency: maximum number of simultaneous calls
+    :param ordered: yield results in source order, otherwise as they are completed
+    :param request_timeout: Request timeout
+    :return: async iterator of :class:`BatchResult`
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency should be positive")
+
+    source = _iterate(methods)
+    # Tasks which results are not yielded yet, in source order.
+    # In ordered mode slow head of the queue holds the window,
+    # so memory stays bounded by the concurrency limit in both modes
+    pending: Deque[asyncio.Task[BatchResult[Any]]] = deque()
+    # Unordered mode takes tasks in order of completion
+    running: Set[asyncio.Task[BatchResult[Any]]] = set()
+    completed: asyncio.Queue[asyncio.Task[BatchResult[Any]]] = asyncio.Queue()
+    index = 0
+    exhausted = False
+
+    async def fill() -> None:
+        nonlocal index, exhausted
+        while not exhausted and len(pending) + len(running) < concurrency:
+            try:
+                method = await source.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                return
+            task = asyncio.ensure_future(_call(client, index, method, request_timeout))
+            if ordered:
+                pending.append(task)
+            else:
+                running.add(task)
+                task.add_done_callback(completed.put_nowait)
+            index += 1
+
+    try:
+        await fill()
+        while pending or running:
+            if ordered:
+                result = await pending[0]
+                pending.popleft()
+            else:
+                task = await completed.get()
+                running.discard(task)
+                result = task.result()
+            await fill()
+            yield result
+    finally:
+        tasks = [*pending, *running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await source.aclose()  # type: ignore[attr-defined]
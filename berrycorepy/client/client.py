@@ -2,8 +2,9 @@ from __future__ import annotations
 
 
 from contextlib import asynccontextmanager
+from pathlib import Path
 from types import TracebackType
-from typing import Any, Optional, TypeVar, Type, AsyncIterator
+from typing import Any, Iterable, List, Optional, TypeVar, Type, AsyncIterator, Union
 
 
 from berrycorepy.types.User import User
@@ -11,6 +12,25 @@ from berrycorepy.methods import (
     DangerousMethod,
     GetMe
 )
+from berrycorepy.methods.validators import response_validators
+from berrycorepy.client.batch import (
+    DEFAULT_BATCH_CONCURRENCY,
+    BatchResult,
+    MethodsSource,
+    run_batch,
+)
+from berrycorepy.client.download import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONCURRENCY as DEFAULT_DOWNLOAD_CONCURRENCY,
+    Downloader,
+    DownloadResult,
+)
+from berrycorepy.client.pagination import (
+    DEFAULT_MAX_PREFETCH,
+    DEFAULT_PREFETCH,
+    PageStrategy,
+    Paginator,
+)
 from berrycorepy.client.session.aiohttp import AiohttpSession
 from berrycorepy.client.session.BaseSession import BaseSession
 T = TypeVar("T")
@@ -75,6 +95,17 @@ class Client:
             self._me = await self.get_me()
         return self._me
 
+    @staticmethod
+    def warm_up(methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None) -> int:
+        """
+        Compile response validators of API methods ahead of the first request,
+        so first request latency doesn't include schema building
+
+        :param methods: method classes, by default all imported methods
+        :return: number of compiled validators
+        """
+        return response_validators.warm_up(methods)
+
     async def __call__(
             self, method: DangerousMethod[T], request_timeout: Optional[int] = None
     ) -> T:
@@ -86,6 +117,141 @@ class Client:
         """
         return await self.session(self, method, timeout=request_timeout)
 
+    def stream(
+            self, method: DangerousMethod[List[T]], request_timeout: Optional[float] = None
+    ) -> AsyncIterator[T]:
+        """
+        Call API method returning list and iterate over its items as they are received,
+        without loading the whole response into memory. Middlewares are not applied
+
+        :param method: method instance returning list
+        :param request_timeout: maximum time to wait for the response and for each chunk of it
+        :return: async iterator of validated items
+        """
+        return self.session.stream(self, method, timeout=request_timeout)
+
+    def paginate(
+            self,
+            method: DangerousMethod[Any],
+            strategy: Optional[PageStrategy] = None,
+            prefetch: int = DEFAULT_PREFETCH,
+            max_prefetch: int = DEFAULT_MAX_PREFETCH,
+            max_pages: Optional[int] = None,
+            request_timeout: Optional[int] = None,
+    ) -> Paginator[Any]:
+        """
+        Iterate over items of all pages of the method, requesting next pages ahead
+
+        :param method: method requesting the first page
+        :param strategy: page addressing, by default
+            :class:`berrycorepy.client.pagination.OffsetPagination`
+        :param prefetch: initial number of pages requested ahead
+        :param max_prefetch: maximum number of pages requested ahead
+        :param max_pages: stop after this number of pages
+        :param request_timeout: Request timeout
+        :return: async iterator of items
+        :raise ValueError: when the method has no fields addressing pages
+        """
+        return Paginator(
+            self,
+            method,
+            strategy=strategy,
+            prefetch=prefetch,
+            max_prefetch=max_prefetch,
+            max_pages=max_pages,
+            request_timeout=request_timeout,
+        )
+
+    async def download(
+            self,
+            file_path: Union[str, Path],
+            destination: Union[str, Path],
+            size: Optional[int] = None,
+            checksum: Optional[str] = None,
+            algorithm: str = "sha256",
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+            timeout: int = 30,
+            resume: bool = True,
+    ) -> DownloadResult:
+        """
+        Download file from Dangerous file storage, large files are fetched
+        with concurrent range requests and resumed after failures
+
+        :param file_path: file path on the server
+        :param destination: local path
+        :param size: expected size in bytes
+        :param checksum: expected hex digest of the file
+        :param algorithm: :mod:`hashlib` algorithm of the checksum
+        :param chunk_size: size of range requested at once
+        :param concurrency: maximum number of simultaneous range requests
+        :param timeout: timeout of each read in seconds
+        :param resume: continue from partial file of previous attempt
+        :return: download summary
+        """
+        url = self.session.select_server().file_url(token=self.token, path=file_path)
+        downloader = Downloader(
+            self.session,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            timeout=timeout,
+            resume=resume,
+        )
+        return await downloader.download(
+            url, destination, size=size, checksum=checksum, algorithm=algorithm
+        )
+
+    def map(
+            self,
+            methods: MethodsSource,
+            concurrency: Optional[int] = None,
+            ordered: bool = True,
+            request_timeout: Optional[int] = None,
+    ) -> AsyncIterator[BatchResult[Any]]:
+        """
+        Call many API methods with bounded concurrency and stream results back
+
+        Failed calls don't cancel the batch, their exceptions are stored in results.
+
+        :param methods: iterable or async iterable of methods
+        :param concurrency: maximum number of simultaneous calls,
+            by default equals to the session connections limit
+        :param ordered: yield results in source order, otherwise as they are completed
+        :param request_timeout: Request timeout
+        :return: async iterator of :class:`berrycorepy.client.batch.BatchResult`
+        """
+        if concurrency is None:
+            concurrency = getattr(self.session, "limit", None) or DEFAULT_BATCH_CONCURRENCY
+        return run_batch(
+            self,
+            methods,
+            concurrency=concurrency,
+            ordered=ordered,
+            request_timeout=request_timeout,
+        )
+
+    async def gather(
+            self,
+            methods: MethodsSource,
+            concurrency: Optional[int] = None,
+            request_timeout: Optional[int] = None,
+    ) -> List[Union[Any, BaseException]]:
+        """
+        Call many API methods with bounded concurrency
+
+        :param methods: iterable or async iterable of methods
+        :param concurrency: maximum number of simultaneous calls,
+            by default equals to the session connections limit
+        :param request_timeout: Request timeout
+        :return: results in source order, failed calls are represented by their exceptions
+        """
+        return [
+            item.result if item.ok else item.exception
+            async for item in self.map(
+                methods, concurrency=concurrency, request_timeout=request_timeout
+            )
+        ]
+
 
     def __hash__(self) -> int:
         """
@@ -30,4 +30,4 @@ class ClientContextController(BaseModel):
 
         :return: Client instance
         """
-        return self._bot
\ No newline at end of file
+        return self._client
\ No newline at end of file
@@ -1,7 +1,7 @@
-
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Dict, List, Sequence, Tuple, Union
 
 
 @dataclass(frozen=True)
@@ -54,3 +54,146 @@ PRODUCTION = DangerousAPIServer(
     base="https://mblueberry.fun/api/client{token}/{method}",
     file="https://mblueberry.fun/api/file/client{token}/{path}",
 )
+
+
+class _ServerState:
+    __slots__ = ("latency", "outstanding", "error_rate", "observations", "down_until")
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.outstanding = 0
+        self.error_rate = 0.0
+        self.observations = 0
+        self.down_until = 0.0
+
+
+class DangerousAPIServerPool:
+    """
+    Set of equivalent API servers (mirrors) with latency-aware selection
+
+    Server with the lowest EWMA latency multiplied by the number of outstanding requests
+    is preferred. Servers which network error rate exceeds the threshold are considered
+    unhealthy and skipped for :code:`cooldown` seconds.
+    Can be used everywhere instead of :class:`DangerousAPIServer`.
+    """
+
+    def __init__(
+        self,
+        servers: Sequence[DangerousAPIServer],
+        decay: float = 0.3,
+        error_threshold: float = 0.5,
+        min_observations: int = 5,
+        cooldown: float = 30.0,
+        initial_latency: float = 0.1,
+    ) -> None:
+        """
+        :param servers: API servers, the first one is preferred until latency is known
+        :param decay: weight of the latest observation in moving averages
+        :param error_threshold: network error rate which marks server unhealthy
+        :param min_observations: minimum number of requests before server can be marked unhealthy
+        :param cooldown: time in seconds unhealthy server is skipped
+        :param initial_latency: latency in seconds assumed until the first response,
+            so requests are spread by the number of outstanding ones from the start
+        """
+        if not servers:
+            raise ValueError("At least one server is required")
+        if initial_latency <= 0:
+            raise ValueError("Initial latency should be positive")
+        self.servers = tuple(servers)
+        self.decay = decay
+        self.error_threshold = error_threshold
+        self.min_observations = min_observations
+        self.cooldown = cooldown
+        self._states: Dict[DangerousAPIServer, _ServerState] = {
+            server: _ServerState(initial_latency) for server in self.servers
+        }
+
+    def _score(self, server: DangerousAPIServer) -> Tuple[float, int, int]:
+        state = self._states[server]
+        return (
+            state.latency * (state.outstanding + 1),
+            state.outstanding,
+            self.servers.index(server),
+        )
+
+    def is_healthy(self, server: DangerousAPIServer) -> bool:
+        return self._states[server].down_until <= time.monotonic()
+
+    def candidates(self) -> List[DangerousAPIServer]:
+        """
+        Get servers ordered by preference, healthy first
+        """
+        healthy = [server for server in self.servers if self.is_healthy(server)]
+        unhealthy = sorted(
+            (server for server in self.servers if not self.is_healthy(server)),
+            key=lambda server: self._states[server].down_until,
+        )
+        return sorted(healthy, key=self._score) + unhealthy
+
+    def select(self) -> DangerousAPIServer:
+        """
+        Get the most preferable server
+        """
+        return self.candidates()[0]
+
+    def started(self, server: DangerousAPIServer) -> None:
+        """
+        Register request sent to the server
+        """
+        self._states[server].outstanding += 1
+
+    def finished(self, server: DangerousAPIServer, latency: float, failed: bool) -> None:
+        """
+        Register request completion
+
+        :param server: server the request was sent to
+        :param latency: request duration in seconds
+        :param failed: request failed due to network error
+        """
+        state = self._states[server]
+        state.outstanding = max(0, state.outstanding - 1)
+        state.observations += 1
+        if state.observations == 1:
+            state.latency = latency
+        elif not failed:
+            state.latency += self.decay * (latency - state.latency)
+        state.error_rate += self.decay * (float(failed) - state.error_rate)
+        if (
+            failed
+            and state.observations >= self.min_observations
+            and state.error_rate >= self.error_threshold
+        ):
+            state.down_until = time.monotonic() + self.cooldown
+            # Give the server a fresh chance after cooldown
+            state.error_rate = self.error_threshold / 2
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            server.base: {
+                "latency": state.latency,
+                "outstanding": state.outstanding,
+                "error_rate": state.error_rate,
+                "healthy": self.is_healthy(server),
+            }
+            for server, state in self._states.items()
+        }
+
+    def api_url(self, token: str, method: str) -> str:
+        """
+        Generate URL for API methods on the most preferable server
+
+        :param token: Client token
+        :param method: API method name (case insensitive)
+        :return: URL
+        """
+        return self.select().api_url(token=token, method=method)
+
+    def file_url(self, token: str, path: Union[str, Path]) -> str:
+        """
+        Generate URL for downloading files from the most preferable server
+
+        :param token: Client token
+        :param path: file path
+        :return: URL
+        """
+        return self.select().file_url(token=token, path=path)
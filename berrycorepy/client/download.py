@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from berrycorepy import loggers
+from berrycorepy.client.session.BaseSession import BaseSession, ContentInfo
+from berrycorepy.exceptions import ClientDownloadError
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+READ_SIZE = 256 * 1024
+WRITE_SIZE = 1024 * 1024
+"""Received data is collected up to this size before it's written in executor"""
+
+_IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@dataclass(frozen=True)
+class DownloadResult:
+    """
+    Completed download
+    """
+
+    path: Path
+    """Downloaded file"""
+    size: int
+    """File size in bytes"""
+    downloaded: int
+    """Bytes received by this download, without bytes resumed from partial file"""
+    elapsed: float
+    """Download duration in seconds"""
+    chunks: int
+    """Number of range requests, :code:`0` for single stream download"""
+    checksum: Optional[str] = None
+    """Hex digest of the file, if it was requested"""
+
+    @property
+    def resumed(self) -> int:
+        """
+        Bytes reused from partial file of previous attempt
+        """
+        return self.size - self.downloaded
+
+    @property
+    def throughput(self) -> float:
+        """
+        Download speed in bytes per second
+        """
+        return self.downloaded / self.elapsed if self.elapsed else 0.0
+
+
+class _Writer:
+    def __init__(self, fd: int, path: Path) -> None:
+        self.fd = fd
+        self.path = path
+        self._lock: Optional[asyncio.Lock] = None if hasattr(os, "pwrite") else asyncio.Lock()
+        self._writes: Set["asyncio.Future[None]"] = set()
+
+    async def write(self, data: Union[bytes, bytearray], offset: int) -> None:
+        if self._lock is None:
+            # Positional write doesn't move shared file offset, so chunks don't need a lock
+            await self._run(_pwrite, self.fd, data, offset)
+            return
+        async with self._lock:
+            await self._run(_seek_write, self.fd, data, offset)
+
+    async def wait(self) -> None:
+        """
+        Wait for writes left running by cancelled chunks, so the file can be closed
+        """
+        await asyncio.gather(*self._writes, return_exceptions=True)
+
+    async def _run(self, func: Callable[..., None], *args: Any) -> None:
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        self._writes.add(future)
+        future.add_done_callback(self._writes.discard)
+        # Thread can't be interrupted, cancelled chunk leaves the write to complete
+        await asyncio.shield(future)
+
+
+class _State:
+    def __init__(self, path: Path, dumps: Callable[[], Dict[str, Any]], save_delay: float) -> None:
+        self.path = path
+        self.dumps = dumps
+        self.save_delay = save_delay
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_lock = asyncio.Lock()
+        self._tasks: Set["asyncio.Future[None]"] = set()
+
+    def changed(self) -> None:
+        if self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(
+                self.save_delay, self._start_flush
+            )
+
+    async def flush(self) -> None:
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        async with self._save_lock:
+            # State is taken under the lock, so a newer state is never overwritten
+            data = json.dumps(self.dumps())
+            await asyncio.get_running_loop().run_in_executor(None, _write_state, self.path, data)
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+    def _start_flush(self) -> None:
+        self._save_handle = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: "asyncio.Future[None]") -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            loggers.session.warning(
+                "Unable to save download state %s: %s", self.path, task.exception()
+            )
+
+
+class Downloader:
+    def __init__(
+        self,
+        session: BaseSession,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        retries: int = 2,
+        timeout: int = 30,
+        resume: bool = True,
+        save_delay: float = 1.0,
+    ) -> None:
+        """
+        Download files with concurrent HTTP range requests
+
+        Files larger than one chunk are preallocated and their chunks are written directly
+        at their offsets. Progress is stored next to the partial file, so interrupted
+        download continues from completed chunks. Servers without range support
+        are downloaded with a single stream.
+
+        :param session: HTTP session
+        :param chunk_size: size of range requested at once
+        :param concurrency: maximum number of simultaneous range requests
+        :param retries: number of repeats of failed chunk
+        :param timeout: timeout of connecting and of each read in seconds,
+            duration of the whole download is not limited
+        :param resume: continue from partial file of previous attempt
+        :param save_delay: seconds to collect completed chunks before progress is written,
+            it's always written when download stops
+        """
+        if chunk_size < 1 or concurrency < 1:
+            raise ValueError("Chunk size and concurrency should be positive")
+        if save_delay < 0:
+            raise ValueError("Save delay should not be negative")
+        self.session = session
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.timeout = timeout
+        self.resume = resume
+        self.save_delay = save_delay
+
+    async def download(
+        self,
+        url: str,
+        destination: Union[str, Path],
+        size: Optional[int] = None,
+        checksum: Optional[str] = None,
+        algorithm: str = "sha256",
+    ) -> DownloadResult:
+        """
+        Download file
+
+        :param url: file URL
+        :param destination: path of the file, it's replaced only after successful verification
+        :param size: expected size in bytes
+        :param checksum: expected hex digest of the file
+        :param algorithm: :mod:`hashlib` algorithm of the checksum
+        :return: download summary
+        :raise ClientDownloadError: when download fails or size or checksum doesn't match
+        """
+        destination = Path(destination)
+        part = destination.with_name(destination.name + ".part")
+        state_path = destination.with_name(destination.name + ".part.json")
+        started = time.perf_counter()
+
+        try:
+            info = await self.session.probe_content(url, headers=_IDENTITY, timeout=self.timeout)
+        except Exception as e:
+            raise _download_error(e, destination) from e
+        if size is not None and info.size is not None and size != info.size:
+            raise ClientDownloadError(
+                f"Expected {size} bytes, but server reports {info.size} bytes", str(destination)
+            )
+
+        if info.size is not None and info.accept_ranges and info.size > self.chunk_size:
+            downloaded, chunks = await self._download_ranges(url, info, part, state_path)
+            digest = None
+            if checksum is not None:
+                digest = await asyncio.get_running_loop().run_in_executor(
+                    None, _file_digest, part, algorithm
+                )
+        else:
+            try:
+                downloaded, digest = await self._download_stream(
+                    url, part, algorithm if checksum is not None else None
+                )
+            except Exception as e:
+                raise _download_error(e, destination) from e
+            chunks = 0
+
+        actual_size = part.stat().st_size
+        expected_size = info.size if info.size is not None else size
+        if expected_size is not None and actual_size != expected_size:
+            raise ClientDownloadError(
+                f"Downloaded {actual_size} bytes instead of {expected_size} bytes",
+                str(destination),
+            )
+        if checksum is not None and digest != checksum.lower():
+            part.unlink()
+            state_path.unlink(missing_ok=True)
+            raise ClientDownloadError(
+                f"{algorithm} checksum mismatch: got {digest}", str(destination)
+            )
+
+        os.replace(part, destination)
+        state_path.unlink(missing_ok=True)
+        return DownloadResult(
+            path=destination,
+            size=actual_size,
+            downloaded=downloaded,
+            elapsed=time.perf_counter() - started,
+            chunks=chunks,
+            checksum=digest,
+        )
+
+    async def _download_stream(
+        self, url: str, part: Path, algorithm: Optional[str]
+    ) -> Tuple[int, Optional[str]]:
+        digest = hashlib.new(algorithm) if algorithm else None
+        downloaded = 0
+        with part.open("wb") as file:
+            async for data in self.session.stream_content(
+                url, headers=dict(_IDENTITY), timeout=self.timeout, chunk_size=READ_SIZE
+            ):
+                file.write(data)
+                if digest is not None:
+                    digest.update(data)
+                downloaded += len(data)
+        return downloaded, digest.hexdigest() if digest is not None else None
+
+    def _load_state(self, url: str, info: ContentInfo, part: Path, state_path: Path) -> Set[int]:
+        if not self.resume:
+            return set()
+        try:
+            state = json.loads(state_path.read_text())
+            part_size = part.stat().st_size
+        except (OSError, ValueError):
+            return set()
+        if (
+            state.get("source") != _source_key(url)
+            or state.get("size") != info.size
+            or state.get("chunk_size") != self.chunk_size
+            or state.get("etag") != info.etag
+            or state.get("last_modified") != info.last_modified
+            or part_size != info.size
+        ):
+            loggers.session.info("Partial download %s is outdated, start over", part)
+            return set()
+        return set(state.get("done", ()))
+
+    def _dump_state(self, url: str, info: ContentInfo, done: Set[int]) -> Dict[str, Any]:
+        return {
+            "source": _source_key(url),
+            "size": info.size,
+            "chunk_size": self.chunk_size,
+            "etag": info.etag,
+            "last_modified": info.last_modified,
+            "done": sorted(done),
+        }
+
+    async def _download_ranges(
+        self, url: str, info: ContentInfo, part: Path, state_path: Path
+    ) -> Tuple[int, int]:
+        size = info.size
+        assert size is not None
+        loop = asyncio.get_running_loop()
+        done = await loop.run_in_executor(None, self._load_state, url, info, part, state_path)
+        ranges: List[Tuple[int, int, int]] = [
+            (index, start, min(start + self.chunk_size, size))
+            for index, start in enumerate(range(0, size, self.chunk_size))
+            if index not in done
+        ]
+
+        fd = await loop.run_in_executor(None, _open_part, part, size, not done)
+        writer = _Writer(fd, part)
+        state = _State(state_path, lambda: self._dump_state(url, info, done), self.save_delay)
+        try:
+            if not done:
+                await state.flush()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            downloaded = 0
+            failed = False
+
+            async def fetch(index: int, start: int, end: int) -> None:
+                nonlocal downloaded, failed
+                async with semaphore:
+                    if failed:
+                        return
+                    for attempt in range(self.retries + 1):
+                        try:
+                            received = await self._fetch_range(url, writer, start, end)
+                        except Exception as e:
+                            if attempt == self.retries:
+                                # Chunks in progress are completed to be resumed later
+                                failed = True
+                                raise _download_error(e, part) from e
+                            loggers.session.warning(
+                                "Retry chunk %d of %s due to %s: %s",
+                                index,
+                                part,
+                                type(e).__name__,
+                                e,
+                            )
+                            await asyncio.sleep(0.5 * 2**attempt)
+                            continue
+                        downloaded += received
+                        done.add(index)
+                        state.changed()
+                        return
+
+            tasks = [asyncio.ensure_future(fetch(*chunk)) for chunk in ranges]
+            try:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        finally:
+            try:
+                # Completed chunks are kept, so failed download is resumed from them
+                await state.close()
+            finally:
+                await writer.wait()
+                os.close(fd)
+        return downloaded, len(ranges)
+
+    async def _fetch_range(self, url: str, writer: _Writer, start: int, end: int) -> int:
+        offset = start
+        async with self.session.open_content(
+            url,
+            headers={"Range": f"bytes={start}-{end - 1}", **_IDENTITY},
+            timeout=self.timeout,
+            chunk_size=READ_SIZE,
+        ) as (status, headers, chunks):
+            if status != HTTPStatus.PARTIAL_CONTENT:
+                # Whole file sent instead of the range must not be written at range offset
+                raise ClientDownloadError(
+                    f"Expected partial content for range {start}-{end - 1}, got HTTP {status}",
+                    str(writer.path),
+                )
+            buffer = bytearray()
+            async for data in chunks:
+                if offset + len(buffer) + len(data) > end:
+                    raise ClientDownloadError(
+                        "Server ignored requested byte range", str(writer.path)
+                    )
+                buffer += data
+                if len(buffer) >= WRITE_SIZE:
+                    await writer.write(buffer, offset)
+                    offset += len(buffer)
+                    buffer = bytearray()
+            if buffer:
+                await writer.write(buffer, offset)
+                offset += len(buffer)
+        if offset != end:
+            raise ClientDownloadError(
+                f"Range {start}-{end - 1} is incomplete: got {offset - start} bytes",
+                str(writer.path),
+            )
+        return end - start
+
+
+def _download_error(error: Exception, path: Path) -> ClientDownloadError:
+    if isinstance(error, ClientDownloadError):
+        return error
+    if isinstance(error, asyncio.TimeoutError):
+        return ClientDownloadError("Timeout while reading the file", str(path))
+    return ClientDownloadError(f"{type(error).__name__}: {error}", str(path))
+
+
+def _open_part(path: Path, size: int, truncate: bool) -> int:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    if not truncate:
+        return fd
+    try:
+        os.ftruncate(fd, 0)
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:  # not supported by file system
+                os.ftruncate(fd, size)
+        else:
+            os.ftruncate(fd, size)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _pwrite(fd: int, data: Union[bytes, bytearray], offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _seek_write(fd: int, data: Union[bytes, bytearray], offset: int) -> None:
+    os.lseek(fd, offset, os.SEEK_SET)
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _write_state(path: Path, data: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data)
+    os.replace(tmp, path)
+
+
+def _source_key(url: str) -> str:
+    # URL contains client token, it's not stored as is
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _file_digest(path: Path, algorithm: str) -> str:
+    digest = hashlib.new(algorithm)
+    with path.open("rb") as file:
+        while block := file.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
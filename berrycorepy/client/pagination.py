@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Generic,
+    Iterable,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from berrycorepy.methods.base import DangerousMethod
+
+if TYPE_CHECKING:
+    from berrycorepy.client.client import Client
+
+T = TypeVar("T")
+
+DEFAULT_PREFETCH = 2
+DEFAULT_MAX_PREFETCH = 8
+
+
+def _default_items(result: Any) -> Sequence[Any]:
+    return result or ()
+
+
+def _discard(tasks: Iterable[asyncio.Future[Any]]) -> None:
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()  # mark exception of unneeded page as retrieved
+
+
+class PageStrategy(abc.ABC):
+    """
+    Describes how to request the next page of a method
+    """
+
+    def __init__(self, items: Optional[Callable[[Any], Sequence[Any]]] = None) -> None:
+        """
+        :param items: extracts items from method result, by default result itself is a list
+        """
+        self.items = items or _default_items
+
+    def validate(self, method: DangerousMethod[Any]) -> None:
+        """
+        Check that the method can be paginated by this strategy
+
+        :raise ValueError: when the method has no fields addressing pages
+        """
+
+    @staticmethod
+    def _check_field(method: DangerousMethod[Any], field: str, parameter: str) -> None:
+        # Copy of a method with unknown field doesn't send it,
+        # so the same page would be requested again and again
+        if field not in type(method).model_fields:
+            raise ValueError(
+                f"{type(method).__name__} has no field {field!r}, "
+                f"set `{parameter}` of the pagination"
+            )
+
+    @abc.abstractmethod
+    def first(self, method: DangerousMethod[Any]) -> DangerousMethod[Any]:
+        """
+        Get method requesting the first page
+        """
+
+    @abc.abstractmethod
+    def next(
+        self, method: DangerousMethod[Any], result: Any, items: Sequence[Any]
+    ) -> Optional[DangerousMethod[Any]]:
+        """
+        Get method requesting the page after the given one
+
+        :param method: method of received page
+        :param result: method result
+        :param items: items of the page
+        :return: next method or :code:`None` when there are no more pages
+        """
+
+
+class OffsetPagination(PageStrategy):
+    def __init__(
+        self,
+        offset_field: str = "offset",
+        limit_field: Optional[str] = "limit",
+        start: Optional[int] = None,
+        step: Optional[int] = None,
+        items: Optional[Callable[[Any], Sequence[Any]]] = None,
+    ) -> None:
+        """
+        Pages addressed by item offset or by page number
+
+        Page of :code:`limit` items which is shorter than the limit, or an empty page,
+        ends the iteration.
+
+        :param offset_field: method field with offset or page number
+        :param limit_field: method field with page size, if method has it
+        :param start: offset of the first page, by default value of the field in the method
+        :param step: offset increment per page, by default page size. Use :code:`1`
+            when the field is a page number
+        :param items: extracts items from method result
+        """
+        super().__init__(items=items)
+        self.offset_field = offset_field
+        self.limit_field = limit_field
+        self.start = start
+        self.step = step
+
+    def validate(self, method: DangerousMethod[Any]) -> None:
+        self._check_field(method, self.offset_field, "offset_field")
+        if self.limit_field is not None:
+            self._check_field(method, self.limit_field, "limit_field")
+
+    def page_size(self, method: DangerousMethod[Any]) -> Optional[int]:
+        if self.limit_field is None:
+            return None
+        return getattr(method, self.limit_field, None)
+
+    def page(self, method: DangerousMethod[Any], index: int) -> DangerousMethod[Any]:
+        """
+        Get method requesting the page by its index
+        """
+        self.validate(method)
+        start = self.start
+        if start is None:
+            start = getattr(method, self.offset_field, None) or 0
+        step = self.step or self.page_size(method)
+        if not step:
+            raise ValueError(
+                f"Page size of {type(method).__name__} is unknown, "
+                f"set `step` or `limit_field` of the pagination"
+            )
+        return method.model_copy(update={self.offset_field: start + index * step})
+
+    def first(self, method: DangerousMethod[Any]) -> DangerousMethod[Any]:
+        return self.page(method, 0)
+
+    def is_last(self, method: DangerousMethod[Any], items: Sequence[Any]) -> bool:
+        page_size = self.page_size(method)
+        return not items or (page_size is not None and len(items) < page_size)
+
+    def next(
+        self, method: DangerousMethod[Any], result: Any, items: Sequence[Any]
+    ) -> Optional[DangerousMethod[Any]]:
+        if self.is_last(method, items):
+            return None
+        step = self.step or self.page_size(method)
+        offset = getattr(method, self.offset_field) + step
+        return method.model_copy(update={self.offset_field: offset})
+
+
+class CursorPagination(PageStrategy):
+    def __init__(
+        self,
+        next_cursor: Callable[[Any], Optional[Any]],
+        cursor_field: str = "cursor",
+        items: Optional[Callable[[Any], Sequence[Any]]] = None,
+    ) -> None:
+        """
+        Pages chained by cursor returned with each page
+
+        Next page can be requested only after the current one is received,
+        so at most one page is prefetched.
+
+        :param next_cursor: extracts cursor of the next page from method result,
+            :code:`None` ends the iteration
+        :param cursor_field: method field with cursor
+        :param items: extracts items from method result
+        """
+        super().__init__(items=items)
+        self.next_cursor = next_cursor
+        self.cursor_field = cursor_field
+
+    def validate(self, method: DangerousMethod[Any]) -> None:
+        self._check_field(method, self.cursor_field, "cursor_field")
+
+    def first(self, method: DangerousMethod[Any]) -> DangerousMethod[Any]:
+        self.validate(method)
+        return method
+
+    def next(
+        self, method: DangerousMethod[Any], result: Any, items: Sequence[Any]
+    ) -> Optional[DangerousMethod[Any]]:
+        cursor = self.next_cursor(result)
+        if cursor is None:
+            return None
+        return method.model_copy(update={self.cursor_field: cursor})
+
+
+class Paginator(Generic[T]):
+    def __init__(
+        self,
+        client: Client,
+        method: DangerousMethod[Any],
+        strategy: Optional[PageStrategy] = None,
+        prefetch: int = DEFAULT_PREFETCH,
+        max_prefetch: int = DEFAULT_MAX_PREFETCH,
+        max_pages: Optional[int] = None,
+        request_timeout: Optional[int] = None,
+    ) -> None:
+        """
+        Async iterator over items of all pages of the method
+
+        Next pages are requested concurrently while the current one is consumed.
+        Prefetch depth adapts to consumer speed: it grows while the consumer has to wait
+        for pages and shrinks while prefetched pages are waiting for the consumer.
+
+        :param client: Client instance
+        :param method: method requesting the first page
+        :param strategy: page addressing, by default :class:`OffsetPagination`
+        :param prefetch: initial number of pages requested ahead
+        :param max_prefetch: maximum number of pages requested ahead
+        :param max_pages: stop after this number of pages
+        :param request_timeout: Request timeout
+        """
+        if prefetch < 1 or max_prefetch < prefetch:
+            raise ValueError("Prefetch depth should be positive and not exceed max_prefetch")
+        self.client = client
+        self.method = method
+        self.strategy = strategy or OffsetPagination()
+        self.strategy.validate(method)
+        self.prefetch = prefetch
+        self.max_prefetch = max_prefetch
+        self.max_pages = max_pages
+        self.request_timeout = request_timeout
+        self.pages = 0
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        if isinstance(self.strategy, OffsetPagination):
+            return self._iterate_offset(self.strategy)
+        return self._iterate_chained()
+
+    def _fetch(self, method: DangerousMethod[Any]) -> asyncio.Future[Any]:
+        return asyncio.ensure_future(self.client(method, request_timeout=self.request_timeout))
+
+    def _adapt(self, waited: bool) -> None:
+        if waited:
+            self.prefetch = min(self.prefetch + 1, self.max_prefetch)
+        else:
+            self.prefetch = max(self.prefetch - 1, 1)
+
+    async def _iterate_offset(self, strategy: OffsetPagination) -> AsyncIterator[T]:
+        pending: Deque[asyncio.Future[Any]] = deque()
+        methods: Deque[DangerousMethod[Any]] = deque()
+        index = 0
+
+        def fill() -> None:
+            nonlocal index
+            while len(pending) <= self.prefetch and (
+                self.max_pages is None or index < self.max_pages
+            ):
+                method = strategy.page(self.method, index)
+                methods.append(method)
+                pending.append(self._fetch(method))
+                index += 1
+
+        try:
+            fill()
+            while pending:
+                task = pending[0]
+                waited = not task.done()
+                result = await task
+                pending.popleft()
+                method = methods.popleft()
+                self.pages += 1
+                items = strategy.items(result)
+                if strategy.is_last(method, items):
+                    # Pages after the last one are not needed
+                    _discard(pending)
+                    pending.clear()
+                else:
+                    self._adapt(waited)
+                    fill()
+                for item in items:
+                    yield item
+        finally:
+            _discard(pending)
+
+    async def _iterate_chained(self) -> AsyncIterator[T]:
+        strategy = self.strategy
+        method: Optional[DangerousMethod[Any]] = strategy.first(self.method)
+        task: Optional[asyncio.Future[Any]] = self._fetch(method)  # type: ignore[arg-type]
+        try:
+            while task is not None and method is not None:
+                result = await task
+                self.pages += 1
+                items = strategy.items(result)
+                # Request the next page before the current one is consumed
+                method = strategy.next(method, result, items)
+                task = None
+                if method is not None and (self.max_pages is None or self.pages < self.max_pages):
+                    task = self._fetch(method)
+                for item in items:
+                    yield item
+        finally:
+            if task is not None:
+                _discard((task,))
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from types import TracebackType
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+)
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.BaseSession import BaseSession
+from berrycorepy.client.session.middlewares.base import token_hash
+from berrycorepy.methods.base import DangerousMethod
+
+T = TypeVar("T")
+
+
+class FairLimiter:
+    def __init__(self, limit: int) -> None:
+        """
+        Limit of simultaneous requests shared by many tokens
+
+        Waiting requests are queued per token and free slots are given
+        to the tokens in turn, so a token with many queued requests
+        doesn't delay requests of other tokens.
+
+        :param limit: maximum number of simultaneous requests
+        """
+        if limit < 1:
+            raise ValueError("Limit should be positive")
+        self.limit = limit
+        self.active = 0
+        self._queues: OrderedDict[str, Deque[asyncio.Future[None]]] = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def acquire(self, key: str) -> None:
+        if self.active < self.limit and not self._queues:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was already handed over, pass it on
+                self.release()
+            else:
+                # Cancelled waiter may be already dropped by release() in the same iteration
+                queue = self._queues.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[key]
+            raise
+
+    def release(self) -> None:
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class PooledClient(Client):
+    def __init__(
+            self,
+            token: str,
+            pool: ClientPool,
+            session: BaseSession,
+            concurrency: Optional[int] = None,
+            limiter: Optional[FairLimiter] = None,
+    ) -> None:
+        """
+        Client sharing HTTP session with other clients of the :class:`ClientPool`.
+        Exiting its context releases the client instead of closing the shared session.
+        """
+        super().__init__(token, session=session)
+        self.pool = pool
+        self.token_hash = token_hash(token)
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+        self._limiter = limiter
+
+    async def __call__(
+            self, method: DangerousMethod[T], request_timeout: Optional[int] = None
+    ) -> T:
+        if self._semaphore is None:
+            return await self._call(method, request_timeout)
+        async with self._semaphore:
+            return await self._call(method, request_timeout)
+
+    async def _call(self, method: DangerousMethod[T], request_timeout: Optional[int]) -> T:
+        if self._limiter is None:
+            return await super().__call__(method, request_timeout=request_timeout)
+        await self._limiter.acquire(self.token_hash)
+        try:
+            return await super().__call__(method, request_timeout=request_timeout)
+        finally:
+            self._limiter.release()
+
+    async def __aenter__(self) -> "PooledClient":
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        await self.pool.release(self)
+
+    @asynccontextmanager
+    async def context(self, auto_close: bool = True) -> AsyncIterator[PooledClient]:
+        """
+        Generate client context
+
+        :param auto_close: release the client on exit
+        """
+        try:
+            yield self
+        finally:
+            if auto_close:
+                await self.pool.release(self)
+
+
+class ClientPool:
+    def __init__(
+            self,
+            session_factory: Optional[Callable[[], BaseSession]] = None,
+            shards: int = 1,
+            per_token_concurrency: Optional[int] = None,
+            concurrency: Optional[int] = 100,
+    ) -> None:
+        """
+        Pool of clients for many tokens sharing HTTP sessions
+
+        Tokens are distributed between :code:`shards` sessions by token hash,
+        so all clients of one shard share one connector and connection pool.
+        Sessions are closed only when the pool is closed and all acquired clients are released.
+
+        Requests of each shard are limited by :class:`FairLimiter`, which serves
+        waiting tokens in turn, so a busy token can't delay requests of other tokens.
+
+        :param session_factory: creates shard session, by default :class:`AiohttpSession`
+        :param shards: number of sessions
+        :param per_token_concurrency: maximum number of simultaneous requests of each token
+        :param concurrency: maximum number of simultaneous requests of each shard.
+            It should not exceed connection limit of the session, otherwise requests
+            wait in the connection pool queue, which is not fair.
+            Default is 100, the default limit of :class:`AiohttpSession`.
+            :code:`None` disables the limit
+        """
+        if shards < 1:
+            raise ValueError("At least one shard is required")
+        self.session_factory = session_factory or AiohttpSession
+        self.per_token_concurrency = per_token_concurrency
+        self.concurrency = concurrency
+        self.sessions: List[BaseSession] = [self.session_factory() for _ in range(shards)]
+        self.limiters: List[Optional[FairLimiter]] = [
+            FairLimiter(concurrency) if concurrency else None for _ in range(shards)
+        ]
+
+        self._clients: Dict[str, PooledClient] = {}
+        self._refs: Dict[str, int] = {}
+        self._closing = False
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, token: str) -> bool:
+        return token_hash(token) in self._clients
+
+    @property
+    def references(self) -> int:
+        """
+        Number of acquired and not yet released clients
+        """
+        return sum(self._refs.values())
+
+    def _shard_index(self, token: str) -> int:
+        return int(token_hash(token)[:16], 16) % len(self.sessions)
+
+    def shard(self, token: str) -> BaseSession:
+        """
+        Get session the token is assigned to
+        """
+        return self.sessions[self._shard_index(token)]
+
+    def get(self, token: str) -> PooledClient:
+        """
+        Get or create client for the token without acquiring it
+        """
+        if self._closing:
+            raise RuntimeError("ClientPool is closed")
+        key = token_hash(token)
+        client = self._clients.get(key)
+        if client is None:
+            index = self._shard_index(token)
+            client = self._clients[key] = PooledClient(
+                token,
+                pool=self,
+                session=self.sessions[index],
+                concurrency=self.per_token_concurrency,
+                limiter=self.limiters[index],
+            )
+            self._refs[key] = 0
+        return client
+
+    def get_by_hash(self, key: str) -> Optional[PooledClient]:
+        """
+        Find client by :func:`token_hash` of its token
+        """
+        return self._clients.get(key)
+
+    def acquire(self, token: str) -> PooledClient:
+        """
+        Get client for the token and hold the shared session open until it's released,
+        :code:`async with pool.acquire(token) as client` releases it automatically
+        """
+        client = self.get(token)
+        self._refs[client.token_hash] += 1
+        return client
+
+    async def release(self, client: PooledClient) -> None:
+        """
+        Release acquired client
+        """
+        refs = self._refs.get(client.token_hash, 0)
+        if refs:
+            self._refs[client.token_hash] = refs - 1
+        if self._closing:
+            await self._close_if_unused()
+
+    def remove(self, token: str) -> None:
+        """
+        Forget client of the token, the client can't be used after that
+        """
+        key = token_hash(token)
+        self._clients.pop(key, None)
+        self._refs.pop(key, None)
+
+    async def _close_if_unused(self) -> None:
+        if self._closed or self.references:
+            return
+        self._closed = True
+        await asyncio.gather(*(session.close() for session in self.sessions))
+
+    async def close(self) -> None:
+        """
+        Close shared sessions as soon as all acquired clients are released
+        """
+        self._closing = True
+        await self._close_if_unused()
+
+    async def __aenter__(self) -> "ClientPool":
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "references": self.references,
+            "shards": len(self.sessions),
+            "active": sum(limiter.active for limiter in self.limiters if limiter),
+            "waiting": sum(limiter.waiting for limiter in self.limiters if limiter),
+        }
@@ -2,26 +2,111 @@ from __future__ import annotations
 import abc
 import datetime
 import json
+import secrets
+import time
+from dataclasses import dataclass
 from enum import Enum
 from http import HTTPStatus
 from types import TracebackType
-from typing import Final, Callable, Any, cast, Optional, Dict, AsyncGenerator, Type, TYPE_CHECKING
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Final,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    get_args,
+)
 
 from pydantic import ValidationError
 
-from berrycorepy.client.dangerous import PRODUCTION, DangerousAPIServer
+from berrycorepy import loggers
+from berrycorepy.client.dangerous import PRODUCTION, DangerousAPIServer, DangerousAPIServerPool
+from berrycorepy.client.session.compression import Compression
+from berrycorepy.client.session.metrics import RequestMetrics, measure
 from berrycorepy.client.session.middlewares.manager import RequestMiddlewareManager
-from berrycorepy.exceptions import ClientDecodeError, DangerousAPIError
+from berrycorepy.client.session.streaming import ResultScanner
+from berrycorepy.exceptions import (
+    ClientDecodeError,
+    DangerousAPIError,
+    DangerousBadRequest,
+    DangerousConflictError,
+    DangerousEntityTooLarge,
+    DangerousForbiddenError,
+    DangerousNetworkError,
+    DangerousNotFound,
+    DangerousRetryAfter,
+    DangerousServerError,
+    DangerousUnauthorizedError,
+    RestartingDangerous,
+)
+from berrycorepy.methods import READ_ONLY_METHODS
 from berrycorepy.methods.base import DangerousType, DangerousMethod, Response
+from berrycorepy.methods.validators import response_validators
 from berrycorepy.types.base import DangerousObject
+from berrycorepy.types.input_file import InputFile
+from berrycorepy.types.lazy import lazy_validate, supports_lazy_result
 
 if TYPE_CHECKING:
     from berrycorepy.client.client import Client
 
+_T = TypeVar("_T")
 _JsonLoads = Callable[..., Any]
 _JsonDumps = Callable[..., str]
 DEFAULT_TIMEOUT: Final[float] = 60.0
 
+
+@dataclass(frozen=True)
+class ContentInfo:
+    """
+    Metadata of remote file
+    """
+
+    size: Optional[int]
+    """Size in bytes, if server reported it"""
+    accept_ranges: bool
+    """Server supports byte range requests"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+
+    @classmethod
+    def from_headers(cls, status: int, headers: Mapping[str, str]) -> ContentInfo:
+        """
+        Build from response to HEAD request or to GET request of the first byte range
+        """
+        size: Optional[int] = None
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            accept_ranges = True
+            total = headers.get("content-range", "").rpartition("/")[2]
+            if total.isdigit():
+                size = int(total)
+        else:
+            accept_ranges = headers.get("accept-ranges", "").lower() == "bytes"
+            length = headers.get("content-length", "")
+            if length.isdigit():
+                size = int(length)
+        return cls(
+            size=size,
+            accept_ranges=accept_ranges,
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            content_type=headers.get("content-type"),
+        )
+
+
 class BaseSession(abc.ABC):
     """
     This is base class for all HTTP sessions in aiogram.
@@ -31,33 +116,71 @@ class BaseSession(abc.ABC):
 
     def __init__(
         self,
-        api: DangerousAPIServer = PRODUCTION,
+        api: Union[DangerousAPIServer, DangerousAPIServerPool] = PRODUCTION,
         json_loads: _JsonLoads = json.loads,
         json_dumps: _JsonDumps = json.dumps,
         timeout: float = DEFAULT_TIMEOUT,
+        validate_json: bool = False,
+        metrics: Optional[RequestMetrics] = None,
+        failover_methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None,
+        compression: Optional[Compression] = None,
+        lazy_results: bool = False,
     ) -> None:
         """
 
-        :param api: Dangerous Client API URL patterns
-        :param json_loads: JSON loader
+        :param api: Dangerous Client API URL patterns, or pool of mirrors
+        :param json_loads: JSON loader, receives raw response body as bytes
         :param json_dumps: JSON dumper
         :param timeout: Session scope request timeout
+        :param validate_json: Validate raw response body with pydantic-core in a single pass,
+            without building intermediate Python objects. :code:`json_loads` is not used then
+        :param metrics: Collector of request latency and error metrics
+        :param failover_methods: Methods repeated on the next mirror after network error
+            when :code:`api` is a pool of mirrors. By default, only read-only methods
+        :param compression: Content coding of requests and responses,
+            by default transport defaults are used
+        :param lazy_results: Keep decoded JSON of result objects and validate their fields
+            on first access, see :mod:`berrycorepy.types.lazy`.
+            Takes precedence over :code:`validate_json` for such results
         """
         self.api = api
         self.json_loads = json_loads
         self.json_dumps = json_dumps
         self.timeout = timeout
+        self.validate_json = validate_json
+        self.metrics = metrics
+        self.failover_methods = frozenset(
+            READ_ONLY_METHODS if failover_methods is None else failover_methods
+        )
+        self.compression = compression
+        self.lazy_results = lazy_results
 
         self.middleware = RequestMiddlewareManager()
 
-    def check_response(
-            self, client: Client, method: DangerousMethod[DangerousType], status_code: int, content: str
+    def decode_response(
+            self, client: Client, method: DangerousMethod[DangerousType], content: Union[str, bytes]
     ) -> Response[DangerousType]:
         """
-        Check response status
+        Decode and validate response body
         """
+        response_type = response_validators.get(type(method))
+        context = {"client": client}
+        api_method = method.__api_method__
+        returning = type(method).__returning__
+        lazy = self.lazy_results and supports_lazy_result(returning)
+
+        if self.validate_json and not lazy:
+            try:
+                with measure(self.metrics, api_method, "validate"):
+                    return response_type.model_validate_json(content, context=context)
+            except ValidationError as e:
+                if e.errors()[0]["type"] == "json_invalid":
+                    raise ClientDecodeError("Failed to decode object", e, content)
+                raise ClientDecodeError("Failed to deserialize object", e, content)
+
         try:
-            json_data = self.json_loads(content)
+            with measure(self.metrics, api_method, "decode"):
+                json_data = self.json_loads(content)
         except Exception as e:
             # Handled error type can't be classified as specific error
             # in due to decoder can be customized and raise any exception
@@ -65,38 +188,73 @@ class BaseSession(abc.ABC):
             raise ClientDecodeError("Failed to decode object", e, content)
 
         try:
-            response_type = Response[method.__returning__]  # type: ignore
-            response = response_type.model_validate(json_data, context={"client": client})
+            with measure(self.metrics, api_method, "validate"):
+                if not lazy:
+                    return response_type.model_validate(json_data, context=context)
+                response = Response[Any].model_validate(json_data, context=context)
+                response.result = lazy_validate(returning, response.result, client=client)
+                return response
         except ValidationError as e:
             raise ClientDecodeError("Failed to deserialize object", e, json_data)
 
+    def check_response(
+            self,
+            client: Client,
+            method: DangerousMethod[DangerousType],
+            status_code: int,
+            content: Union[str, bytes],
+    ) -> Response[DangerousType]:
+        """
+        Check response status
+        """
+        try:
+            response = self.decode_response(client=client, method=method, content=content)
+        except ClientDecodeError as e:
+            if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                # Proxies and load balancers answer with pages instead of API responses
+                raise DangerousServerError(
+                    method=method, message=f"HTTP {status_code}, {e.message.lower()}"
+                ) from e
+            raise
+        self.raise_for_status(method=method, status_code=status_code, response=response)
+        return response
+
+    def raise_for_status(
+            self,
+            method: DangerousMethod[DangerousType],
+            status_code: int,
+            response: Response[Any],
+    ) -> None:
+        """
+        Raise typed API error for failed response
+        """
         if HTTPStatus.OK <= status_code <= HTTPStatus.IM_USED and response.ok:
-            return response
+            return
 
         description = cast(str, response.description)
 
-        #todo if parameters := response.parameters:
-        #     if parameters.retry_after:
-        #         raise DangerousRetryAfter(
-        #             method=method, message=description, retry_after=parameters.retry_after
-        #         )
-        #
-        # if status_code == HTTPStatus.BAD_REQUEST:
-        #     raise DangerousBadRequest(method=method, message=description)
-        # if status_code == HTTPStatus.NOT_FOUND:
-        #     raise DangerousNotFound(method=method, message=description)
-        # if status_code == HTTPStatus.CONFLICT:
-        #     raise DangerousConflictError(method=method, message=description)
-        # if status_code == HTTPStatus.UNAUTHORIZED:
-        #     raise DangerousUnauthorizedError(method=method, message=description)
-        # if status_code == HTTPStatus.FORBIDDEN:
-        #     raise DangerousForbiddenError(method=method, message=description)
-        # if status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE:
-        #     raise DangerousEntityTooLarge(method=method, message=description)
-        # if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
-        #     if "restart" in description:
-        #         raise RestartingDangerous(method=method, message=description)
-        #     raise DangerousServerError(method=method, message=description)
+        if parameters := response.parameters:
+            if parameters.retry_after:
+                raise DangerousRetryAfter(
+                    method=method, message=description, retry_after=parameters.retry_after
+                )
+
+        if status_code == HTTPStatus.BAD_REQUEST:
+            raise DangerousBadRequest(method=method, message=description)
+        if status_code == HTTPStatus.NOT_FOUND:
+            raise DangerousNotFound(method=method, message=description)
+        if status_code == HTTPStatus.CONFLICT:
+            raise DangerousConflictError(method=method, message=description)
+        if status_code == HTTPStatus.UNAUTHORIZED:
+            raise DangerousUnauthorizedError(method=method, message=description)
+        if status_code == HTTPStatus.FORBIDDEN:
+            raise DangerousForbiddenError(method=method, message=description)
+        if status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE:
+            raise DangerousEntityTooLarge(method=method, message=description)
+        if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            if description and "restart" in description:
+                raise RestartingDangerous(method=method, message=description)
+            raise DangerousServerError(method=method, message=description)
 
         raise DangerousAPIError(
             method=method,
@@ -142,6 +300,112 @@ class BaseSession(abc.ABC):
         """
         yield b""
 
+    async def probe_content(
+            self,
+            url: str,
+            headers: Optional[Dict[str, Any]] = None,
+            timeout: int = 30,
+    ) -> ContentInfo:
+        """
+        Get size and range support of remote file without downloading it
+
+        :param url: file URL
+        :param headers: additional request headers
+        :param timeout: request timeout
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support probing content")
+
+    def open_content(
+            self,
+            url: str,
+            headers: Optional[Dict[str, Any]] = None,
+            timeout: int = 30,
+            chunk_size: int = 65536,
+    ) -> AsyncContextManager[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        """
+        Send GET request and open response body to be read chunk by chunk,
+        response status is not checked
+
+        Requests with :code:`Range` header always ask for identity coding,
+        because ranges of encoded content can't be decoded separately.
+
+        :param url: file URL
+        :param headers: additional request headers
+        :param timeout: maximum time to connect and to wait for each chunk of the body
+        :param chunk_size: maximum size of chunks
+        :return: context manager of status code, response headers and body chunks
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support opening content")
+
+    def open_stream(
+            self,
+            client: Client,
+            method: DangerousMethod[DangerousType],
+            timeout: Optional[float] = None,
+    ) -> AsyncContextManager[Tuple[int, AsyncIterator[bytes]]]:
+        """
+        Send request and open response body to be read chunk by chunk
+
+        :param client: Client instance
+        :param method: Method instance
+        :param timeout: maximum time to wait for the response and for each chunk of its body
+        :return: context manager of status code and body chunks
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support streaming responses")
+
+    async def stream(
+            self,
+            client: Client,
+            method: DangerousMethod[DangerousType],
+            timeout: Optional[float] = None,
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Call method returning list and yield validated items as the response body arrives,
+        only one item is kept in memory at a time.
+        Middlewares are not applied to streamed calls.
+
+        Response status is checked after the whole body is received,
+        so API error is raised at the end of iteration.
+
+        :param client: Client instance
+        :param method: Method instance, its returning type must be a list
+        :param timeout: maximum time to wait for the response and for each chunk of its body
+        """
+        adapter = response_validators.get_item(type(method))
+        item_type = get_args(type(method).__returning__)[0]
+        lazy = self.lazy_results and supports_lazy_result(item_type)
+        context = {"client": client}
+        scanner = ResultScanner()
+
+        async with self.open_stream(client, method, timeout=timeout) as (status_code, chunks):
+            if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                # Error response has no items, it's checked as a whole
+                content = b"".join([chunk async for chunk in chunks])
+                self.check_response(client, method, status_code, content)
+            async for chunk in chunks:
+                try:
+                    items = scanner.feed(chunk)
+                except ValueError as e:
+                    raise ClientDecodeError("Failed to decode object", e, chunk)
+                for item in items:
+                    try:
+                        if lazy:
+                            yield lazy_validate(item_type, self.json_loads(item), client=client)
+                        else:
+                            yield adapter.validate_json(item, context=context)
+                    except ValidationError as e:
+                        raise ClientDecodeError("Failed to deserialize object", e, item)
+        try:
+            scanner.close()
+        except ValueError as e:
+            raise ClientDecodeError("Failed to decode object", e, b"")
+
+        try:
+            response = Response[Any].model_validate(scanner.fields, context=context)
+        except ValidationError as e:
+            raise ClientDecodeError("Failed to deserialize object", e, scanner.fields)
+        self.raise_for_status(method=method, status_code=status_code, response=response)
+
     def prepare_value(
             self,
             value: Any,
@@ -157,10 +421,10 @@ class BaseSession(abc.ABC):
         if isinstance(value, str):
             return value
 
-  #TODO file attach      # if isinstance(value, InputFile):
-        #     key = secrets.token_urlsafe(10)
-        #     files[key] = value
-        #     return f"attach://{key}"
+        if isinstance(value, InputFile):
+            key = secrets.token_urlsafe(10)
+            files[key] = value
+            return f"attach://{key}"
 
         if isinstance(value, dict):
             value = {
@@ -196,7 +460,9 @@ class BaseSession(abc.ABC):
         if isinstance(value, datetime.datetime):
             return str(round(value.timestamp()))
         if isinstance(value, Enum):
-            return self.prepare_value(value.value, client=client, files=files)
+            return self.prepare_value(
+                value.value, client=client, files=files, _dumps_json=_dumps_json
+            )
         if isinstance(value, DangerousObject):
             return self.prepare_value(
                 value.model_dump(warnings=False),
@@ -208,14 +474,111 @@ class BaseSession(abc.ABC):
             return self.json_dumps(value)
         return value
 
+    def build_json_body(
+            self, client: Client, method: DangerousMethod[DangerousType]
+    ) -> Optional[str]:
+        """
+        Serialize method parameters into JSON request body in a single pass
+
+        :param client: Client instance
+        :param method: Method instance
+        :return: JSON document or :code:`None` when method contains files
+            and must be sent as multipart form
+        """
+        files: Dict[str, Any] = {}
+        data = {}
+        for key, value in method.model_dump(warnings=False).items():
+            value = self.prepare_value(value, client=client, files=files, _dumps_json=False)
+            if value is None:
+                continue
+            data[key] = value
+        if files:
+            return None
+        return self.json_dumps(data)
+
+    @property
+    def servers(self) -> Sequence[DangerousAPIServer]:
+        """
+        All API servers the session can send requests to
+        """
+        if isinstance(self.api, DangerousAPIServerPool):
+            return self.api.servers
+        return (self.api,)
+
+    def select_server(self) -> DangerousAPIServer:
+        """
+        Get API server for the next request, the best mirror when :code:`api` is a pool
+        """
+        if isinstance(self.api, DangerousAPIServerPool):
+            return self.api.select()
+        return self.api
+
+    async def send_routed(
+            self,
+            method: DangerousMethod[DangerousType],
+            send: Callable[[DangerousAPIServer], Awaitable[_T]],
+    ) -> _T:
+        """
+        Send request to the API server, or to the best mirror with failover
+
+        :param method: Method instance
+        :param send: sends request to the given server,
+            should raise :class:`berrycorepy.exceptions.DangerousNetworkError` on network errors
+        :return: result of :code:`send`
+        """
+        api = self.api
+        if not isinstance(api, DangerousAPIServerPool):
+            return await send(api)
+
+        servers = api.candidates()
+        if type(method) not in self.failover_methods:
+            servers = servers[:1]
+        for index, server in enumerate(servers):
+            api.started(server)
+            started = time.monotonic()
+            try:
+                result = await send(server)
+            except DangerousEntityTooLarge:
+                api.finished(server, time.monotonic() - started, failed=False)
+                raise
+            except DangerousNetworkError as e:
+                api.finished(server, time.monotonic() - started, failed=True)
+                if index + 1 == len(servers):
+                    raise
+                loggers.session.warning(
+                    "Failover request with method=%r from %s due to %s",
+                    type(method).__name__,
+                    server.base,
+                    e,
+                )
+                continue
+            except BaseException:
+                api.finished(server, time.monotonic() - started, failed=False)
+                raise
+            api.finished(server, time.monotonic() - started, failed=False)
+            return result
+        raise AssertionError("unreachable")  # pragma: no cover
+
     async def __call__(
             self,
             client: Client,
             method: DangerousMethod[DangerousType],
             timeout: Optional[int] = None,
     ) -> DangerousType:
-        middleware = self.middleware.wrap_middlewares(self.make_request, timeout=timeout)
-        return cast(DangerousType, await middleware(client, method))
+        middleware = self.middleware.wrap_middlewares(
+            self.make_request, method_type=type(method), timeout=timeout
+        )
+        if self.metrics is None:
+            return cast(DangerousType, await middleware(client, method))
+
+        started = time.perf_counter()
+        try:
+            return cast(DangerousType, await middleware(client, method))
+        except Exception as e:
+            self.metrics.error(method.__api_method__, e)
+            raise
+        finally:
+            self.metrics.observe(method.__api_method__, "total", time.perf_counter() - started)
 
     async def __aenter__(self) -> BaseSession:
         return self
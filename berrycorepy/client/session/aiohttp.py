@@ -2,30 +2,50 @@ from __future__ import annotations
 
 import asyncio
 import ssl
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import (
     TYPE_CHECKING,
     Any,
     AsyncGenerator,
+    AsyncIterator,
     Dict,
     Iterable,
     List,
+    Mapping,
     Optional,
     Tuple,
     Type,
     Union,
     cast,
 )
+from urllib.parse import urlsplit
 
 import certifi
-from aiohttp import BasicAuth, ClientError, ClientSession, FormData, TCPConnector
-from aiohttp.hdrs import USER_AGENT
+from aiohttp import (
+    BasicAuth,
+    ClientError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    FormData,
+    TCPConnector,
+    TraceConfig,
+)
+from aiohttp.hdrs import ACCEPT_ENCODING, CONTENT_ENCODING, CONTENT_TYPE, RANGE, USER_AGENT
 from aiohttp.http import SERVER_SOFTWARE
+from multidict import CIMultiDict
 
+from berrycorepy import loggers
 from berrycorepy.__meta__ import __version__
+from berrycorepy.client.dangerous import DangerousAPIServer
 from berrycorepy.methods.base import DangerousMethod
-from .BaseSession import BaseSession
+from .BaseSession import BaseSession, ContentInfo
+from .metrics import measure
+from .payload import InputFilePayload
 
-from ...exceptions import DangerousNetworkError
+from ...exceptions import ClientHTTPStatusError, DangerousNetworkError
 from ...methods.base import DangerousType
 from ...types.input_file import InputFile
 
@@ -37,6 +57,17 @@ _ProxyChain = Iterable[_ProxyBasic]
 _ProxyType = Union[_ProxyChain, _ProxyBasic]
 
 
+@lru_cache(maxsize=None)
+def default_ssl_context() -> ssl.SSLContext:
+    """
+    Get SSL context with certifi CA bundle, shared by all sessions
+
+    Loading CA bundle takes tens of milliseconds, and separate contexts
+    can't share TLS session tickets.
+    """
+    return ssl.create_default_context(cafile=certifi.where())
+
+
 def _retrieve_basic(basic: _ProxyBasic) -> Dict[str, Any]:
     from aiohttp_socks.utils import parse_proxy_url  # type: ignore
 
@@ -87,21 +118,51 @@ def _prepare_connector(chain_or_plain: _ProxyType) -> Tuple[Type["TCPConnector"]
 
 class AiohttpSession(BaseSession):
     def __init__(
-        self, proxy: Optional[_ProxyType] = None, limit: int = 100, **kwargs: Any
+        self,
+        proxy: Optional[_ProxyType] = None,
+        limit: int = 100,
+        json_body: bool = False,
+        warmup_connections: int = 0,
+        keepalive_timeout: float = 15.0,
+        idle_timeout: Optional[float] = None,
+        close_timeout: float = 0.25,
+        **kwargs: Any,
     ) -> None:
         """
         Client session based on aiohttp.
 
         :param proxy: The proxy to be used for requests. Default is None.
         :param limit: The total number of simultaneous connections. Default is 100.
+        :param json_body: Send parameters as :code:`application/json` body
+            instead of multipart form. Requests with files are always sent as multipart.
+            Default is False.
+        :param warmup_connections: The number of connections to the API server
+            opened concurrently on entering the session context. Default is 0.
+        :param keepalive_timeout: Idle time in seconds after which pooled connection
+            is closed. Default is 15.
+        :param idle_timeout: Close all connections when the session had no requests
+            for this number of seconds, they are reopened on the next request.
+            Default is None (never).
+        :param close_timeout: Time in seconds to wait for connections to be closed gracefully,
+            skipped when no connections are open. Default is 0.25.
         :param kwargs: Additional keyword arguments.
         """
         super().__init__(**kwargs)
 
+        self.json_body = json_body
+        self.limit = limit
+        self.warmup_connections = warmup_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.idle_timeout = idle_timeout
+        self.close_timeout = close_timeout
         self._session: Optional[ClientSession] = None
+        self._reaper: Optional[asyncio.Task[None]] = None
+        self._last_request = 0.0
+        self._connections_created = 0
+        self._connections_reused = 0
         self._connector_type: Type[TCPConnector] = TCPConnector
         self._connector_init: Dict[str, Any] = {
-            "ssl": ssl.create_default_context(cafile=certifi.where()),
+            "ssl": default_ssl_context(),
             "limit": limit,
             "ttl_dns_cache": 3600,  # Workaround for https://github.com/aiogram/aiogram/issues/1500
         }
@@ -135,23 +196,124 @@ class AiohttpSession(BaseSession):
             await self.close()
 
         if self._session is None or self._session.closed:
+            trace_configs = [self._pool_trace_config()]
+            if self.metrics:
+                trace_configs.append(self.metrics.trace_config())
             self._session = ClientSession(
-                connector=self._connector_type(**self._connector_init),
+                connector=self._connector_type(
+                    **self._connector_init, keepalive_timeout=self.keepalive_timeout
+                ),
                 headers={
                     USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{__version__}",
                 },
+                trace_configs=trace_configs,
+                auto_decompress=self.compression is None,
             )
             self._should_reset_connector = False
+            self._last_request = time.monotonic()
+            if self.idle_timeout is not None and (self._reaper is None or self._reaper.done()):
+                self._reaper = asyncio.create_task(self._reap_idle(self.idle_timeout))
 
         return self._session
 
-    async def close(self) -> None:
+    def _pool_trace_config(self) -> TraceConfig:
+        async def on_request_start(*args: Any) -> None:
+            self._last_request = time.monotonic()
+
+        async def on_connection_create_end(*args: Any) -> None:
+            self._connections_created += 1
+
+        async def on_connection_reuseconn(*args: Any) -> None:
+            self._connections_reused += 1
+
+        config = TraceConfig()
+        config.on_request_start.append(on_request_start)
+        config.on_connection_create_end.append(on_connection_create_end)
+        config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return config
+
+    async def _reap_idle(self, idle_timeout: float) -> None:
+        while self._session is not None and not self._session.closed:
+            await asyncio.sleep(max(idle_timeout - (time.monotonic() - self._last_request), 0.1))
+            stats = self.pool_stats()
+            if stats["in_use"] or stats["waiters"]:
+                continue
+            if time.monotonic() - self._last_request >= idle_timeout and stats["open"]:
+                loggers.session.debug("Close idle connections after %.1f seconds", idle_timeout)
+                await self._close_session()
+
+    def pool_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Get connection pool statistics
+
+        :return: dict with numbers of :code:`open`, :code:`idle` and :code:`in_use` connections,
+            :code:`waiters` for a free connection, :code:`created` and :code:`reused`
+            connections counters and :code:`reuse_ratio`
+        """
+        idle = in_use = waiters = 0
         if self._session is not None and not self._session.closed:
-            await self._session.close()
+            connector = self._session.connector
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            in_use = len(getattr(connector, "_acquired", ()))
+            waiters = sum(len(queue) for queue in getattr(connector, "_waiters", {}).values())
+        requests = self._connections_created + self._connections_reused
+        return {
+            "open": idle + in_use,
+            "idle": idle,
+            "in_use": in_use,
+            "waiters": waiters,
+            "created": self._connections_created,
+            "reused": self._connections_reused,
+            "reuse_ratio": self._connections_reused / requests if requests else 0.0,
+        }
+
+    async def warm_up(self, connections: Optional[int] = None) -> int:
+        """
+        Open keep-alive connections to the API server concurrently,
+        so first requests don't pay for DNS, TCP and TLS setup
 
-            # Wait 250 ms for the underlying SSL connections to close
+        :param connections: number of connections to each API server,
+            by default :code:`warmup_connections`
+        :return: number of connections opened successfully
+        """
+        if connections is None:
+            connections = self.warmup_connections
+        session = await self.create_session()
+
+        async def probe(origin: str) -> bool:
+            try:
+                async with session.head(origin, allow_redirects=False, timeout=self.timeout):
+                    return True
+            except (ClientError, asyncio.TimeoutError) as e:
+                loggers.session.warning("Failed to warm up connection: %s: %s", type(e).__name__, e)
+                return False
+
+        origins = set()
+        for server in self.servers:
+            parts = urlsplit(server.api_url(token="", method=""))
+            origins.add(f"{parts.scheme}://{parts.netloc}/")
+        results = await asyncio.gather(
+            *(probe(origin) for origin in origins for _ in range(connections))
+        )
+        return sum(results)
+
+    async def _close_session(self) -> None:
+        if self._session is None or self._session.closed:
+            return
+        had_connections = bool(self.pool_stats()["open"])
+        await self._session.close()
+
+        if had_connections and self.close_timeout:
+            # Wait for the underlying SSL connections to close
             # https://docs.aiohttp.org/en/stable/client_advanced.html#graceful-shutdown
-            await asyncio.sleep(0.25)
+            await asyncio.sleep(self.close_timeout)
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            if self._reaper is not asyncio.current_task():
+                self._reaper.cancel()
+            self._reaper = None
+        await self._close_session()
 
     def build_form_data(self, client: Client, method: DangerousMethod[DangerousType]) -> FormData:
         form = FormData(quote_fields=False)
@@ -164,53 +326,197 @@ class AiohttpSession(BaseSession):
         for key, value in files.items():
             form.add_field(
                 key,
-                value.read(client),
+                InputFilePayload(value, client=client),
                 filename=value.filename or key,
             )
         return form
 
-    async def make_request(
-        self, client: Client, method: DangerousMethod[DangerousType], timeout: Optional[int] = None
-    ) -> DangerousType:
+    def build_request_body(
+        self, client: Client, method: DangerousMethod[DangerousType]
+    ) -> Tuple[Union[str, FormData], Dict[str, str]]:
+        """
+        Build request body and its headers
+
+        :return: body and additional request headers
+        """
+        if self.json_body:
+            body = self.build_json_body(client=client, method=method)
+            if body is not None:
+                return body, {CONTENT_TYPE: "application/json"}
+        return self.build_form_data(client=client, method=method), {}
+
+    def _build_post(
+        self, client: Client, method: DangerousMethod[DangerousType]
+    ) -> Tuple[Union[str, bytes, FormData], Dict[str, str]]:
+        body, headers = self.build_request_body(client=client, method=method)
+        data: Union[str, bytes, FormData] = body
+        compression = self.compression
+        if compression is not None:
+            headers[ACCEPT_ENCODING] = compression.accept_encoding
+            if isinstance(body, str):
+                data, encoding = compression.compress_body(body.encode())
+                if encoding is not None:
+                    headers[CONTENT_ENCODING] = encoding
+        return data, headers
+
+    async def _post(
+        self,
+        client: Client,
+        method: DangerousMethod[DangerousType],
+        server: DangerousAPIServer,
+        timeout: Optional[int] = None,
+    ) -> Tuple[int, bytes]:
         session = await self.create_session()
 
-        url = self.api.api_url(token=client.token, method=method.__api_method__)
-        form = self.build_form_data(client=client, method=method)
+        url = server.api_url(token=client.token, method=method.__api_method__)
+        data, headers = self._build_post(client=client, method=method)
+        trace = self.metrics.trace(method.__api_method__) if self.metrics else None
+        compression = self.compression
 
         try:
             async with session.post(
-                url, data=form, timeout=self.timeout if timeout is None else timeout
+                url,
+                data=data,
+                headers=headers,
+                timeout=self.timeout if timeout is None else timeout,
+                trace_request_ctx=trace,
             ) as resp:
-                raw_result = await resp.text()
+                with measure(self.metrics, method.__api_method__, "body"):
+                    if compression is None:
+                        raw_result = await resp.read()
+                    else:
+                        raw_result = await compression.read(
+                            resp.headers.get(CONTENT_ENCODING), resp.content.iter_any()
+                        )
         except asyncio.TimeoutError:
             raise DangerousNetworkError(method=method, message="Request timeout error")
         except ClientError as e:
             raise DangerousNetworkError(method=method, message=f"{type(e).__name__}: {e}")
-        print(raw_result) #TODO create error response at API
+        return resp.status, raw_result
+
+    async def make_request(
+        self, client: Client, method: DangerousMethod[DangerousType], timeout: Optional[int] = None
+    ) -> DangerousType:
+        status, raw_result = await self.send_routed(
+            method, lambda server: self._post(client, method, server, timeout=timeout)
+        )
         response = self.check_response(
-            client=client, method=method, status_code=resp.status, content=raw_result
+            client=client, method=method, status_code=status, content=raw_result
         )
         return cast(DangerousType, response.result)
 
-    async def stream_content(
+    @asynccontextmanager
+    async def open_stream(
+        self,
+        client: Client,
+        method: DangerousMethod[DangerousType],
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, AsyncIterator[bytes]]]:
+        session = await self.create_session()
+
+        trace = self.metrics.trace(method.__api_method__) if self.metrics else None
+        if timeout is None:
+            timeout = self.timeout
+        # Body can be arbitrarily large, so only each read is limited
+        read_timeout = ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+
+        async def send(server: DangerousAPIServer) -> ClientResponse:
+            url = server.api_url(token=client.token, method=method.__api_method__)
+            data, headers = self._build_post(client=client, method=method)
+            try:
+                return await session.post(
+                    url, data=data, headers=headers, timeout=read_timeout, trace_request_ctx=trace
+                )
+            except asyncio.TimeoutError:
+                raise DangerousNetworkError(method=method, message="Request timeout error")
+            except ClientError as e:
+                raise DangerousNetworkError(method=method, message=f"{type(e).__name__}: {e}")
+
+        # Nothing is consumed until the response is received, so it can fail over
+        resp = await self.send_routed(method, send)
+        try:
+            chunks: AsyncIterator[bytes] = resp.content.iter_any()
+            if self.compression is not None:
+                chunks = self.compression.decompress_stream(
+                    resp.headers.get(CONTENT_ENCODING), chunks
+                )
+            yield resp.status, chunks
+        except asyncio.TimeoutError:
+            raise DangerousNetworkError(method=method, message="Request timeout error")
+        except ClientError as e:
+            raise DangerousNetworkError(method=method, message=f"{type(e).__name__}: {e}")
+        finally:
+            resp.release()
+
+    async def probe_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+    ) -> ContentInfo:
+        session = await self.create_session()
+        headers = CIMultiDict(headers or {})
+        headers.setdefault(ACCEPT_ENCODING, "identity")
+
+        async with session.head(url, headers=headers, timeout=timeout) as resp:
+            if resp.status < 400 and resp.content_length is not None:
+                return ContentInfo.from_headers(resp.status, resp.headers)
+        # HEAD is not supported or size is unknown, request the first byte instead
+        ranged = CIMultiDict(headers)
+        ranged[RANGE] = "bytes=0-0"
+        # Otherwise aiohttp asks for compressed content, and range of it is meaningless
+        ranged[ACCEPT_ENCODING] = "identity"
+        async with session.get(url, headers=ranged, timeout=timeout) as resp:
+            if resp.status >= 400:
+                raise ClientHTTPStatusError(status=resp.status, url=url)
+            return ContentInfo.from_headers(resp.status, resp.headers)
+
+    @asynccontextmanager
+    async def open_content(
         self,
         url: str,
         headers: Optional[Dict[str, Any]] = None,
         timeout: int = 30,
         chunk_size: int = 65536,
-        raise_for_status: bool = True,
-    ) -> AsyncGenerator[bytes, None]:
-        if headers is None:
-            headers = {}
-
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
         session = await self.create_session()
+        headers = CIMultiDict(headers or {})
+        compression = self.compression
+        if RANGE in headers:
+            # Ranges of encoded content can't be decoded separately
+            headers[ACCEPT_ENCODING] = "identity"
+        elif compression is not None:
+            headers.setdefault(ACCEPT_ENCODING, compression.accept_encoding)
 
         async with session.get(
-            url, timeout=timeout, headers=headers, raise_for_status=raise_for_status
+            url,
+            headers=headers,
+            # Content can be arbitrarily large, so only each read is limited
+            timeout=ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout),
         ) as resp:
-            async for chunk in resp.content.iter_chunked(chunk_size):
+            chunks: AsyncIterator[bytes] = resp.content.iter_chunked(chunk_size)
+            if compression is not None:
+                chunks = compression.decompress_stream(resp.headers.get(CONTENT_ENCODING), chunks)
+            yield resp.status, resp.headers, chunks
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        async with self.open_content(
+            url, headers=headers, timeout=timeout, chunk_size=chunk_size
+        ) as (status, _, chunks):
+            if raise_for_status and status >= 400:
+                raise ClientHTTPStatusError(status=status, url=url)
+            async for chunk in chunks:
                 yield chunk
 
     async def __aenter__(self) -> AiohttpSession:
         await self.create_session()
+        if self.warmup_connections:
+            await self.warm_up()
         return self
\ No newline at end of file
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import time
+import zlib
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, Iterable, Optional, Tuple
+
+from berrycorepy.exceptions import ClientDecodeError
+
+ENCODINGS: Tuple[str, ...] = ("zstd", "br", "gzip", "deflate")
+"""
+Supported content codings, in order of preference
+"""
+
+_PACKAGES: Dict[str, Tuple[str, ...]] = {
+    "zstd": ("zstandard",),
+    "br": ("brotli", "brotlicffi"),
+}
+_INSTALL: Dict[str, str] = {
+    "zstd": "https://pypi.org/project/zstandard/",
+    "br": "https://pypi.org/project/Brotli/",
+}
+
+
+def _import_codec(encoding: str) -> Any:
+    for package in _PACKAGES[encoding]:
+        try:
+            return __import__(package)
+        except ImportError:
+            continue
+    raise ImportError(f"No module for {encoding!r} content coding")
+
+
+def is_available(encoding: str) -> bool:
+    """
+    Check whether content coding can be used in current environment
+    """
+    if encoding not in ENCODINGS:
+        return False
+    if encoding not in _PACKAGES:
+        return True
+    try:
+        _import_codec(encoding)
+    except ImportError:
+        return False
+    return True
+
+
+class Decompressor:
+    def __init__(self, encoding: str) -> None:
+        """
+        Incremental decoder of response body
+
+        :param encoding: value of :code:`Content-Encoding` header
+        """
+        self.encoding = encoding
+        self._decompress: Any = None
+        self._flush: Any = None
+        if encoding == "gzip":
+            self._set_zlib(16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            decoder = _import_codec("br").Decompressor()
+            self._decompress = getattr(decoder, "process", None) or decoder.decompress
+        elif encoding == "zstd":
+            decoder = _import_codec("zstd").ZstdDecompressor().decompressobj()
+            self._decompress = decoder.decompress
+        elif encoding != "deflate":
+            raise ValueError(f"Unsupported content coding: {encoding!r}")
+
+    def _set_zlib(self, wbits: int) -> None:
+        decoder = zlib.decompressobj(wbits)
+        self._decompress = decoder.decompress
+        self._flush = decoder.flush
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._decompress is None:
+            # Some servers send raw deflate stream instead of zlib-wrapped one
+            zlib_header = (
+                len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0
+            )
+            self._set_zlib(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+        return _cast_bytes(self._decompress(data))
+
+    def flush(self) -> bytes:
+        if self._flush is None:
+            return b""
+        return _cast_bytes(self._flush())
+
+
+def _cast_bytes(data: Any) -> bytes:
+    return data if isinstance(data, bytes) else bytes(data)
+
+
+def compress(encoding: str, data: bytes, level: Optional[int] = None) -> bytes:
+    """
+    Compress whole body with content coding
+    """
+    if encoding == "gzip":
+        return _zlib_compress(data, 16 + zlib.MAX_WBITS, level)
+    if encoding == "deflate":
+        return _zlib_compress(data, zlib.MAX_WBITS, level)
+    if encoding == "br":
+        module = _import_codec("br")
+        if level is None:
+            return _cast_bytes(module.compress(data))
+        return _cast_bytes(module.compress(data, quality=level))
+    if encoding == "zstd":
+        module = _import_codec("zstd")
+        compressor = module.ZstdCompressor(level=3 if level is None else level)
+        return _cast_bytes(compressor.compress(data))
+    raise ValueError(f"Unsupported content coding: {encoding!r}")
+
+
+def _zlib_compress(data: bytes, wbits: int, level: Optional[int] = None) -> bytes:
+    encoder = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, wbits)
+    return encoder.compress(data) + encoder.flush()
+
+
+class CompressionStats:
+    def __init__(self) -> None:
+        """
+        Counters of bytes saved and CPU time spent on compression
+
+        :code:`wire` bytes are sent or received over the network,
+        :code:`raw` bytes are produced or consumed by the client.
+        """
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests_compressed = 0
+        self.request_raw_bytes = 0
+        self.request_wire_bytes = 0
+        self.compress_seconds = 0.0
+        self.responses_decompressed = 0
+        self.response_raw_bytes = 0
+        self.response_wire_bytes = 0
+        self.decompress_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests_compressed": self.requests_compressed,
+            "request_raw_bytes": self.request_raw_bytes,
+            "request_wire_bytes": self.request_wire_bytes,
+            "request_saved_bytes": self.request_raw_bytes - self.request_wire_bytes,
+            "compress_seconds": self.compress_seconds,
+            "responses_decompressed": self.responses_decompressed,
+            "response_raw_bytes": self.response_raw_bytes,
+            "response_wire_bytes": self.response_wire_bytes,
+            "response_saved_bytes": self.response_raw_bytes - self.response_wire_bytes,
+            "decompress_seconds": self.decompress_seconds,
+        }
+
+
+class Compression:
+    def __init__(
+        self,
+        encodings: Iterable[str] = ("gzip", "deflate"),
+        request_encoding: Optional[str] = None,
+        min_size: int = 1024,
+        level: Optional[int] = None,
+    ) -> None:
+        """
+        Content coding settings of the session
+
+        :param encodings: content codings accepted in responses, in order of preference.
+            :code:`br` and :code:`zstd` require Brotli and zstandard packages
+        :param request_encoding: content coding of JSON request bodies,
+            requests are sent uncompressed by default
+        :param min_size: JSON request bodies smaller than this size in bytes are sent as is
+        :param level: compression level of request bodies, codec default if not set
+        """
+        self.encodings = tuple(encodings)
+        for encoding in self.encodings + ((request_encoding,) if request_encoding else ()):
+            if encoding not in ENCODINGS:
+                raise ValueError(f"Unsupported content coding: {encoding!r}")
+            if not is_available(encoding):
+                raise RuntimeError(
+                    f"In order to use {encoding!r} content coding, install {_INSTALL[encoding]}"
+                )
+        self.request_encoding = request_encoding
+        self.min_size = min_size
+        self.level = level
+        self.accept_encoding = ", ".join(self.encodings) if self.encodings else "identity"
+        self.stats = CompressionStats()
+
+    def compress_body(self, body: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Compress request body if it's large enough
+
+        :return: body and its content coding, :code:`None` when body is left as is
+        """
+        if self.request_encoding is None or len(body) < self.min_size:
+            return body, None
+        started = time.thread_time()
+        compressed = compress(self.request_encoding, body, self.level)
+        stats = self.stats
+        stats.compress_seconds += time.thread_time() - started
+        stats.requests_compressed += 1
+        stats.request_raw_bytes += len(body)
+        stats.request_wire_bytes += len(compressed)
+        return compressed, self.request_encoding
+
+    def decoder(self, content_encoding: Optional[str]) -> Optional[Decompressor]:
+        """
+        Create decoder for response with the :code:`Content-Encoding`,
+        :code:`None` when the body is not encoded
+        """
+        encoding = (content_encoding or "").strip().lower()
+        if not encoding or encoding == "identity":
+            return None
+        return Decompressor(encoding)
+
+    async def decompress_stream(
+        self, content_encoding: Optional[str], chunks: AsyncIterable[bytes]
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Decode response body chunk by chunk
+        """
+        try:
+            decoder = self.decoder(content_encoding)
+        except (ValueError, ImportError) as e:
+            raise ClientDecodeError("Unsupported content coding", e, content_encoding)
+        if decoder is None:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        stats = self.stats
+        stats.responses_decompressed += 1
+        async for chunk in chunks:
+            started = time.thread_time()
+            try:
+                data = decoder.decompress(chunk)
+            except Exception as e:
+                raise ClientDecodeError("Failed to decompress response body", e, chunk)
+            stats.decompress_seconds += time.thread_time() - started
+            stats.response_wire_bytes += len(chunk)
+            stats.response_raw_bytes += len(data)
+            if data:
+                yield data
+        started = time.thread_time()
+        try:
+            data = decoder.flush()
+        except Exception as e:
+            raise ClientDecodeError("Failed to decompress response body", e, b"")
+        stats.decompress_seconds += time.thread_time() - started
+        stats.response_raw_bytes += len(data)
+        if data:
+            yield data
+
+    async def read(self, content_encoding: Optional[str], chunks: AsyncIterable[bytes]) -> bytes:
+        """
+        Decode whole response body
+        """
+        body = bytearray()
+        async for data in self.decompress_stream(content_encoding, chunks):
+            body += data
+        return bytes(body)
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import TraceConfig
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+PHASES: Tuple[str, ...] = (
+    "pool_wait",
+    "dns",
+    "connect",
+    "ttfb",
+    "body",
+    "decode",
+    "validate",
+    "total",
+)
+"""
+Request phases
+
+* :code:`pool_wait` - waiting for a free connection in the pool
+* :code:`dns` - resolving host name
+* :code:`connect` - establishing new connection, including TLS handshake
+* :code:`ttfb` - from sending request headers to receiving response headers
+* :code:`body` - reading response body
+* :code:`decode` - decoding JSON into Python objects
+* :code:`validate` - pydantic validation (includes decoding in single-pass mode)
+* :code:`total` - whole call, including middlewares
+"""
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        Cumulative histogram with fixed buckets
+
+        :param buckets: sorted upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Get cumulative counts per upper bound, the last bound is :code:`+Inf`
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class _RequestTrace:
+    __slots__ = ("api_method", "started", "headers_sent", "queued", "dns", "connecting")
+
+    def __init__(self, api_method: str) -> None:
+        self.api_method = api_method
+        self.started = 0.0
+        self.headers_sent = 0.0
+        self.queued = 0.0
+        self.dns = 0.0
+        self.connecting = 0.0
+
+
+class RequestMetrics:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        In-process request metrics
+
+        Collects latency histograms per API method and request phase (see :data:`PHASES`)
+        and error counters per API method and exception type.
+
+        :param buckets: histogram upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, api_method: str, phase: str, seconds: float) -> None:
+        histogram = self._histograms.get((api_method, phase))
+        if histogram is None:
+            histogram = self._histograms[(api_method, phase)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def error(self, api_method: str, error: BaseException) -> None:
+        key = (api_method, type(error).__name__)
+        self._errors[key] = self._errors.get(key, 0) + 1
+
+    def reset(self) -> None:
+        self._histograms.clear()
+        self._errors.clear()
+
+    def trace(self, api_method: str) -> _RequestTrace:
+        """
+        Create request context for :meth:`trace_config` handlers,
+        should be passed as :code:`trace_request_ctx` to aiohttp request
+        """
+        return _RequestTrace(api_method)
+
+    def trace_config(self) -> "TraceConfig":
+        """
+        Build aiohttp trace config recording network phases of traced requests
+
+        aiohttp doesn't report TLS handshake separately, it's included into :code:`connect`.
+        """
+        from aiohttp import TraceConfig
+
+        def handler(callback: Any) -> Any:
+            async def wrapper(session: Any, context: Any, params: Any) -> None:
+                trace = context.trace_request_ctx
+                if isinstance(trace, _RequestTrace):
+                    callback(trace, time.perf_counter())
+
+            return wrapper
+
+        def on_request_start(trace: _RequestTrace, now: float) -> None:
+            trace.started = now
+
+        def on_queued_start(trace: _RequestTrace, now: float) -> None:
+            trace.queued = now
+
+        def on_queued_end(trace: _RequestTrace, now: float) -> None:
+            self.observe(trace.api_method, "pool_wait", now - trace.queued)
+
+        def on_dns_start(trace: _RequestTrace, now: float) -> None:
+            trace.dns = now
+
+        def on_dns_end(trace: _RequestTrace, now: float) -> None:
+            self.observe(trace.api_method, "dns", now - trace.dns)
+
+        def on_connection_start(trace: _RequestTrace, now: float) -> None:
+            trace.connecting = now
+
+        def on_connection_end(trace: _RequestTrace, now: float) -> None:
+            self.observe(trace.api_method, "connect", now - trace.connecting)
+
+        def on_headers_sent(trace: _RequestTrace, now: float) -> None:
+            trace.headers_sent = now
+
+        def on_request_end(trace: _RequestTrace, now: float) -> None:
+            self.observe(trace.api_method, "ttfb", now - (trace.headers_sent or trace.started))
+
+        config = TraceConfig()
+        config.on_request_start.append(handler(on_request_start))
+        config.on_connection_queued_start.append(handler(on_queued_start))
+        config.on_connection_queued_end.append(handler(on_queued_end))
+        config.on_dns_resolvehost_start.append(handler(on_dns_start))
+        config.on_dns_resolvehost_end.append(handler(on_dns_end))
+        config.on_connection_create_start.append(handler(on_connection_start))
+        config.on_connection_create_end.append(handler(on_connection_end))
+        config.on_request_headers_sent.append(handler(on_headers_sent))
+        config.on_request_end.append(handler(on_request_end))
+        return config
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get metrics as plain dict
+
+        :return: :code:`{"latency": {method: {phase: histogram}}, "errors": {method: {error: count}}}`
+        """
+        latency: Dict[str, Dict[str, Any]] = {}
+        for (api_method, phase), histogram in sorted(self._histograms.items()):
+            latency.setdefault(api_method, {})[phase] = histogram.snapshot()
+        errors: Dict[str, Dict[str, int]] = {}
+        for (api_method, error), count in sorted(self._errors.items()):
+            errors.setdefault(api_method, {})[error] = count
+        return {"latency": latency, "errors": errors}
+
+    def to_prometheus(self, prefix: str = "berrycore") -> str:
+        """
+        Render metrics in Prometheus text exposition format
+
+        :param prefix: metric names prefix
+        """
+        lines = [
+            f"# HELP {prefix}_request_phase_seconds Request latency by phase",
+            f"# TYPE {prefix}_request_phase_seconds histogram",
+        ]
+        for (api_method, phase), histogram in sorted(self._histograms.items()):
+            labels = f'method="{api_method}",phase="{phase}"'
+            for bound, count in histogram.cumulative():
+                lines.append(
+                    f'{prefix}_request_phase_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                )
+            lines.append(f"{prefix}_request_phase_seconds_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"{prefix}_request_phase_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append(f"# HELP {prefix}_request_errors_total Failed requests by exception type")
+        lines.append(f"# TYPE {prefix}_request_errors_total counter")
+        for (api_method, error), count in sorted(self._errors.items()):
+            lines.append(
+                f'{prefix}_request_errors_total{{method="{api_method}",error="{error}"}} {count}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    __slots__ = ("metrics", "api_method", "phase", "started")
+
+    def __init__(self, metrics: Optional[RequestMetrics], api_method: str, phase: str) -> None:
+        self.metrics = metrics
+        self.api_method = api_method
+        self.phase = phase
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        if self.metrics is not None:
+            self.started = time.perf_counter()
+
+    def __exit__(self, *args: Any) -> None:
+        if self.metrics is not None:
+            self.metrics.observe(self.api_method, self.phase, time.perf_counter() - self.started)
+
+
+def measure(metrics: Optional[RequestMetrics], api_method: str, phase: str) -> _Timer:
+    """
+    Context manager recording duration of the block, does nothing when metrics are disabled
+    """
+    return _Timer(metrics, api_method, phase)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Protocol
+from typing import TYPE_CHECKING, AbstractSet, Any, Optional, Protocol, Tuple, Type
 
 from berrycorepy.methods.base import DangerousType, DangerousMethod, Response
 
@@ -28,11 +30,41 @@ class RequestMiddlewareType(Protocol):  # pragma: no cover
         pass
 
 
+def request_key(client: "Client", method: DangerousMethod[DangerousType]) -> Tuple[str, str, str]:
+    """
+    Build stable identity of the request
+
+    Two calls with the same key are sent by the same client to the same API method
+    with equal parameters, so their responses are interchangeable.
+
+    :param client: client for request making
+    :param method: Request method
+    :return: tuple of client token, API method name and serialized parameters
+    """
+    params = json.dumps(
+        method.model_dump(warnings=False),
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return client.token, method.__api_method__, params
+
+
+def token_hash(token: str) -> str:
+    """
+    Get stable hash of the token, safe to be logged or used as a key across processes
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 class BaseRequestMiddleware(ABC):
     """
     Generic middleware class
     """
 
+    methods: Optional[AbstractSet[Type[DangerousMethod[Any]]]] = None
+    """Method classes the middleware applies to, :code:`None` means all methods"""
+
     @abstractmethod
     async def __call__(
         self,
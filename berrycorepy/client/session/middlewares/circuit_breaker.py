@@ -0,0 +1,246 @@
+import time
+from collections import deque
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Deque, Dict, Hashable, Optional, Tuple, Type
+
+from berrycorepy.exceptions import (
+    DangerousCircuitOpen,
+    DangerousEntityTooLarge,
+    DangerousNetworkError,
+    DangerousServerError,
+)
+from berrycorepy.methods.base import DangerousMethod, DangerousType, Response
+
+from .base import BaseRequestMiddleware, NextRequestMiddlewareType
+
+if TYPE_CHECKING:
+    from ...client import Client
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class Circuit:
+    def __init__(
+        self,
+        failure_rate: float,
+        slow_call_rate: float,
+        slow_call_duration: float,
+        window: float,
+        min_calls: int,
+        recovery_timeout: float,
+        half_open_calls: int,
+    ) -> None:
+        """
+        State of a single circuit, see :class:`CircuitBreaker` for parameters
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_duration = slow_call_duration
+        self.window = window
+        self.min_calls = min_calls
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        # Incremented on every state change, so results of requests
+        # sent in a previous state are recognized
+        self.generation = 0
+
+        # (finished at, failed, slow)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._trials = 0
+        self._trial_successes = 0
+
+    def _trim(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _set_state(self, state: CircuitState) -> None:
+        self.state = state
+        self.generation += 1
+
+    def _open(self, now: float) -> None:
+        self._set_state(CircuitState.OPEN)
+        self.opened_at = now
+        self._calls.clear()
+
+    def retry_in(self, now: float) -> float:
+        return max(0.0, self.opened_at + self.recovery_timeout - now)
+
+    def allow(self, now: float) -> Optional[int]:
+        """
+        Decide whether the request can be sent and reserve trial slot if needed
+
+        :return: generation to pass to :meth:`record`, :code:`None` if request is rejected
+        """
+        if self.state is CircuitState.OPEN:
+            if self.retry_in(now) > 0:
+                return None
+            self._set_state(CircuitState.HALF_OPEN)
+            self._trials = 0
+            self._trial_successes = 0
+        if self.state is CircuitState.HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                return None
+            self._trials += 1
+        return self.generation
+
+    def record(self, now: float, generation: int, failed: bool, duration: float) -> None:
+        if generation != self.generation:
+            # Late response of a request sent before the state changed
+            return
+        slow = duration >= self.slow_call_duration
+        if self.state is CircuitState.HALF_OPEN:
+            if failed or slow:
+                self._open(now)
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self._set_state(CircuitState.CLOSED)
+            return
+
+        self._calls.append((now, failed, slow))
+        self._trim(now)
+        total = len(self._calls)
+        if total < self.min_calls:
+            return
+        failures = sum(1 for _, is_failed, _ in self._calls if is_failed)
+        slow_calls = sum(1 for _, _, is_slow in self._calls if is_slow)
+        if failures / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+            self._open(now)
+
+    def cancel_trial(self, generation: int) -> None:
+        if generation == self.generation and self.state is CircuitState.HALF_OPEN:
+            self._trials -= 1
+
+
+class CircuitBreaker(BaseRequestMiddleware):
+    failure_exceptions: Tuple[Type[BaseException], ...] = (
+        DangerousNetworkError,
+        DangerousServerError,
+    )
+    """Errors which indicate that the server is unhealthy"""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        slow_call_rate: float = 1.0,
+        slow_call_duration: float = 10.0,
+        window: float = 30.0,
+        min_calls: int = 20,
+        recovery_timeout: float = 15.0,
+        half_open_calls: int = 3,
+        per_method: bool = False,
+    ) -> None:
+        """
+        Middleware which fails fast while API server is unhealthy
+
+        Circuit opens when the share of failed or slow calls within the window reaches
+        its threshold. While open, requests are rejected with
+        :class:`berrycorepy.exceptions.DangerousCircuitOpen` without being sent.
+        After :code:`recovery_timeout` the circuit lets a limited number of trial requests
+        through and closes again only if all of them succeed.
+
+        With :class:`berrycorepy.client.dangerous.DangerousAPIServerPool` the circuit
+        is kept per pool, because the mirror is chosen after the middleware.
+        Individual mirrors are handled by the pool: failed ones are skipped for its cooldown
+        and read-only requests fail over to the next mirror, so an error of one mirror
+        reaches the circuit only when no other mirror could answer.
+
+        :param failure_rate: share of failed calls which opens the circuit
+        :param slow_call_rate: share of slow calls which opens the circuit
+        :param slow_call_duration: time in seconds after which call is considered slow
+        :param window: sliding window in seconds for error and latency rates
+        :param min_calls: minimum number of calls in window before rates are evaluated
+        :param recovery_timeout: time in seconds the circuit stays open
+        :param half_open_calls: number of trial requests in half-open state
+        :param per_method: track each API method in separate circuit
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_duration = slow_call_duration
+        self.window = window
+        self.min_calls = min_calls
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self.per_method = per_method
+
+        self._circuits: Dict[Hashable, Circuit] = {}
+
+    def circuit(self, client: "Client", method: DangerousMethod[Any]) -> Circuit:
+        """
+        Get circuit of the API server or pool of mirrors (and method) the request is sent to
+        """
+        key: Hashable = client.session.api
+        if self.per_method:
+            key = (key, method.__api_method__)
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = Circuit(
+                failure_rate=self.failure_rate,
+                slow_call_rate=self.slow_call_rate,
+                slow_call_duration=self.slow_call_duration,
+                window=self.window,
+                min_calls=self.min_calls,
+                recovery_timeout=self.recovery_timeout,
+                half_open_calls=self.half_open_calls,
+            )
+        return circuit
+
+    def is_failure(self, error: BaseException) -> bool:
+        return isinstance(error, self.failure_exceptions) and not isinstance(
+            error, DangerousEntityTooLarge
+        )
+
+    def states(self) -> Dict[Hashable, CircuitState]:
+        """
+        Get state of each known circuit
+
+        Keys are API servers or pools of mirrors, or pairs of them and method name when
+        :code:`per_method` is enabled
+        """
+        return {key: circuit.state for key, circuit in self._circuits.items()}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> Response[DangerousType]:
+        circuit = self.circuit(client, method)
+        started = time.monotonic()
+        generation = circuit.allow(started)
+        if generation is None:
+            circuit.rejected += 1
+            if circuit.state is CircuitState.HALF_OPEN:
+                message = "API server is unavailable, waiting for trial requests to complete"
+            else:
+                message = (
+                    "API server is unavailable, "
+                    f"next probe in {circuit.retry_in(started):.1f} seconds"
+                )
+            raise DangerousCircuitOpen(
+                method=method, message=message, retry_in=circuit.retry_in(started)
+            )
+
+        try:
+            result = await make_request(client, method)
+        except BaseException as e:
+            now = time.monotonic()
+            if self.is_failure(e):
+                circuit.record(now, generation, failed=True, duration=now - started)
+            elif isinstance(e, Exception):
+                # API errors like bad request mean the server is alive
+                circuit.record(now, generation, failed=False, duration=now - started)
+            else:
+                circuit.cancel_trial(generation)
+            raise
+        now = time.monotonic()
+        circuit.record(now, generation, failed=False, duration=now - started)
+        return result
@@ -0,0 +1,61 @@
+import asyncio
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, Optional, Type
+
+from berrycorepy.methods import READ_ONLY_METHODS
+from berrycorepy.methods.base import DangerousMethod, DangerousType, Response
+
+from .base import BaseRequestMiddleware, NextRequestMiddlewareType, request_key
+
+if TYPE_CHECKING:
+    from ...client import Client
+
+
+class RequestCoalescing(BaseRequestMiddleware):
+    def __init__(self, methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None) -> None:
+        """
+        Middleware for single-flight coalescing of identical concurrent requests
+
+        While a request is in flight, every identical call (same client token,
+        API method and parameters) waits for it instead of sending its own request,
+        and all callers receive the same result or exception.
+
+        :param methods: methods allowed to be coalesced.
+            By default, only read-only methods are coalesced,
+            methods that change server state must never be merged.
+        """
+        self.methods = frozenset(READ_ONLY_METHODS if methods is None else methods)
+        self._in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of distinct requests currently in flight
+        """
+        return len(self._in_flight)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> Response[DangerousType]:
+        if type(method) not in self.methods:
+            return await make_request(client, method)
+
+        key = request_key(client, method)
+        task = self._in_flight.get(key)
+        if task is None:
+            # Request is executed in separate task so cancellation of the first caller
+            # doesn't cancel the request for everyone else who joined it
+            task = asyncio.ensure_future(make_request(client, method))
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._forget, key))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark exception as retrieved even when every caller has gone away
+            task.exception()
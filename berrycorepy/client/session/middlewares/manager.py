@@ -1,28 +1,59 @@
 from __future__ import annotations
 
+from contextvars import ContextVar
 from functools import partial
-from typing import Any, Callable, List, Optional, Sequence, Union, cast, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+    overload,
+)
 
 from berrycorepy.client.session.middlewares.base import (
     NextRequestMiddlewareType,
     RequestMiddlewareType,
 )
-from berrycorepy.methods.base import DangerousType
+from berrycorepy.methods.base import DangerousMethod, DangerousType
+
+if TYPE_CHECKING:
+    from ...client import Client
 
 
 class RequestMiddlewareManager(Sequence[RequestMiddlewareType]):
     def __init__(self) -> None:
         self._middlewares: List[RequestMiddlewareType] = []
+        self._chains: Dict[
+            Tuple[Callable[..., Any], Optional[Type[DangerousMethod[Any]]]],
+            NextRequestMiddlewareType[Any],
+        ] = {}
 
     def register(
         self,
         middleware: RequestMiddlewareType,
     ) -> RequestMiddlewareType:
         self._middlewares.append(middleware)
+        self.invalidate()
         return middleware
 
     def unregister(self, middleware: RequestMiddlewareType) -> None:
         self._middlewares.remove(middleware)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Drop compiled middleware chains
+
+        Should be called after changing :code:`methods` of already registered middleware
+        """
+        self._chains.clear()
 
     def __call__(
         self,
@@ -51,12 +82,60 @@ class RequestMiddlewareManager(Sequence[RequestMiddlewareType]):
     def __len__(self) -> int:
         return len(self._middlewares)
 
+    @staticmethod
+    def _applies(
+        middleware: RequestMiddlewareType, method_type: Optional[Type[DangerousMethod[Any]]]
+    ) -> bool:
+        methods = getattr(middleware, "methods", None)
+        return method_type is None or methods is None or method_type in methods
+
     def wrap_middlewares(
         self,
         callback: NextRequestMiddlewareType[DangerousType],
+        method_type: Optional[Type[DangerousMethod[Any]]] = None,
         **kwargs: Any,
     ) -> NextRequestMiddlewareType[DangerousType]:
-        middleware = partial(callback, **kwargs)
-        for m in reversed(self._middlewares):
-            middleware = partial(m, middleware)
-        return cast(NextRequestMiddlewareType[DangerousType], middleware)
\ No newline at end of file
+        """
+        Get middlewares chain wrapping the callback
+
+        Chains are compiled once for each callback and method class and reused
+        until middlewares are changed.
+
+        :param callback: the last callable in the chain
+        :param method_type: method class, middlewares which declare :code:`methods`
+            not including it are left out of the chain
+        :param kwargs: keyword arguments passed to the callback
+        """
+        key = (callback, method_type)
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = partial(_call_callback, callback)
+            for m in reversed(self._middlewares):
+                if self._applies(m, method_type):
+                    chain = partial(m, chain)
+            self._chains[key] = chain
+        return cast(NextRequestMiddlewareType[DangerousType], partial(_call_chain, chain, kwargs))
+
+
+_callback_kwargs: ContextVar[Dict[str, Any]] = ContextVar("callback_kwargs", default={})
+
+
+async def _call_chain(
+    chain: NextRequestMiddlewareType[Any],
+    kwargs: Dict[str, Any],
+    client: Client,
+    method: DangerousMethod[Any],
+) -> Any:
+    # Keyword arguments of the call reach the callback through context,
+    # so the compiled chain doesn't depend on them
+    token = _callback_kwargs.set(kwargs)
+    try:
+        return await chain(client, method)
+    finally:
+        _callback_kwargs.reset(token)
+
+
+async def _call_callback(
+    callback: NextRequestMiddlewareType[Any], client: Client, method: DangerousMethod[Any]
+) -> Any:
+    return await callback(client, method, **_callback_kwargs.get())
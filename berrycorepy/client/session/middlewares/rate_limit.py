@@ -0,0 +1,273 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Mapping, Optional, Type
+
+from berrycorepy.exceptions import DangerousRetryAfter
+from berrycorepy.methods.base import DangerousMethod, DangerousType, Response
+
+from .base import BaseRequestMiddleware, NextRequestMiddlewareType, token_hash
+
+if TYPE_CHECKING:
+    from ...client import Client
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Token bucket limit
+    """
+
+    rate: float
+    """Requests per second"""
+    burst: int = 1
+    """Maximum number of requests allowed at once"""
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0:
+            raise ValueError("Rate should be positive")
+        if self.burst < 1:
+            raise ValueError("Burst should be at least 1")
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        limit: RateLimit,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.05,
+        min_rate_factor: float = 0.1,
+    ) -> None:
+        """
+        Token bucket which queues callers in FIFO order
+
+        The rate is adapted with additive-increase/multiplicative-decrease:
+        it drops on every flood control error and slowly recovers on successful requests.
+
+        :param limit: configured limit
+        :param decrease_factor: rate multiplier applied on flood control
+        :param increase_step: share of configured rate restored after each successful request
+        :param min_rate_factor: lowest allowed rate relative to configured one
+        """
+        self.limit = limit
+        self.rate = limit.rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.min_rate = limit.rate * min_rate_factor
+
+        self.waiters = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            float(self.limit.burst), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """
+        Wait for a token
+
+        :return: time in seconds spent in queue
+        """
+        started = time.monotonic()
+        self.waiters += 1
+        try:
+            # asyncio.Lock wakes up waiters in the order they came
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self._paused_until:
+                        await asyncio.sleep(self._paused_until - now)
+                        continue
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self.waiters -= 1
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def is_idle(self, now: float) -> bool:
+        """
+        Check that the bucket is in its initial state, so it can be dropped
+        and created again without changing the limit
+        """
+        if (
+            self.waiters
+            or self.in_flight
+            or now < self._paused_until
+            or self.rate < self.limit.rate
+        ):
+            return False
+        self._refill(now)
+        return self._tokens >= self.limit.burst
+
+    def penalize(self, retry_after: float) -> None:
+        """
+        Slow down after flood control error
+
+        :param retry_after: time in seconds requested by the server
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + retry_after)
+
+    def reward(self) -> None:
+        """
+        Speed up after successful request
+        """
+        if self.rate < self.limit.rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.limit.rate, self.rate + self.limit.rate * self.increase_step)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "rate": self.rate,
+            "queue_depth": self.waiters,
+            "acquired": self.acquired,
+            "total_wait": self.total_wait,
+            "max_wait": self.max_wait,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+        }
+
+
+class RequestRateLimiter(BaseRequestMiddleware):
+    def __init__(
+        self,
+        limit: Optional[RateLimit] = None,
+        per_token: Optional[RateLimit] = None,
+        per_method: Optional[Mapping[Type[DangerousMethod[Any]], RateLimit]] = None,
+        adaptive: bool = True,
+        evict_interval: float = 60.0,
+    ) -> None:
+        """
+        Middleware for client-side rate limiting
+
+        Requests exceeding the limits are delayed, not rejected.
+
+        :param limit: limit for all requests passing through the session
+        :param per_token: limit for each client token
+        :param per_method: limits for methods, applied for each client token separately
+        :param adaptive: reduce rate when server responds with flood control error
+        :param evict_interval: time in seconds between sweeps which drop buckets of tokens
+            and methods that are back to their initial state, along with their statistics
+        """
+        self.limit = limit
+        self.per_token = per_token
+        self.per_method: Dict[Type[DangerousMethod[Any]], RateLimit] = dict(per_method or {})
+        self.adaptive = adaptive
+        self.evict_interval = evict_interval
+
+        # Keyed by token hashes, so tokens are not kept in memory
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._evicted_at = time.monotonic()
+
+    def _bucket(self, key: Hashable, limit: RateLimit) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(limit)
+        return bucket
+
+    def evict(self) -> int:
+        """
+        Drop idle buckets of tokens and methods
+
+        :return: number of dropped buckets
+        """
+        now = time.monotonic()
+        self._evicted_at = now
+        idle = [
+            key
+            for key, bucket in self._buckets.items()
+            if key is not None and bucket.is_idle(now)
+        ]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+    def buckets(self, client: "Client", method: DangerousMethod[Any]) -> List[TokenBucket]:
+        """
+        Get buckets applied to the request, from the most specific one
+        """
+        if time.monotonic() - self._evicted_at >= self.evict_interval:
+            self.evict()
+        buckets = []
+        key = token_hash(client.token)
+        method_limit = self.per_method.get(type(method))
+        if method_limit is not None:
+            buckets.append(self._bucket((key, method.__api_method__), method_limit))
+        if self.per_token is not None:
+            buckets.append(self._bucket(key, self.per_token))
+        if self.limit is not None:
+            buckets.append(self._bucket(None, self.limit))
+        return buckets
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of requests waiting for any limit
+        """
+        return sum(bucket.waiters for bucket in self._buckets.values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get statistics of each bucket
+
+        Keys are :code:`global`, :code:`token:<hash>` and :code:`method:<hash>:<api method>`,
+        where hash is :func:`berrycorepy.client.pool.token_hash` of the token.
+        Buckets dropped as idle are not included.
+        """
+        result = {}
+        for key, bucket in self._buckets.items():
+            if key is None:
+                name = "global"
+            elif isinstance(key, tuple):
+                name = f"method:{key[0]}:{key[1]}"
+            else:
+                name = f"token:{key}"
+            result[name] = bucket.stats()
+        return result
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> Response[DangerousType]:
+        buckets = self.buckets(client, method)
+        for bucket in buckets:
+            bucket.in_flight += 1
+        try:
+            for bucket in buckets:
+                await bucket.acquire()
+            try:
+                result = await make_request(client, method)
+            except DangerousRetryAfter as e:
+                if self.adaptive:
+                    for bucket in buckets:
+                        bucket.penalize(e.retry_after)
+                raise
+            if self.adaptive:
+                for bucket in buckets:
+                    bucket.reward()
+            return result
+        finally:
+            for bucket in buckets:
+                bucket.in_flight -= 1
@@ -30,8 +30,8 @@ class RequestLogging(BaseRequestMiddleware):
     ) -> Response[DangerousType]:
         if type(method) not in self.ignore_methods:
             loggers.middlewares.info(
-                "Make request with method=%r by client id=%d",
+                "Make request with method=%r by client %08x",
                 type(method).__name__,
-                client.id,
+                hash(client) & 0xFFFFFFFF,
             )
         return await make_request(client, method)
\ No newline at end of file
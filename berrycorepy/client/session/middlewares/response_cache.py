@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Type,
+)
+
+from berrycorepy import loggers
+from berrycorepy.methods import READ_ONLY_METHODS
+from berrycorepy.methods.base import DangerousMethod, DangerousType, Response
+
+from .base import BaseRequestMiddleware, NextRequestMiddlewareType, request_key
+
+if TYPE_CHECKING:
+    from ...client import Client
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+    stale_until: float
+
+
+class ResponseCache(BaseRequestMiddleware):
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        method_ttl: Optional[Mapping[Type[DangerousMethod[Any]], float]] = None,
+        maxsize: int = 1024,
+        stale_while_revalidate: float = 0.0,
+        methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None,
+    ) -> None:
+        """
+        Middleware for caching results of read-only methods
+
+        :param ttl: default time in seconds while result is considered fresh
+        :param method_ttl: per-method overrides of :code:`ttl`
+        :param maxsize: maximum number of cached results,
+            least recently used results are evicted first
+        :param stale_while_revalidate: time in seconds after expiration
+            while stale result is still returned and refreshed in background
+        :param methods: methods allowed to be cached. By default, only read-only methods
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size should be positive")
+        self.ttl = ttl
+        self.method_ttl: Dict[Type[DangerousMethod[Any]], float] = dict(method_ttl or {})
+        self.maxsize = maxsize
+        self.stale_while_revalidate = stale_while_revalidate
+        self.methods = frozenset(READ_ONLY_METHODS if methods is None else methods)
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        # Event loop keeps only weak references to tasks
+        self._tasks: Set["asyncio.Future[None]"] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, client: "Client", method: DangerousMethod[Any]) -> Hashable:
+        """
+        Get cache key of the request
+
+        :param client: client for request making
+        :param method: Request method
+        :return: key which can be used for :meth:`invalidate`
+        """
+        return request_key(client, method)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Drop cached result
+
+        :param key: cache key, see :meth:`key`
+        :return: :code:`True` if result was cached
+        """
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """
+        Drop all cached results
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+        }
+
+    def _store(self, key: Hashable, method_type: Type[Any], value: Any) -> None:
+        ttl = self.method_ttl.get(method_type, self.ttl)
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        self._entries[key] = _CacheEntry(
+            value=value,
+            expires_at=expires_at,
+            stale_until=expires_at + self.stale_while_revalidate,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _refresh(
+        self,
+        key: Hashable,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> None:
+        try:
+            self._store(key, type(method), await make_request(client, method))
+        except Exception as e:
+            # Stale result stays available until the stale window is over,
+            # the next caller after that gets the error
+            loggers.middlewares.warning(
+                "Failed to refresh cached result of method=%r: %s: %s",
+                type(method).__name__,
+                type(e).__name__,
+                e,
+            )
+        finally:
+            self._refreshing.discard(key)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> Response[DangerousType]:
+        if type(method) not in self.methods:
+            return await make_request(client, method)
+
+        key = self.key(client, method)
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires_at:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.ensure_future(
+                        self._refresh(key, make_request, client, method)
+                    )
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return entry.value
+            del self._entries[key]
+
+        self.misses += 1
+        result = await make_request(client, method)
+        self._store(key, type(method), result)
+        return result
@@ -0,0 +1,153 @@
+import asyncio
+import random
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Type
+
+from berrycorepy import loggers
+from berrycorepy.exceptions import (
+    DangerousEntityTooLarge,
+    DangerousNetworkError,
+    DangerousRetryAfter,
+    DangerousServerError,
+)
+from berrycorepy.methods import READ_ONLY_METHODS
+from berrycorepy.methods.base import DangerousMethod, DangerousType, Response
+
+from .base import BaseRequestMiddleware, NextRequestMiddlewareType
+
+if TYPE_CHECKING:
+    from ...client import Client
+
+
+class RetryBudget:
+    def __init__(
+        self, ratio: float = 0.1, min_retries: int = 10, max_tokens: float = 100.0
+    ) -> None:
+        """
+        Limits retries to a share of regular requests
+
+        Every request deposits :code:`ratio` tokens and every retry withdraws one,
+        so under a total outage retries add at most :code:`ratio` extra load.
+
+        :param ratio: allowed share of retries relative to requests
+        :param min_retries: tokens available from the start, before any traffic
+        :param max_tokens: maximum amount of accumulated tokens,
+            limits burst of retries after a long period without failures
+        """
+        if ratio < 0:
+            raise ValueError("Retry ratio can't be negative")
+        if max_tokens < min_retries:
+            raise ValueError("Maximum amount of tokens can't be less than min_retries")
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.max_tokens = max_tokens
+        self._tokens = float(min_retries)
+
+    @property
+    def available(self) -> int:
+        return int(self._tokens)
+
+    def deposit(self) -> None:
+        self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RequestRetry(BaseRequestMiddleware):
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_retry_after: Optional[float] = None,
+        budget: Optional[RetryBudget] = None,
+        idempotent_methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None,
+    ) -> None:
+        """
+        Middleware for retrying failed requests
+
+        Flood control errors are retried after exactly :code:`retry_after` seconds
+        for any method, because such request was rejected without processing.
+        Network and server errors are retried with exponential backoff and full jitter
+        only for idempotent methods.
+
+        :param max_attempts: maximum number of attempts including the first one
+        :param base_delay: backoff delay in seconds before the first retry
+        :param max_delay: maximum backoff delay in seconds
+        :param max_retry_after: don't wait for flood control longer than this,
+            raise the error immediately instead
+        :param budget: retry budget, can be shared between sessions.
+            By default, retries are limited to 10% of requests
+        :param idempotent_methods: methods safe to repeat after network or server errors.
+            By default, only read-only methods
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+        self.idempotent_methods = frozenset(
+            READ_ONLY_METHODS if idempotent_methods is None else idempotent_methods
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Get delay before the retry
+
+        :param attempt: number of failed attempts
+        :return: delay in seconds
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def get_delay(
+        self, method: DangerousMethod[Any], error: Exception, attempt: int
+    ) -> Optional[float]:
+        """
+        Decide whether the request should be retried
+
+        :param method: Request method
+        :param error: raised exception
+        :param attempt: number of failed attempts
+        :return: delay in seconds or :code:`None` if error should be raised
+        """
+        if isinstance(error, DangerousRetryAfter):
+            if self.max_retry_after is not None and error.retry_after > self.max_retry_after:
+                return None
+            return float(error.retry_after)
+        if type(method) not in self.idempotent_methods:
+            return None
+        if isinstance(error, DangerousEntityTooLarge):
+            return None
+        if isinstance(error, (DangerousNetworkError, DangerousServerError)):
+            return self.backoff(attempt)
+        return None
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> Response[DangerousType]:
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                return await make_request(client, method)
+            except Exception as e:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.get_delay(method, e, attempt)
+                if delay is None or not self.budget.withdraw():
+                    raise
+                loggers.middlewares.warning(
+                    "Retry request with method=%r in %.2f seconds (attempt %d) due to %s",
+                    type(method).__name__,
+                    delay,
+                    attempt,
+                    type(e).__name__,
+                )
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,353 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from berrycorepy import loggers
+from berrycorepy.exceptions import DangerousBadRequest, DangerousNotFound
+from berrycorepy.methods.base import DangerousMethod, DangerousType, Response
+from berrycorepy.types.input_file import BufferedInputFile, FSInputFile, InputFile
+
+from .base import BaseRequestMiddleware, NextRequestMiddlewareType, token_hash
+
+if TYPE_CHECKING:
+    from ...client import Client
+
+HASH_BLOCK_SIZE = 1024 * 1024
+"""Files larger than this are hashed in executor, so event loop is not blocked"""
+
+FileIdResolver = Callable[[DangerousMethod[Any], str, Any], Optional[str]]
+
+_StatKey = Tuple[str, int, int]
+
+
+def _hash_view(data: Any, algorithm: str) -> str:
+    digest = hashlib.new(algorithm)
+    view = memoryview(data).cast("B")
+    for offset in range(0, len(view), HASH_BLOCK_SIZE):
+        digest.update(view[offset : offset + HASH_BLOCK_SIZE])
+    return digest.hexdigest()
+
+
+def _hash_path(path: Union[str, Path], algorithm: str) -> str:
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_file(path: Path, data: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data)
+    os.replace(tmp, path)
+
+
+class UploadCache:
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        path: Optional[Union[str, Path]] = None,
+        algorithm: str = "sha256",
+        save_delay: float = 1.0,
+    ) -> None:
+        """
+        Map from content hash of uploaded files to their server-side identifiers
+
+        Content of :class:`BufferedInputFile` and :class:`FSInputFile` is hashed
+        block by block. Hash of a file on disk is remembered by its path,
+        modification time and size, so unchanged files are not read again.
+        Identifiers belong to the client which uploaded the file,
+        so they are remembered per hash of its token.
+
+        :param maxsize: maximum number of remembered identifiers,
+            least recently used ones are evicted first
+        :param path: JSON file to keep identifiers between restarts,
+            it's replaced atomically in executor
+        :param algorithm: :mod:`hashlib` algorithm of content hash
+        :param save_delay: seconds to collect changes before writing :code:`path`,
+            call :meth:`flush` to write them at once, e.g. on shutdown
+        """
+        self.maxsize = maxsize
+        self.path = Path(path) if path is not None else None
+        self.algorithm = algorithm
+        self.save_delay = save_delay
+
+        self.hits = 0
+        self.misses = 0
+
+        self._file_ids: "OrderedDict[str, str]" = OrderedDict()
+        self._digests: "OrderedDict[_StatKey, str]" = OrderedDict()
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_lock: Optional[asyncio.Lock] = None
+        self._tasks: Set["asyncio.Future[None]"] = set()
+        if self.path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+    async def digest(self, file: InputFile) -> Optional[str]:
+        """
+        Get content hash of the file
+
+        :return: hex digest or :code:`None` when content can't be hashed without reading
+            it from remote source (:class:`URLInputFile` and custom files)
+        """
+        loop = asyncio.get_running_loop()
+        if isinstance(file, BufferedInputFile):
+            if len(memoryview(file.data).cast("B")) <= HASH_BLOCK_SIZE:
+                return _hash_view(file.data, self.algorithm)
+            return await loop.run_in_executor(None, _hash_view, file.data, self.algorithm)
+        if isinstance(file, FSInputFile):
+            stat = os.stat(file.path)
+            key = (os.path.realpath(file.path), stat.st_mtime_ns, stat.st_size)
+            digest = self._digests.get(key)
+            if digest is None:
+                digest = await loop.run_in_executor(None, _hash_path, file.path, self.algorithm)
+                self._digests[key] = digest
+                while len(self._digests) > self.maxsize:
+                    self._digests.popitem(last=False)
+            self._digests.move_to_end(key)
+            return digest
+        return None
+
+    @staticmethod
+    def key(token: str, digest: str) -> str:
+        """
+        Get key of content uploaded by the client
+        """
+        return f"{token_hash(token)}:{digest}"
+
+    def get(self, token: str, digest: str) -> Optional[str]:
+        """
+        Get identifier of content previously uploaded by the client
+        """
+        key = self.key(token, digest)
+        file_id = self._file_ids.get(key)
+        if file_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._file_ids.move_to_end(key)
+        return file_id
+
+    def set(self, token: str, digest: str, file_id: str) -> None:
+        """
+        Remember identifier of content uploaded by the client
+        """
+        key = self.key(token, digest)
+        if self._file_ids.get(key) == file_id:
+            self._file_ids.move_to_end(key)
+            return
+        self._file_ids[key] = file_id
+        self._file_ids.move_to_end(key)
+        while len(self._file_ids) > self.maxsize:
+            self._file_ids.popitem(last=False)
+        self._changed()
+
+    def discard(self, token: str, digest: str) -> bool:
+        """
+        Forget identifier, e.g. when server doesn't know it anymore
+
+        :return: :code:`True` if identifier was remembered
+        """
+        if self._file_ids.pop(self.key(token, digest), None) is None:
+            return False
+        self._changed()
+        return True
+
+    def clear(self) -> None:
+        """
+        Forget all identifiers and hashes
+        """
+        self._file_ids.clear()
+        self._digests.clear()
+        self._changed()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters
+        """
+        return {"size": len(self._file_ids), "hits": self.hits, "misses": self.misses}
+
+    def load(self) -> None:
+        """
+        Read identifiers from :attr:`path`, missing or broken file is ignored
+        """
+        if self.path is None:
+            return
+        try:
+            state = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            loggers.session.warning("Unable to load upload cache %s: %s", self.path, e)
+            return
+        if state.get("algorithm") != self.algorithm:
+            return
+        file_ids = state.get("file_ids") or {}
+        self._file_ids = OrderedDict(
+            (digest, file_id)
+            for digest, file_id in list(file_ids.items())[-self.maxsize :]
+            if isinstance(file_id, str)
+        )
+
+    def _dumps(self) -> str:
+        state = {"algorithm": self.algorithm, "file_ids": self._file_ids}
+        return json.dumps(state, separators=(",", ":"))
+
+    def save(self) -> None:
+        """
+        Write identifiers to :attr:`path` synchronously
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self.path is None:
+            return
+        _write_file(self.path, self._dumps())
+
+    async def flush(self) -> None:
+        """
+        Write pending changes to :attr:`path` in executor
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self.path is None:
+            return
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        async with self._save_lock:
+            # State is taken under the lock, so a newer state is never overwritten
+            data = self._dumps()
+            await asyncio.get_running_loop().run_in_executor(None, _write_file, self.path, data)
+
+    def _changed(self) -> None:
+        if self.path is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.save_delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._save_handle = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: "asyncio.Future[None]") -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            loggers.session.warning(
+                "Unable to save upload cache %s: %s", self.path, task.exception()
+            )
+
+
+class UploadDeduplication(BaseRequestMiddleware):
+    def __init__(
+        self,
+        resolve_file_id: FileIdResolver,
+        cache: Optional[UploadCache] = None,
+        methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None,
+    ) -> None:
+        """
+        Middleware which sends identifier of already uploaded content instead of its bytes
+
+        Top-level method fields holding :class:`BufferedInputFile` or :class:`FSInputFile`
+        are hashed before the request. When the content was uploaded before,
+        the field is replaced by its server-side identifier. After a successful upload,
+        :code:`resolve_file_id` extracts the identifier from the result to be reused.
+        If the server rejects a remembered identifier, it's forgotten
+        and the request is repeated with the file itself.
+
+        :param resolve_file_id: :code:`(method, field, result) -> file_id` callback,
+            returns :code:`None` when result has no identifier for the field
+        :param cache: identifiers storage, by default in-memory :class:`UploadCache`
+        :param methods: methods to deduplicate, by default every method with file fields
+        """
+        self.resolve_file_id = resolve_file_id
+        self.cache = cache if cache is not None else UploadCache()
+        if methods is not None:
+            self.methods = frozenset(methods)
+
+    async def _files(self, method: DangerousMethod[Any]) -> Dict[str, str]:
+        digests: Dict[str, str] = {}
+        for name in type(method).model_fields:
+            value = getattr(method, name, None)
+            if not isinstance(value, InputFile):
+                continue
+            digest = await self.cache.digest(value)
+            if digest is not None:
+                digests[name] = digest
+        return digests
+
+    def _learn(
+        self,
+        client: "Client",
+        method: DangerousMethod[Any],
+        uploaded: Dict[str, str],
+        result: Any,
+    ) -> None:
+        for name, digest in uploaded.items():
+            file_id = self.resolve_file_id(method, name, result)
+            if file_id:
+                self.cache.set(client.token, digest, file_id)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[DangerousType],
+        client: "Client",
+        method: DangerousMethod[DangerousType],
+    ) -> Response[DangerousType]:
+        if self.methods is not None and type(method) not in self.methods:
+            return await make_request(client, method)
+        digests = await self._files(method)
+        if not digests:
+            return await make_request(client, method)
+
+        update: Dict[str, str] = {}
+        for name, digest in digests.items():
+            file_id = self.cache.get(client.token, digest)
+            if file_id is not None:
+                update[name] = file_id
+        uploaded = {name: digest for name, digest in digests.items() if name not in update}
+
+        if update:
+            try:
+                result = await make_request(client, method.model_copy(update=update))
+            except (DangerousBadRequest, DangerousNotFound) as e:
+                loggers.session.info(
+                    "Remembered file of %s is rejected (%s), upload it again",
+                    type(method).__name__,
+                    e,
+                )
+                for name in update:
+                    self.cache.discard(client.token, digests[name])
+                uploaded = digests
+            else:
+                self._learn(client, method, uploaded, result)
+                return result
+
+        result = await make_request(client, method)
+        self._learn(client, method, uploaded, result)
+        return result
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import mmap
+import os
+import socket
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.payload import Payload
+
+from berrycorepy.types.input_file import BufferedInputFile, FSInputFile, InputFile
+
+if TYPE_CHECKING:
+    from ..client import Client
+
+MIN_UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def upload_chunk_size(writer: AbstractStreamWriter, default: int = MIN_UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Get write size matching send buffer of the connection socket,
+    so each write fills the buffer without splitting data into many small writes
+    """
+    transport = getattr(writer, "transport", None)
+    sock = transport.get_extra_info("socket") if transport is not None else None
+    if sock is None:
+        return default
+    try:
+        send_buffer = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+    except OSError:
+        return default
+    return min(max(send_buffer, default, MIN_UPLOAD_CHUNK_SIZE), MAX_UPLOAD_CHUNK_SIZE)
+
+
+def _release(buffer: Union[memoryview, mmap.mmap]) -> None:
+    try:
+        if isinstance(buffer, memoryview):
+            buffer.release()
+        else:
+            buffer.close()
+    except BufferError:
+        # Slice is still referenced by transport buffer, it's freed by GC later
+        pass
+
+
+class InputFilePayload(Payload):
+    def __init__(self, value: InputFile, client: Client, **kwargs: Any) -> None:
+        """
+        Multipart payload streaming :class:`InputFile` without reading it into memory
+
+        * :class:`BufferedInputFile` is sent as :code:`memoryview` slices of its buffer
+        * :class:`FSInputFile` is sent with :code:`sendfile` when connection allows it,
+          otherwise as slices of memory-mapped file
+        * other files are sent chunk by chunk from :meth:`InputFile.read`
+
+        :param value: file
+        :param client: Client instance, passed to :meth:`InputFile.read`
+        """
+        kwargs.setdefault("filename", value.filename)
+        kwargs.setdefault("content_type", "application/octet-stream")
+        super().__init__(value, **kwargs)
+        self._client = client
+        if isinstance(value, BufferedInputFile):
+            self._size = len(memoryview(value.data).cast("B"))
+        elif isinstance(value, FSInputFile):
+            self._size = os.stat(value.path).st_size
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        raise TypeError("Unable to decode file payload")
+
+    async def write(self, writer: AbstractStreamWriter) -> None:
+        file: InputFile = self._value
+        if isinstance(file, BufferedInputFile):
+            view = memoryview(file.data).cast("B")
+            try:
+                await self._write_view(writer, view)
+            finally:
+                _release(view)
+        elif isinstance(file, FSInputFile):
+            await self._write_path(writer, file)
+        else:
+            async for chunk in file.read(self._client):
+                await writer.write(chunk)
+
+    async def _write_view(self, writer: AbstractStreamWriter, view: memoryview) -> None:
+        chunk_size = upload_chunk_size(writer)
+        for offset in range(0, len(view), chunk_size):
+            await writer.write(view[offset : offset + chunk_size])  # type: ignore[arg-type]
+
+    async def _write_path(self, writer: AbstractStreamWriter, file: FSInputFile) -> None:
+        size = self._size or 0
+        with open(file.path, "rb") as f:
+            if not size:
+                return
+            if await self._sendfile(writer, f, size):
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)[:size]
+            try:
+                await self._write_view(writer, view)
+            finally:
+                _release(view)
+                _release(mapped)
+
+    async def _sendfile(self, writer: AbstractStreamWriter, f: Any, size: int) -> bool:
+        transport: Optional[asyncio.Transport] = getattr(writer, "transport", None)
+        # Data written by sendfile bypasses the writer,
+        # so it's possible only when the writer sends data as is
+        if (
+            transport is None
+            or getattr(writer, "chunked", True)
+            or getattr(writer, "_compress", None) is not None
+            or getattr(writer, "length", None) is not None
+            or transport.get_extra_info("sslcontext") is not None
+        ):
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.sendfile(transport, f, 0, size, fallback=False)
+        except (NotImplementedError, asyncio.SendfileNotAvailableError):
+            return False
+        return True
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from berrycorepy.exceptions import ClientHTTPStatusError
+from berrycorepy.types.input_file import DEFAULT_RELAY_BUFFER_SIZE, DEFAULT_SEGMENT_SIZE
+
+if TYPE_CHECKING:
+    from .BaseSession import BaseSession
+
+_IDENTITY = {"Accept-Encoding": "identity"}
+
+
+class RelayBuffer:
+    def __init__(self, capacity: int = DEFAULT_RELAY_BUFFER_SIZE) -> None:
+        """
+        Bounded ring buffer between download and upload of the same content
+
+        Producers write data at absolute offsets of the content, so several ranges
+        can be filled concurrently. Consumer reads contiguous data in order.
+        Write waits while its data doesn't fit into :code:`capacity` bytes
+        after the read position, so no more than :code:`capacity` bytes are in flight.
+
+        :param capacity: buffer size in bytes
+        """
+        if capacity < 1:
+            raise ValueError("Buffer capacity should be positive")
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._consumed = 0
+        self._filled = 0
+        self._chunks: Dict[int, int] = {}
+        self._eof = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def consumed(self) -> int:
+        """
+        Number of bytes read by consumer
+        """
+        return self._consumed
+
+    @property
+    def buffered(self) -> int:
+        """
+        Number of contiguous bytes ready to be read
+        """
+        return self._filled - self._consumed
+
+    async def write(self, offset: int, data: bytes) -> None:
+        """
+        Put data at the offset of the content, waiting for free space
+
+        :raise RuntimeError: when buffer is closed by consumer
+        """
+        view = memoryview(data)
+        while view:
+            piece = view[: self.capacity]
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self._eof or offset + len(piece) <= self._consumed + self.capacity
+                )
+                if self._eof:
+                    raise RuntimeError("Relay buffer is closed")
+                position = offset % self.capacity
+                head = min(len(piece), self.capacity - position)
+                self._data[position : position + head] = piece[:head]
+                self._data[: len(piece) - head] = piece[head:]
+                self._chunks[offset] = offset + len(piece)
+                while self._filled in self._chunks:
+                    self._filled = self._chunks.pop(self._filled)
+                self._changed.notify_all()
+            offset += len(piece)
+            view = view[len(piece) :]
+
+    async def read(self, size: int) -> bytes:
+        """
+        Get next data, waiting for producers
+
+        :return: up to :code:`size` bytes, empty bytes at the end of content
+        :raise: exception passed to :meth:`fail`
+        """
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: self._filled > self._consumed or self._eof or self._error is not None
+            )
+            if self._error is not None:
+                raise self._error
+            size = min(size, self._filled - self._consumed)
+            if not size:
+                return b""
+            position = self._consumed % self.capacity
+            head = min(size, self.capacity - position)
+            # Data is copied, because its part in the ring is overwritten by next writes
+            data = bytes(self._data[position : position + head])
+            if head < size:
+                data += self._data[: size - head]
+            self._consumed += size
+            self._changed.notify_all()
+            return data
+
+    async def finish(self, size: Optional[int] = None) -> None:
+        """
+        Mark the end of content
+
+        :param size: expected content size, missing data is reported as error to consumer
+        """
+        async with self._changed:
+            if size is not None and self._filled != size:
+                self._error = ValueError(f"Relayed {self._filled} bytes instead of {size} bytes")
+            self._eof = True
+            self._changed.notify_all()
+
+    async def fail(self, error: BaseException) -> None:
+        """
+        Pass producer error to consumer
+        """
+        async with self._changed:
+            if self._error is None:
+                self._error = error
+            self._changed.notify_all()
+
+    async def close(self) -> None:
+        """
+        Stop producers, e.g. when consumer goes away
+        """
+        async with self._changed:
+            self._eof = True
+            self._changed.notify_all()
+
+
+class Relay:
+    def __init__(
+        self,
+        session: BaseSession,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        buffer_size: int = DEFAULT_RELAY_BUFFER_SIZE,
+        segments: int = 1,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+    ) -> None:
+        """
+        Download remote file concurrently with consuming it
+
+        Download runs in background tasks and fills :class:`RelayBuffer`,
+        so the file is uploaded while it's still being downloaded.
+        With several segments, ranges of the file are requested concurrently,
+        when the server supports them.
+
+        :param session: HTTP session
+        :param url: file URL
+        :param headers: HTTP headers
+        :param timeout: timeout of each read in seconds
+        :param chunk_size: size of chunks yielded to consumer
+        :param buffer_size: maximum number of downloaded bytes not consumed yet
+        :param segments: maximum number of simultaneous range requests
+        :param segment_size: size of range requested at once
+        """
+        if segments < 1 or segment_size < 1:
+            raise ValueError("Segments count and size should be positive")
+        self.session = session
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.buffer_size = buffer_size
+        self.segments = segments
+        self.segment_size = segment_size
+
+    async def __aiter__(self) -> AsyncGenerator[bytes, None]:
+        buffer = RelayBuffer(self.buffer_size)
+        producer = asyncio.ensure_future(self._produce(buffer))
+        try:
+            while chunk := await buffer.read(self.chunk_size):
+                yield chunk
+        finally:
+            await buffer.close()
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def _produce(self, buffer: RelayBuffer) -> None:
+        try:
+            ranges = await self._ranges()
+            if ranges is None:
+                await self._stream(buffer)
+                await buffer.finish()
+            else:
+                await self._fetch_ranges(buffer, ranges)
+                await buffer.finish(ranges[-1][1] if ranges else 0)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await buffer.fail(e)
+
+    async def _ranges(self) -> Optional[List[Tuple[int, int]]]:
+        if self.segments < 2:
+            return None
+        try:
+            info = await self.session.probe_content(
+                self.url, headers={**self.headers, **_IDENTITY}, timeout=self.timeout
+            )
+        except NotImplementedError:
+            return None
+        if info.size is None or not info.accept_ranges or info.size <= self.segment_size:
+            return None
+        return [
+            (start, min(start + self.segment_size, info.size))
+            for start in range(0, info.size, self.segment_size)
+        ]
+
+    async def _stream(self, buffer: RelayBuffer) -> None:
+        offset = 0
+        async for data in self.session.stream_content(
+            url=self.url,
+            headers=self.headers,
+            timeout=self.timeout,
+            chunk_size=self.chunk_size,
+            raise_for_status=True,
+        ):
+            await buffer.write(offset, data)
+            offset += len(data)
+
+    async def _fetch_ranges(self, buffer: RelayBuffer, ranges: List[Tuple[int, int]]) -> None:
+        # Ranges are started in order, so the earliest unfinished range always
+        # holds a slot and the consumer can't be blocked by later ones
+        semaphore = asyncio.Semaphore(self.segments)
+        tasks: List[asyncio.Future[None]] = []
+
+        async def fetch(start: int, end: int) -> None:
+            try:
+                await self._fetch_range(buffer, start, end)
+            finally:
+                semaphore.release()
+
+        try:
+            for start, end in ranges:
+                await semaphore.acquire()
+                if any(task.done() and task.exception() for task in tasks):
+                    semaphore.release()
+                    break
+                tasks.append(asyncio.ensure_future(fetch(start, end)))
+            for task in tasks:
+                await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_range(self, buffer: RelayBuffer, start: int, end: int) -> None:
+        offset = start
+        async with self.session.open_content(
+            self.url,
+            headers={**self.headers, "Range": f"bytes={start}-{end - 1}", **_IDENTITY},
+            timeout=self.timeout,
+            chunk_size=self.chunk_size,
+        ) as (status, headers, chunks):
+            if status >= HTTPStatus.BAD_REQUEST:
+                raise ClientHTTPStatusError(status=status, url=self.url)
+            content_range = headers.get("content-range", "")
+            if status != HTTPStatus.PARTIAL_CONTENT or not content_range.startswith(
+                f"bytes {start}-{end - 1}/"
+            ):
+                # Whole file sent instead of the range must not be relayed at range offset
+                raise ValueError(
+                    f"Expected partial content for range {start}-{end - 1}, "
+                    f"got HTTP {status} {content_range}".rstrip()
+                )
+            async for data in chunks:
+                if offset + len(data) > end:
+                    raise ValueError("Server ignored requested byte range")
+                await buffer.write(offset, data)
+                offset += len(data)
+        if offset != end:
+            raise ValueError(f"Range {start}-{end - 1} is incomplete: got {offset - start} bytes")
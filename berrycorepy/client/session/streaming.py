@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_STRUCTURAL = re.compile(rb'["\[\]{},:]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_WHITESPACE = b" \t\r\n"
+_COMPACT_THRESHOLD = 65536
+
+
+class ResultScanner:
+    def __init__(self, key: str = "result") -> None:
+        """
+        Incremental scanner of API response document
+
+        Splits items of the :code:`result` array out of the body as it arrives,
+        without building the whole document, so only the current item is kept in memory.
+        Other top-level fields (:code:`ok`, :code:`description`, ...) are decoded
+        and collected into :attr:`fields`.
+
+        :param key: top-level key of the array
+        """
+        self.key = key
+        self.fields: Dict[str, Any] = {}
+        self.items = 0
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._field: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Consume next chunk of the body
+
+        :return: raw JSON of array items completed by this chunk
+        """
+        items: List[bytes] = []
+        if not data:
+            return items
+        if self._done:
+            if data.strip(_WHITESPACE):
+                raise ValueError("Extra data after the end of JSON document")
+            return items
+
+        buffer = self._buffer
+        buffer += data
+        pos = self._pos
+        while not self._done:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = max(pos, len(buffer))
+                    break
+                pos = match.end()
+                if match.group() == b"\\":
+                    pos += 1  # skip escaped character, it can be in the next chunk
+                    continue
+                self._in_string = False
+                if self._key_start is not None:
+                    self._field = json.loads(buffer[self._key_start : pos])
+                    self._key_start = None
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            index = match.start()
+            char = buffer[index]
+            pos = index + 1
+
+            if char == 0x22:  # "
+                self._in_string = True
+                if self._depth == 1 and self._field is None:
+                    self._key_start = index
+            elif char == 0x3A:  # :
+                if self._depth == 1:
+                    self._value_start = pos
+                    if self._field == self.key:
+                        self._check_array(buffer, pos)
+            elif char in b"[{":
+                if self._depth == 0 and char != 0x7B:
+                    raise ValueError("Response is not a JSON object")
+                self._depth += 1
+                if self._depth == 2 and self._field == self.key and char == 0x5B:
+                    self._in_array = True
+                    self._value_start = None  # array itself is never decoded
+                    self._item_start = pos
+            elif char in b"]}":
+                self._depth -= 1
+                if self._depth == 1 and self._in_array:
+                    self._emit_item(buffer, index, items)
+                    self._in_array = False
+                elif self._depth == 0:
+                    self._finish_field(buffer, index)
+                    self._done = True
+                elif self._depth < 0:
+                    raise ValueError("Unbalanced JSON document")
+            elif char == 0x2C:  # ,
+                if self._depth == 1:
+                    self._finish_field(buffer, index)
+                elif self._depth == 2 and self._in_array:
+                    self._emit_item(buffer, index, items)
+                    self._item_start = pos
+
+        if self._done and bytes(buffer[pos:]).strip(_WHITESPACE):
+            raise ValueError("Extra data after the end of JSON document")
+        self._pos = pos
+        self._compact()
+        return items
+
+    def close(self) -> None:
+        """
+        Check that the whole document was consumed
+        """
+        if not self._done:
+            raise ValueError("Unexpected end of JSON document")
+
+    def _check_array(self, buffer: bytearray, pos: int) -> None:
+        # Result can be any value, only arrays are split into items
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buffer) and buffer[pos] not in b"[n":
+            raise ValueError(f"{self.key!r} is not an array")
+
+    def _emit_item(self, buffer: bytearray, end: int, items: List[bytes]) -> None:
+        if self._item_start is None:
+            return
+        raw = bytes(buffer[self._item_start : end]).strip(_WHITESPACE)
+        self._item_start = None
+        if raw:
+            items.append(raw)
+            self.items += 1
+
+    def _finish_field(self, buffer: bytearray, end: int) -> None:
+        if self._field is not None and self._value_start is not None:
+            raw = bytes(buffer[self._value_start : end]).strip(_WHITESPACE)
+            value = json.loads(raw)
+            if self._field == self.key and value is not None:
+                raise ValueError(f"{self.key!r} is not an array")
+            self.fields[self._field] = value
+        self._field = None
+        self._key_start = None
+        self._value_start = None
+
+    def _compact(self) -> None:
+        if self._pos < _COMPACT_THRESHOLD:
+            return
+        starts = [
+            start
+            for start in (self._key_start, self._value_start, self._item_start)
+            if start is not None
+        ]
+        offset = min(starts, default=self._pos)
+        if not offset:
+            return
+        del self._buffer[:offset]
+        self._pos -= offset
+        if self._key_start is not None:
+            self._key_start -= offset
+        if self._value_start is not None:
+            self._value_start -= offset
+        if self._item_start is not None:
+            self._item_start -= offset
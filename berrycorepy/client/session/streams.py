@@ -0,0 +1,613 @@
+from __future__ import annotations
+
+import asyncio
+import secrets
+import ssl
+import sys
+import time
+from collections import deque
+from collections.abc import AsyncIterable
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+from urllib.parse import urlsplit
+
+import certifi
+
+from berrycorepy.__meta__ import __version__
+from berrycorepy.client.dangerous import DangerousAPIServer
+from berrycorepy.exceptions import ClientHTTPStatusError, DangerousNetworkError
+from berrycorepy.methods.base import DangerousMethod, DangerousType
+from berrycorepy.types.input_file import Chunk, InputFile
+
+from .BaseSession import BaseSession, ContentInfo
+from .metrics import RequestMetrics, measure
+
+if TYPE_CHECKING:
+    from ..client import Client
+
+_Origin = Tuple[str, str, int]
+_Body = Union[bytes, AsyncIterator[Chunk], None]
+
+USER_AGENT = (
+    f"berrycorepy/{__version__} "
+    f"Python/{sys.version_info.major}.{sys.version_info.minor}"
+)
+NO_BODY_STATUSES = frozenset({204, 304})
+
+
+class _ProtocolError(Exception):
+    pass
+
+
+class _Connection:
+    __slots__ = ("reader", "writer", "released_at", "requests")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.released_at = 0.0
+        self.requests = 0
+
+    @property
+    def alive(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _ConnectionPool:
+    def __init__(
+        self,
+        origin: _Origin,
+        ssl_context: Optional[ssl.SSLContext],
+        limit: int,
+        keepalive_timeout: float,
+    ) -> None:
+        scheme, host, port = origin
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.keepalive_timeout = keepalive_timeout
+        self.idle: Deque[_Connection] = deque()
+        self.active: Set[_Connection] = set()
+        self.semaphore = asyncio.Semaphore(limit)
+
+        default_port = 443 if scheme == "https" else 80
+        host_header = host if port == default_port else f"{host}:{port}"
+        # Headers which are the same for every request to this origin
+        self.header_block = (
+            f"Host: {host_header}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "Connection: keep-alive\r\n"
+        ).encode()
+
+    async def acquire(
+        self,
+        fresh: bool = False,
+        metrics: Optional[RequestMetrics] = None,
+        api_method: Optional[str] = None,
+    ) -> Tuple[_Connection, bool]:
+        """
+        :return: connection and flag whether it was reused from the pool
+        """
+        if api_method is None:
+            metrics = None
+        with measure(metrics, api_method or "", "pool_wait"):
+            await self.semaphore.acquire()
+        try:
+            now = time.monotonic()
+            while self.idle and not fresh:
+                conn = self.idle.pop()
+                if conn.alive and now - conn.released_at < self.keepalive_timeout:
+                    self.active.add(conn)
+                    return conn, True
+                conn.close()
+            with measure(metrics, api_method or "", "connect"):
+                reader, writer = await asyncio.open_connection(
+                    self.host,
+                    self.port,
+                    ssl=self.ssl_context,
+                    server_hostname=self.host if self.ssl_context else None,
+                )
+            conn = _Connection(reader, writer)
+            self.active.add(conn)
+            return conn, False
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    def release(self, conn: _Connection, reusable: bool) -> None:
+        self.active.discard(conn)
+        conn.requests += 1
+        if reusable and conn.alive:
+            conn.released_at = time.monotonic()
+            self.idle.append(conn)
+        else:
+            conn.close()
+        self.semaphore.release()
+
+    def close(self) -> None:
+        """
+        Close idle connections and connections of requests in progress
+        """
+        while self.idle:
+            self.idle.pop().close()
+        for conn in self.active:
+            conn.close()
+
+
+class _Response:
+    def __init__(
+        self,
+        pool: _ConnectionPool,
+        conn: _Connection,
+        status: int,
+        headers: Dict[str, str],
+        keep_alive: bool,
+        has_body: bool,
+    ) -> None:
+        self.status = status
+        self.headers = headers
+        self._pool = pool
+        self._conn: Optional[_Connection] = conn
+        self._keep_alive = keep_alive
+        self._has_body = has_body
+
+    async def iter_chunked(self, chunk_size: int) -> AsyncGenerator[bytes, None]:
+        conn = self._conn
+        if conn is None:
+            raise RuntimeError("Response body is already consumed")
+        reader = conn.reader
+        complete = False
+        try:
+            if not self._has_body:
+                pass
+            elif self.headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    size_line = await reader.readuntil(b"\r\n")
+                    try:
+                        size = int(size_line.split(b";", 1)[0], 16)
+                    except ValueError:
+                        raise _ProtocolError(f"Malformed chunk size: {size_line!r}")
+                    if not size:
+                        while await reader.readuntil(b"\r\n") != b"\r\n":  # trailers
+                            pass
+                        break
+                    while size:
+                        data = await reader.read(min(chunk_size, size))
+                        if not data:
+                            raise asyncio.IncompleteReadError(b"", size)
+                        size -= len(data)
+                        yield data
+                    await reader.readexactly(2)
+            elif "content-length" in self.headers:
+                remaining = int(self.headers["content-length"])
+                while remaining:
+                    data = await reader.read(min(chunk_size, remaining))
+                    if not data:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(data)
+                    yield data
+            else:
+                # Body is delimited by connection close
+                self._keep_alive = False
+                while data := await reader.read(chunk_size):
+                    yield data
+            complete = True
+        finally:
+            self.release(reusable=complete and self._keep_alive)
+
+    async def read(self) -> bytes:
+        body = bytearray()
+        async for chunk in self.iter_chunked(65536):
+            body += chunk
+        return bytes(body)
+
+    def release(self, reusable: bool = False) -> None:
+        if self._conn is not None:
+            self._pool.release(self._conn, reusable=reusable)
+            self._conn = None
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bool]:
+    while True:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise _ProtocolError(f"Malformed status line: {lines[0]!r}")
+        try:
+            status = int(parts[1])
+        except ValueError:
+            raise _ProtocolError(f"Malformed status line: {lines[0]!r}")
+        if 100 <= status < 200:
+            continue  # informational response, the real one follows
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        if parts[0] == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+        return status, headers, keep_alive
+
+
+class StreamsSession(BaseSession):
+    def __init__(
+        self,
+        limit: int = 100,
+        keepalive_timeout: float = 15.0,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Lightweight HTTP/1.1 client session based on asyncio streams.
+
+        Keeps a pool of persistent connections to each origin, which is a single API host
+        in most setups, with precomputed request headers and minimal response parsing.
+        Parameters are sent as JSON, requests with files as chunked multipart form.
+
+        :param limit: The number of simultaneous connections to each host. Default is 100.
+        :param keepalive_timeout: Idle time in seconds after which pooled connection
+            is not reused. Default is 15.
+        :param kwargs: Additional keyword arguments.
+        """
+        super().__init__(**kwargs)
+
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._pools: Dict[_Origin, _ConnectionPool] = {}
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def _get_pool(self, origin: _Origin) -> _ConnectionPool:
+        pool = self._pools.get(origin)
+        if pool is None:
+            ssl_context = None
+            if origin[0] == "https":
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+                ssl_context = self._ssl_context
+            pool = self._pools[origin] = _ConnectionPool(
+                origin,
+                ssl_context=ssl_context,
+                limit=self.limit,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+        return pool
+
+    async def request(
+        self,
+        http_method: str,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        body: _Body = None,
+        api_method: Optional[str] = None,
+        accept_encoding: str = "identity",
+    ) -> _Response:
+        """
+        Send request and read response head, body must be consumed or released by caller.
+        Response body is returned as is, decoding it according to :code:`accept_encoding`
+        is up to caller. :code:`Accept-Encoding` from headers overrides it,
+        requests with :code:`Range` header always ask for identity coding
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"} or not parts.hostname:
+            raise _ProtocolError(f"Unsupported URL: {url!r}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        pool = self._get_pool((scheme, parts.hostname, port))
+
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        headers = headers or {}
+        names = {name.lower(): name for name in headers}
+        if "range" in names:
+            # Ranges of encoded content can't be decoded separately
+            accept_encoding = "identity"
+        elif "accept-encoding" in names:
+            accept_encoding = headers[names["accept-encoding"]]
+        head = bytearray(f"{http_method} {target} HTTP/1.1\r\n".encode())
+        head += pool.header_block
+        head += b"Accept-Encoding: %s\r\n" % accept_encoding.encode("latin-1")
+        for name, value in headers.items():
+            if name.lower() != "accept-encoding":
+                head += f"{name}: {value}\r\n".encode("latin-1")
+        if isinstance(body, bytes):
+            head += b"Content-Length: %d\r\n" % len(body)
+        elif body is not None:
+            head += b"Transfer-Encoding: chunked\r\n"
+        head += b"\r\n"
+
+        # Stale keep-alive connection can be closed by the server at any moment,
+        # so request is repeated once on a new connection if writing it failed.
+        # Once the request is flushed, the server may have processed it, and streamed
+        # bodies can't be replayed, so such requests are never repeated
+        attempts = 1 if isinstance(body, AsyncIterable) else 2
+        for attempt in range(attempts):
+            conn, reused = await pool.acquire(
+                fresh=attempt > 0, metrics=self.metrics, api_method=api_method
+            )
+            flushed = False
+            try:
+                conn.writer.write(head)
+                if isinstance(body, bytes):
+                    conn.writer.write(body)
+                elif body is not None:
+                    async for chunk in body:
+                        if chunk:
+                            # Memory views of input files are written without copying
+                            conn.writer.write(b"%x\r\n" % memoryview(chunk).nbytes)
+                            conn.writer.write(chunk)
+                            conn.writer.write(b"\r\n")
+                            await conn.writer.drain()
+                            flushed = True
+                    conn.writer.write(b"0\r\n\r\n")
+                await conn.writer.drain()
+                flushed = True
+                sent = time.perf_counter()
+                status, response_headers, keep_alive = await _read_head(conn.reader)
+                if api_method and self.metrics is not None:
+                    self.metrics.observe(api_method, "ttfb", time.perf_counter() - sent)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pool.release(conn, reusable=False)
+                if reused and not flushed and attempt + 1 < attempts:
+                    continue
+                raise
+            except BaseException:
+                pool.release(conn, reusable=False)
+                raise
+            return _Response(
+                pool,
+                conn,
+                status=status,
+                headers=response_headers,
+                keep_alive=keep_alive,
+                has_body=http_method != "HEAD" and status not in NO_BODY_STATUSES,
+            )
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def close(self) -> None:
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+
+    async def _multipart(
+        self, client: Client, method: DangerousMethod[DangerousType], boundary: str
+    ) -> AsyncIterator[Chunk]:
+        files: Dict[str, InputFile] = {}
+        fields = {}
+        for key, value in method.model_dump(warnings=False).items():
+            value = self.prepare_value(value, client=client, files=files)
+            if value:
+                fields[key] = value
+        for key, value in fields.items():
+            yield (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode()
+        for key, file in files.items():
+            yield (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{key}"; '
+                f'filename="{file.filename or key}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+            async for chunk in file.read(client):
+                yield chunk
+            yield b"\r\n"
+        yield f"--{boundary}--\r\n".encode()
+
+    def _build_post(
+        self, client: Client, method: DangerousMethod[DangerousType]
+    ) -> Tuple[Dict[str, str], _Body]:
+        body: _Body
+        json_body = self.build_json_body(client=client, method=method)
+        if json_body is not None:
+            headers = {"Content-Type": "application/json"}
+            body = json_body.encode()
+            if self.compression is not None:
+                body, encoding = self.compression.compress_body(body)
+                if encoding is not None:
+                    headers["Content-Encoding"] = encoding
+        else:
+            boundary = secrets.token_hex(16)
+            headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+            body = self._multipart(client, method, boundary)
+        return headers, body
+
+    async def _post(
+        self, client: Client, method: DangerousMethod[DangerousType], server: DangerousAPIServer
+    ) -> Tuple[int, bytes]:
+        url = server.api_url(token=client.token, method=method.__api_method__)
+        headers, body = self._build_post(client=client, method=method)
+        compression = self.compression
+
+        response = await self.request(
+            "POST",
+            url,
+            headers=headers,
+            body=body,
+            api_method=method.__api_method__,
+            accept_encoding=compression.accept_encoding if compression else "identity",
+        )
+        with measure(self.metrics, method.__api_method__, "body"):
+            if compression is None:
+                content = await response.read()
+            else:
+                content = await compression.read(
+                    response.headers.get("content-encoding"), response.iter_chunked(65536)
+                )
+        return response.status, content
+
+    async def _send(
+        self,
+        client: Client,
+        method: DangerousMethod[DangerousType],
+        server: DangerousAPIServer,
+        timeout: Optional[int] = None,
+    ) -> Tuple[int, bytes]:
+        try:
+            return await asyncio.wait_for(
+                self._post(client, method, server),
+                timeout=self.timeout if timeout is None else timeout,
+            )
+        except asyncio.TimeoutError:
+            raise DangerousNetworkError(method=method, message="Request timeout error")
+        except (OSError, EOFError, asyncio.LimitOverrunError, _ProtocolError) as e:
+            raise DangerousNetworkError(method=method, message=f"{type(e).__name__}: {e}")
+
+    async def make_request(
+        self, client: Client, method: DangerousMethod[DangerousType], timeout: Optional[int] = None
+    ) -> DangerousType:
+        status, content = await self.send_routed(
+            method, lambda server: self._send(client, method, server, timeout=timeout)
+        )
+
+        response = self.check_response(
+            client=client, method=method, status_code=status, content=content
+        )
+        return cast(DangerousType, response.result)
+
+    @asynccontextmanager
+    async def open_stream(
+        self,
+        client: Client,
+        method: DangerousMethod[DangerousType],
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, AsyncIterator[bytes]]]:
+        if timeout is None:
+            timeout = self.timeout
+        compression = self.compression
+
+        async def send(server: DangerousAPIServer) -> _Response:
+            url = server.api_url(token=client.token, method=method.__api_method__)
+            headers, body = self._build_post(client=client, method=method)
+            try:
+                return await asyncio.wait_for(
+                    self.request(
+                        "POST",
+                        url,
+                        headers=headers,
+                        body=body,
+                        api_method=method.__api_method__,
+                        accept_encoding=compression.accept_encoding if compression else "identity",
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                raise DangerousNetworkError(method=method, message="Request timeout error")
+            except (OSError, EOFError, asyncio.LimitOverrunError, _ProtocolError) as e:
+                raise DangerousNetworkError(method=method, message=f"{type(e).__name__}: {e}")
+
+        # Nothing is consumed until the response is received, so it can fail over
+        response = await self.send_routed(method, send)
+
+        chunks = response.iter_chunked(65536)
+        if compression is not None:
+            chunks = compression.decompress_stream(
+                response.headers.get("content-encoding"), chunks
+            )
+
+        async def read() -> AsyncIterator[bytes]:
+            while True:
+                try:
+                    yield await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise DangerousNetworkError(method=method, message="Request timeout error")
+                except (OSError, EOFError, asyncio.LimitOverrunError, _ProtocolError) as e:
+                    raise DangerousNetworkError(method=method, message=f"{type(e).__name__}: {e}")
+
+        try:
+            yield response.status, read()
+        finally:
+            await chunks.aclose()
+            response.release()
+
+    async def probe_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+    ) -> ContentInfo:
+        response = await asyncio.wait_for(self.request("HEAD", url, headers=headers), timeout)
+        await response.read()  # no body, returns connection to the pool
+        if response.status < 400 and "content-length" in response.headers:
+            return ContentInfo.from_headers(response.status, response.headers)
+        # HEAD is not supported or size is unknown, request the first byte instead
+        response = await asyncio.wait_for(
+            self.request("GET", url, headers={**(headers or {}), "Range": "bytes=0-0"}), timeout
+        )
+        try:
+            await asyncio.wait_for(response.read(), timeout)
+        finally:
+            response.release()
+        if response.status >= 400:
+            raise ClientHTTPStatusError(status=response.status, url=url)
+        return ContentInfo.from_headers(response.status, response.headers)
+
+    @asynccontextmanager
+    async def open_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+    ) -> AsyncIterator[Tuple[int, Mapping[str, str], AsyncIterator[bytes]]]:
+        compression = self.compression
+        accept_encoding = compression.accept_encoding if compression is not None else "identity"
+        response = await asyncio.wait_for(
+            self.request("GET", url, headers=headers, accept_encoding=accept_encoding), timeout
+        )
+
+        body = response.iter_chunked(chunk_size)
+        if compression is not None:
+            body = compression.decompress_stream(response.headers.get("content-encoding"), body)
+
+        async def chunks() -> AsyncGenerator[bytes, None]:
+            while True:
+                try:
+                    yield await asyncio.wait_for(body.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+
+        try:
+            yield response.status, response.headers, chunks()
+        finally:
+            await body.aclose()
+            response.release()
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        async with self.open_content(
+            url, headers=headers, timeout=timeout, chunk_size=chunk_size
+        ) as (status, _, chunks):
+            if raise_for_status and status >= 400:
+                raise ClientHTTPStatusError(status=status, url=url)
+            async for chunk in chunks:
+                yield chunk
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from types import TracebackType
+from typing import Any, Coroutine, Iterable, List, Optional, Type, TypeVar, Union
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.session.BaseSession import BaseSession
+from berrycorepy.methods import DangerousMethod, GetMe
+from berrycorepy.types.User import User
+
+T = TypeVar("T")
+
+
+class SyncClient:
+    def __init__(
+            self,
+            token: str,
+            session: Optional[BaseSession] = None,
+            **kwargs: Any,
+    ) -> None:
+        """
+        Synchronous client facade for threaded code
+
+        Owns an event loop running in a background thread with one long-lived
+        :class:`berrycorepy.client.client.Client`, so connections are reused between calls.
+        Can be shared between threads.
+
+        :param token: Dangerous API token
+        :param session: HTTP session, by default :class:`AiohttpSession`
+        """
+        self.client = Client(token, session=session, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="berrycore-sync-client", daemon=True
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _submit(self, coro: Coroutine[Any, Any, T]) -> "Future[T]":
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "SyncClient can't be used from its own event loop, use `client` attribute instead"
+            )
+        with self._lock:
+            if self._closed:
+                coro.close()
+                raise RuntimeError("SyncClient is closed")
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit(
+            self, method: DangerousMethod[T], request_timeout: Optional[int] = None
+    ) -> "Future[T]":
+        """
+        Schedule API method call without waiting for the result
+
+        :param method: method instance
+        :param request_timeout: Request timeout
+        :return: future with the result
+        """
+        return self._submit(self.client(method, request_timeout=request_timeout))
+
+    def submit_many(
+            self, methods: Iterable[DangerousMethod[Any]], request_timeout: Optional[int] = None
+    ) -> List["Future[Any]"]:
+        """
+        Schedule many API method calls, they are executed concurrently
+
+        :param methods: method instances
+        :param request_timeout: Request timeout
+        :return: futures in the same order
+        """
+        return [self.submit(method, request_timeout=request_timeout) for method in methods]
+
+    def __call__(
+            self,
+            method: DangerousMethod[T],
+            request_timeout: Optional[int] = None,
+            timeout: Optional[float] = None,
+    ) -> T:
+        """
+        Call API method and wait for the result
+
+        :param method: method instance
+        :param request_timeout: Request timeout
+        :param timeout: maximum time in seconds to wait for the result in current thread
+        """
+        return self.submit(method, request_timeout=request_timeout).result(timeout)
+
+    def gather(
+            self,
+            methods: Iterable[DangerousMethod[Any]],
+            concurrency: Optional[int] = None,
+            request_timeout: Optional[int] = None,
+            timeout: Optional[float] = None,
+    ) -> List[Union[Any, BaseException]]:
+        """
+        Call many API methods with bounded concurrency, see :meth:`Client.gather`
+
+        :param methods: method instances
+        :param concurrency: maximum number of simultaneous calls
+        :param request_timeout: Request timeout
+        :param timeout: maximum time in seconds to wait for all results in current thread
+        :return: results in source order, failed calls are represented by their exceptions
+        """
+        return self._submit(
+            self.client.gather(methods, concurrency=concurrency, request_timeout=request_timeout)
+        ).result(timeout)
+
+    def get_me(self, request_timeout: Optional[int] = None) -> User:
+        """
+        A simple method for testing your client's authentication token.
+
+        :param request_timeout: Request timeout
+        :return: Returns basic information about the client
+        """
+        return self(GetMe(), request_timeout=request_timeout)
+
+    async def _shutdown(self) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await self.client.session.close()
+        finally:
+            await self._loop.shutdown_asyncgens()
+            await self._loop.shutdown_default_executor()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Cancel pending calls, close HTTP session and stop the event loop thread
+
+        :param timeout: maximum time in seconds to wait for the shutdown
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("SyncClient can't be closed from its own event loop")
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._loop.close()
+
+    def __enter__(self) -> "SyncClient":
+        return self
+
+    def __exit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -77,3 +77,114 @@ class DangerousNetworkError(DangerousAPIError):
     """
 
     label = "HTTP Client says"
+
+
+class DangerousRetryAfter(DangerousAPIError):
+    """
+    Exception raised when flood control exceeds.
+    """
+
+    def __init__(
+        self,
+        method: DangerousMethod[DangerousType],
+        message: str,
+        retry_after: int,
+    ) -> None:
+        description = f"Flood control exceeded on method {type(method).__name__!r}"
+        description += f". Retry in {retry_after} seconds."
+        description += f"\nOriginal description: {message}"
+
+        super().__init__(method=method, message=description)
+        self.retry_after = retry_after
+
+
+class DangerousBadRequest(DangerousAPIError):
+    """
+    Exception raised when request is malformed.
+    """
+
+
+class DangerousNotFound(DangerousAPIError):
+    """
+    Exception raised when requested resource is not found.
+    """
+
+
+class DangerousConflictError(DangerousAPIError):
+    """
+    Exception raised when client token is already used by another application in polling mode.
+    """
+
+
+class DangerousUnauthorizedError(DangerousAPIError):
+    """
+    Exception raised when client token is invalid.
+    """
+
+
+class DangerousForbiddenError(DangerousAPIError):
+    """
+    Exception raised when client is not allowed to perform the action.
+    """
+
+
+class DangerousServerError(DangerousAPIError):
+    """
+    Exception raised when Dangerous server returns 5xx error.
+    """
+
+
+class RestartingDangerous(DangerousServerError):
+    """
+    Exception raised when Dangerous server is restarting.
+    """
+
+
+class DangerousEntityTooLarge(DangerousNetworkError):
+    """
+    Exception raised when you are trying to send a file that is too large.
+    """
+
+
+class DangerousCircuitOpen(DangerousAPIError):
+    """
+    Exception raised when request is rejected by circuit breaker without sending.
+    """
+
+    label = "Circuit breaker says"
+
+    def __init__(
+        self,
+        method: DangerousMethod[DangerousType],
+        message: str,
+        retry_in: float,
+    ) -> None:
+        super().__init__(method=method, message=message)
+        self.retry_in = retry_in
+
+
+class ClientHTTPStatusError(BerrycoreError):
+    """
+    Exception raised when HTTP server responds with error status outside of Dangerous API calls.
+    (File downloads, streaming from URL, etc.)
+    """
+
+    def __init__(self, status: int, url: str) -> None:
+        self.status = status
+        self.url = url
+
+    def __str__(self) -> str:
+        return f"HTTP {self.status} for {self.url}"
+
+
+class ClientDownloadError(BerrycoreError):
+    """
+    Exception raised when downloaded file is incomplete or fails verification.
+    """
+
+    def __init__(self, message: str, path: str) -> None:
+        self.message = message
+        self.path = path
+
+    def __str__(self) -> str:
+        return f"{self.message} ({self.path})"
@@ -3,4 +3,5 @@ import logging
 dispatcher = logging.getLogger("berrycore.dispatcher")
 event = logging.getLogger("berrycore.event")
 middlewares = logging.getLogger("berrycore.middlewares")
-scene = logging.getLogger("berrycore.scene")
\ No newline at end of file
+scene = logging.getLogger("berrycore.scene")
+session = logging.getLogger("berrycore.session")
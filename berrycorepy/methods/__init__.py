@@ -1,7 +1,15 @@
 from .get_me import GetMe
+from .get_user import GetChat
 from .base import DangerousMethod
 
+READ_ONLY_METHODS = (
+    GetMe,
+    GetChat,
+)
+"""Methods which never change server state and are safe to share, cache or repeat"""
+
 __all__ = (
     GetMe,
-    DangerousMethod
-)
\ No newline at end of file
+    GetChat,
+    DangerousMethod,
+)
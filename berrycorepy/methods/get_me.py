@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from ..types import User
+from ..types.User import User
 from .base import DangerousMethod
 
 
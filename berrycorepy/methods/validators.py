@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Type, get_args, get_origin
+
+from pydantic import TypeAdapter
+
+from .base import DangerousMethod, Response
+
+
+def _iter_methods(root: Type[DangerousMethod[Any]]) -> Iterator[Type[DangerousMethod[Any]]]:
+    for subclass in root.__subclasses__():
+        # Abstract methods and generic aliases declare no returning type
+        if not isinstance(subclass.__dict__.get("__returning__", property()), property):
+            yield subclass
+        yield from _iter_methods(subclass)
+
+
+class ResponseValidatorRegistry:
+    def __init__(self) -> None:
+        """
+        Cache of response models for each method class
+
+        Returning type is fixed per method class, so :code:`Response[...]`
+        is parametrized and its validator is compiled only once.
+        """
+        self._response_types: Dict[Type[DangerousMethod[Any]], Type[Response[Any]]] = {}
+        self._item_types: Dict[Type[DangerousMethod[Any]], TypeAdapter[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._response_types)
+
+    def __contains__(self, method_type: Type[DangerousMethod[Any]]) -> bool:
+        return method_type in self._response_types
+
+    def get(self, method_type: Type[DangerousMethod[Any]]) -> Type[Response[Any]]:
+        """
+        Get response model for the method class, compile it on first use
+
+        :param method_type: method class
+        :return: parametrized :class:`berrycorepy.methods.base.Response`
+        """
+        try:
+            return self._response_types[method_type]
+        except KeyError:
+            pass
+        response_type = Response[method_type.__returning__]  # type: ignore
+        self._response_types[method_type] = response_type
+        return response_type
+
+    def get_item(self, method_type: Type[DangerousMethod[Any]]) -> TypeAdapter[Any]:
+        """
+        Get validator of single result item for the method returning list
+
+        :param method_type: method class
+        :return: type adapter of list item type
+        :raise TypeError: when method doesn't return list
+        """
+        try:
+            return self._item_types[method_type]
+        except KeyError:
+            pass
+        returning = method_type.__returning__
+        if get_origin(returning) is not list or not get_args(returning):
+            raise TypeError(f"{method_type.__name__} doesn't return list, it can't be streamed")
+        adapter: TypeAdapter[Any] = TypeAdapter(get_args(returning)[0])
+        self._item_types[method_type] = adapter
+        return adapter
+
+    def warm_up(self, methods: Optional[Iterable[Type[DangerousMethod[Any]]]] = None) -> int:
+        """
+        Compile response models ahead of the first request
+
+        :param methods: method classes, by default all imported subclasses
+            of :class:`berrycorepy.methods.base.DangerousMethod`
+        :return: number of compiled models
+        """
+        if methods is None:
+            methods = _iter_methods(DangerousMethod)
+        for method_type in methods:
+            self.get(method_type)
+        return len(self._response_types)
+
+
+response_validators = ResponseValidatorRegistry()
@@ -0,0 +1,554 @@
+"""
+Compact representations of result objects for holding many of them in memory
+
+:class:`DangerousObject` instances carry pydantic state (fields set, extra fields,
+private attributes), which costs several hundred bytes per object.
+Two alternatives are generated from the model fields:
+
+* :func:`compact_record` - class with :code:`__slots__` and a plain attribute per field,
+  nested objects become records too and lists of them become tuples
+* :class:`RecordTable` - struct-of-arrays storage, one typed :mod:`array` per field,
+  nested lists of objects are stored in a child table
+
+In both representations values of :data:`INTERNED_FIELDS` are shared between records:
+records use interned strings and tables store them dictionary-encoded.
+Extra fields of objects are not kept.
+
+Memory per :class:`User` with 4 game profiles, see :code:`benchmarks/compact_records.py`:
+
+=======================  ===========
+pydantic objects         ~7.6 KiB
+:class:`CompactUser`     ~1.6 KiB
+:class:`RecordTable`     ~0.9 KiB
+=======================  ===========
+"""
+from __future__ import annotations
+
+import sys
+import types
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from berrycorepy.types.base import DangerousObject
+from berrycorepy.types.GameProfile import GameProfile
+from berrycorepy.types.User import User
+
+if TYPE_CHECKING:
+    from berrycorepy.client.client import Client
+
+INTERNED_FIELDS: FrozenSet[str] = frozenset({"country", "sex"})
+"""String fields with few distinct values"""
+
+_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+_NULL, _NAIVE, _AWARE = 0, 1, 2
+
+RecordType = TypeVar("RecordType", bound="CompactRecord")
+
+
+def _field_kind(annotation: Any) -> Tuple[str, Any]:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            annotation = args[0]
+    if get_origin(annotation) in (list, List):
+        args = get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], DangerousObject):
+            return "models", args[0]
+        return "object", None
+    if not isinstance(annotation, type):
+        return "object", None
+    if issubclass(annotation, DangerousObject):
+        return "model", annotation
+    for kind in (bool, int, float, datetime, str):  # bool is subclass of int
+        if issubclass(annotation, kind):
+            return kind.__name__, None
+    return "object", None
+
+
+class CompactRecord:
+    """
+    Base class of records generated by :func:`compact_record`
+    """
+
+    __slots__ = ()
+
+    __model__: ClassVar[Type[DangerousObject]]
+    __record_fields__: ClassVar[Tuple[str, ...]]
+    __interned__: ClassVar[FrozenSet[str]]
+    __nested__: ClassVar[Dict[str, Tuple[str, Type[CompactRecord]]]]
+
+    def __init__(self, **kwargs: Any) -> None:
+        for name in self.__record_fields__:
+            setattr(self, name, kwargs.pop(name, None))
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} has no fields {', '.join(kwargs)}")
+
+    @classmethod
+    def from_model(cls: Type[RecordType], obj: DangerousObject) -> RecordType:
+        """
+        Convert pydantic object to record
+        """
+        record = cls.__new__(cls)
+        nested = cls.__nested__
+        interned = cls.__interned__
+        for name in cls.__record_fields__:
+            value = getattr(obj, name)
+            if value is not None:
+                if name in nested:
+                    kind, record_type = nested[name]
+                    if kind == "model":
+                        value = record_type.from_model(value)
+                    else:
+                        value = tuple(record_type.from_model(item) for item in value)
+                elif name in interned and isinstance(value, str):
+                    value = sys.intern(value)
+            setattr(record, name, value)
+        return record
+
+    def to_model(self, client: Optional[Client] = None) -> DangerousObject:
+        """
+        Convert record back to pydantic object, values are not validated again
+
+        :param client: Client instance to bind object to
+        """
+        values = {name: getattr(self, name) for name in self.__record_fields__}
+        for name, (kind, _) in self.__nested__.items():
+            value = values[name]
+            if value is None:
+                continue
+            if kind == "model":
+                values[name] = value.to_model(client)
+            else:
+                values[name] = [item.to_model(client) for item in value]
+        return self.__model__.model_construct(**values).as_(client)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Get field values, nested records are converted to dicts as well
+        """
+        values = {}
+        for name in self.__record_fields__:
+            value = getattr(self, name)
+            if isinstance(value, CompactRecord):
+                value = value.as_dict()
+            elif isinstance(value, tuple):
+                value = [item.as_dict() for item in value]
+            values[name] = value
+        return values
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__record_fields__
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.__record_fields__
+        )
+        return f"{type(self).__name__}({values})"
+
+
+_records: Dict[Tuple[Type[DangerousObject], FrozenSet[str]], Type[CompactRecord]] = {}
+
+
+def compact_record(
+    model: Type[DangerousObject], interned: Iterable[str] = INTERNED_FIELDS
+) -> Type[CompactRecord]:
+    """
+    Get record class with a slot per field of the model, it's created once per model
+
+    :param model: object class
+    :param interned: string fields whose values are interned
+    :return: subclass of :class:`CompactRecord`
+    """
+    interned = frozenset(interned)
+    try:
+        return _records[model, interned]
+    except KeyError:
+        pass
+    fields = tuple(model.model_fields)
+    nested = {}
+    for name, field in model.model_fields.items():
+        kind, nested_model = _field_kind(field.annotation)
+        if kind in ("model", "models"):
+            nested[name] = (kind, compact_record(nested_model, interned))
+    record_type = type(
+        f"Compact{model.__name__}",
+        (CompactRecord,),
+        {
+            "__slots__": fields,
+            "__module__": __name__,
+            "__model__": model,
+            "__record_fields__": fields,
+            "__interned__": interned & set(fields),
+            "__nested__": nested,
+        },
+    )
+    _records[model, interned] = record_type
+    return record_type
+
+
+class _Column:
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+
+    def append(self, value: Any) -> None:
+        self.values.append(value)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[index]
+
+    def truncate(self, length: int) -> None:
+        del self.values[length:]
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values)
+
+
+class _IntColumn(_Column):
+    """
+    Typed array of numbers, it becomes a list once a value doesn't fit the type
+    """
+
+    def __init__(self, typecode: str = "q") -> None:
+        self.values: Union[array[Any], List[Any]] = array(typecode)
+        self.nulls = bytearray()
+
+    def append(self, value: Any) -> None:
+        try:
+            self.values.append(0 if value is None else value)
+        except OverflowError:
+            self.values = self.values.tolist()  # type: ignore[union-attr]
+            self.values.append(value)
+        self.nulls.append(value is None)
+
+    def __getitem__(self, index: int) -> Any:
+        return None if self.nulls[index] else self.values[index]
+
+    def truncate(self, length: int) -> None:
+        del self.values[length:]
+        del self.nulls[length:]
+
+    @property
+    def nbytes(self) -> int:
+        if isinstance(self.values, list):
+            return sys.getsizeof(self.values) + len(self.nulls)
+        return self.values.itemsize * len(self.values) + len(self.nulls)
+
+
+class _FloatColumn(_IntColumn):
+    def __init__(self) -> None:
+        super().__init__("d")
+
+
+class _BoolColumn(_Column):
+    def __init__(self) -> None:
+        self.values = bytearray()  # type: ignore[assignment]
+
+    def append(self, value: Any) -> None:
+        self.values.append(2 if value is None else bool(value))
+
+    def __getitem__(self, index: int) -> Any:
+        value = self.values[index]
+        return None if value == 2 else bool(value)
+
+    def truncate(self, length: int) -> None:
+        del self.values[length:]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.values)
+
+
+class _DatetimeColumn(_Column):
+    """
+    Microseconds since epoch, timezone-aware values are stored in UTC
+    """
+
+    def __init__(self) -> None:
+        self.values: array[int] = array("q")  # type: ignore[assignment]
+        self.flags = bytearray()
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            self.values.append(0)
+            self.flags.append(_NULL)
+        elif value.tzinfo is None:
+            self.values.append((value - _EPOCH) // _MICROSECOND)
+            self.flags.append(_NAIVE)
+        else:
+            self.values.append((value - _UTC_EPOCH) // _MICROSECOND)
+            self.flags.append(_AWARE)
+
+    def __getitem__(self, index: int) -> Any:
+        flag = self.flags[index]
+        if flag == _NULL:
+            return None
+        epoch = _EPOCH if flag == _NAIVE else _UTC_EPOCH
+        return epoch + timedelta(microseconds=self.values[index])
+
+    def truncate(self, length: int) -> None:
+        del self.values[length:]
+        del self.flags[length:]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + len(self.flags)
+
+
+class _DictionaryColumn(_Column):
+    """
+    Codes of distinct values, code :code:`0` is :code:`None`
+    """
+
+    def __init__(self) -> None:
+        self.values: array[int] = array("I")  # type: ignore[assignment]
+        self.dictionary: List[Any] = [None]
+        self.codes: Dict[Any, int] = {}
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            self.values.append(0)
+            return
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.dictionary)
+            self.dictionary.append(value)
+        self.values.append(code)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.dictionary[self.values[index]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + sys.getsizeof(self.dictionary)
+
+
+class _ModelColumn(_Column):
+    """
+    Row indexes in child table, :code:`-1` is :code:`None`
+    """
+
+    def __init__(self, table: RecordTable) -> None:
+        self.table = table
+        self.values: array[int] = array("q")  # type: ignore[assignment]
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            self.values.append(-1)
+            return
+        self.values.append(len(self.table))
+        self.table.append(value)
+
+    def __getitem__(self, index: int) -> Any:
+        row = self.values[index]
+        return None if row < 0 else self.table[row]
+
+    def truncate(self, length: int) -> None:
+        rows = [row for row in self.values[length:] if row >= 0]
+        if rows:
+            self.table.truncate(rows[0])
+        del self.values[length:]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + self.table.nbytes
+
+
+class _ModelsColumn(_Column):
+    """
+    Lists of rows in child table, row :code:`i` owns rows
+    :code:`offsets[i]:offsets[i + 1]`, :code:`None` is marked in :attr:`nulls`
+    """
+
+    def __init__(self, table: RecordTable) -> None:
+        self.table = table
+        self.offsets: array[int] = array("q", [0])
+        self.nulls = bytearray()
+
+    def append(self, value: Any) -> None:
+        if value is not None:
+            self.table.extend(value)
+        self.offsets.append(len(self.table))
+        self.nulls.append(value is None)
+
+    def __getitem__(self, index: int) -> Any:
+        if self.nulls[index]:
+            return None
+        table = self.table
+        return tuple(table[row] for row in range(self.offsets[index], self.offsets[index + 1]))
+
+    def truncate(self, length: int) -> None:
+        self.table.truncate(self.offsets[length])
+        del self.offsets[length + 1 :]
+        del self.nulls[length:]
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.itemsize * len(self.offsets) + len(self.nulls) + self.table.nbytes
+
+
+class RecordTable:
+    def __init__(
+        self,
+        model: Type[DangerousObject],
+        interned: Iterable[str] = INTERNED_FIELDS,
+    ) -> None:
+        """
+        Struct-of-arrays storage of objects of the model
+
+        Numbers, booleans and datetimes are kept in typed arrays, strings of
+        :code:`interned` fields are dictionary-encoded, other values are kept in lists.
+        Rows are read back as records of :func:`compact_record` or as pydantic objects.
+
+        :param model: object class
+        :param interned: string fields stored as codes of distinct values
+        """
+        self.model = model
+        self.interned = frozenset(interned)
+        self.record_type = compact_record(model, self.interned)
+        self._length = 0
+        self.columns: Dict[str, _Column] = {}
+        for name, field in model.model_fields.items():
+            kind, nested_model = _field_kind(field.annotation)
+            self.columns[name] = self._column(name, kind, nested_model)
+
+    def _column(self, name: str, kind: str, nested_model: Any) -> _Column:
+        if kind == "model":
+            return _ModelColumn(RecordTable(nested_model, self.interned))
+        if kind == "models":
+            return _ModelsColumn(RecordTable(nested_model, self.interned))
+        if kind == "str" and name in self.interned:
+            return _DictionaryColumn()
+        if kind == "bool":
+            return _BoolColumn()
+        if kind == "int":
+            return _IntColumn()
+        if kind == "float":
+            return _FloatColumn()
+        if kind == "datetime":
+            return _DatetimeColumn()
+        return _Column()
+
+    @classmethod
+    def from_models(
+        cls,
+        model: Type[DangerousObject],
+        objects: Iterable[Any],
+        interned: Iterable[str] = INTERNED_FIELDS,
+    ) -> RecordTable:
+        """
+        Create table of objects
+
+        :param model: object class
+        :param objects: pydantic objects or records of the model
+        :param interned: string fields stored as codes of distinct values
+        """
+        table = cls(model, interned=interned)
+        table.extend(objects)
+        return table
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, obj: Any) -> None:
+        """
+        Add pydantic object or record of the model
+
+        When a value can't be stored, the row is not added and the error is raised
+        """
+        try:
+            for name, column in self.columns.items():
+                column.append(getattr(obj, name))
+        except BaseException:
+            self.truncate(self._length)
+            raise
+        self._length += 1
+
+    def truncate(self, length: int) -> None:
+        """
+        Remove rows starting from the index, along with their rows in child tables
+        """
+        length = min(length, self._length)
+        for column in self.columns.values():
+            column.truncate(length)
+        self._length = length
+
+    def extend(self, objects: Iterable[Any]) -> None:
+        for obj in objects:
+            self.append(obj)
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Table index out of range")
+        return index
+
+    def get(self, index: int, name: str) -> Any:
+        """
+        Get value of one field without building the whole row
+        """
+        return self.columns[name][self._index(index)]
+
+    def __getitem__(self, index: int) -> CompactRecord:
+        index = self._index(index)
+        record = self.record_type.__new__(self.record_type)
+        for name, column in self.columns.items():
+            setattr(record, name, column[index])
+        return record
+
+    def __iter__(self) -> Iterator[CompactRecord]:
+        for index in range(self._length):
+            yield self[index]
+
+    def to_model(self, index: int, client: Optional[Client] = None) -> DangerousObject:
+        """
+        Get row as pydantic object
+
+        :param index: row index
+        :param client: Client instance to bind object to
+        """
+        return self[index].to_model(client)
+
+    def to_models(self, client: Optional[Client] = None) -> List[DangerousObject]:
+        """
+        Get all rows as pydantic objects
+        """
+        return [record.to_model(client) for record in self]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate size of columns, without string objects of not interned fields
+        """
+        return sum(column.nbytes for column in self.columns.values())
+
+
+CompactGameProfile = compact_record(GameProfile)
+CompactUser = compact_record(User)
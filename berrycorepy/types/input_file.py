@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import io
+import mmap as _mmap
 import os
 from abc import ABC, abstractmethod
 from pathlib import Path
@@ -12,6 +12,11 @@ if TYPE_CHECKING:
     from berrycorepy.client.client import Client
 
 DEFAULT_CHUNK_SIZE = 64 * 1024  # 64 kb
+DEFAULT_RELAY_BUFFER_SIZE = 4 * 1024 * 1024
+DEFAULT_SEGMENT_SIZE = 1024 * 1024
+
+Buffer = Union[bytes, bytearray, memoryview, _mmap.mmap]
+Chunk = Union[bytes, memoryview]
 
 
 class InputFile(ABC):
@@ -33,16 +38,16 @@ class InputFile(ABC):
         self.chunk_size = chunk_size
 
     @abstractmethod
-    async def read(self, client: "Client") -> AsyncGenerator[bytes, None]:  # pragma: no cover
+    async def read(self, client: "Client") -> AsyncGenerator[Chunk, None]:  # pragma: no cover
         yield b""
 
 
 class BufferedInputFile(InputFile):
-    def __init__(self, file: bytes, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    def __init__(self, file: Buffer, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
         """
-        Represents object for uploading files from filesystem
+        Represents object for uploading files from memory
 
-        :param file: Bytes
+        :param file: Bytes or any other buffer, it's sent without copying
         :param filename: Filename to be propagated to telegram.
         :param chunk_size: Uploading chunk size
         """
@@ -56,6 +61,7 @@ class BufferedInputFile(InputFile):
         path: Union[str, Path],
         filename: Optional[str] = None,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
+        mmap: bool = False,
     ) -> BufferedInputFile:
         """
         Create buffer from file
@@ -64,18 +70,43 @@ class BufferedInputFile(InputFile):
         :param filename: Filename to be propagated to telegram.
             By default, will be parsed from path
         :param chunk_size: Uploading chunk size
+        :param mmap: Memory-map the file instead of reading it, so its pages are loaded
+            by OS on demand and don't count towards process memory.
+            The mapping is released by :meth:`close` or on exiting :code:`with` block
         :return: instance of :obj:`BufferedInputFile`
         """
         if filename is None:
             filename = os.path.basename(path)
+        data: Buffer = b""
         with open(path, "rb") as f:
-            data = f.read()
+            if not mmap:
+                data = f.read()
+            elif os.fstat(f.fileno()).st_size:  # empty file can't be mapped
+                data = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
         return cls(data, filename=filename, chunk_size=chunk_size)
 
-    async def read(self, client: "Client") -> AsyncGenerator[bytes, None]:
-        buffer = io.BytesIO(self.data)
-        while chunk := buffer.read(self.chunk_size):
-            yield chunk
+    def close(self) -> None:
+        """
+        Release memory-mapped file, other buffers are left as is
+        """
+        if isinstance(self.data, _mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> BufferedInputFile:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    async def read(self, client: "Client") -> AsyncGenerator[Chunk, None]:
+        view = memoryview(self.data).cast("B")
+        try:
+            for offset in range(0, len(view), self.chunk_size):
+                # Slices share the buffer, chunks are not copied
+                yield view[offset : offset + self.chunk_size]
+        finally:
+            # Mapped file can't be closed while views of it exist
+            view.release()
 
 
 class FSInputFile(InputFile):
@@ -114,6 +145,10 @@ class URLInputFile(InputFile):
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         timeout: int = 30,
         client: Optional["Client"] = None,
+        relay: bool = False,
+        buffer_size: int = DEFAULT_RELAY_BUFFER_SIZE,
+        segments: int = 1,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
     ):
         """
         Represents object for streaming files from internet
@@ -125,6 +160,13 @@ class URLInputFile(InputFile):
         :param timeout: Timeout for downloading
         :param client: Client instance to use HTTP session from.
                     If not specified, will be used current client
+        :param relay: download the file in background while it's uploaded,
+            instead of downloading next chunk only after the previous one is sent
+        :param buffer_size: relay mode only, maximum number of downloaded bytes
+            waiting for upload
+        :param segments: relay mode only, maximum number of simultaneous range requests,
+            used when the server supports ranges
+        :param segment_size: relay mode only, size of range requested at once
         """
         super().__init__(filename=filename, chunk_size=chunk_size)
         if headers is None:
@@ -134,9 +176,31 @@ class URLInputFile(InputFile):
         self.headers = headers
         self.timeout = timeout
         self.client = client
+        self.relay = relay
+        self.buffer_size = buffer_size
+        self.segments = segments
+        self.segment_size = segment_size
 
     async def read(self, client: "Client") -> AsyncGenerator[bytes, None]:
         client = self.client or client
+        if self.relay:
+            # Session layer is imported on use, types don't depend on it
+            from berrycorepy.client.session.relay import Relay
+
+            relay = Relay(
+                client.session,
+                url=self.url,
+                headers=self.headers,
+                timeout=self.timeout,
+                chunk_size=self.chunk_size,
+                buffer_size=self.buffer_size,
+                segments=self.segments,
+                segment_size=self.segment_size,
+            )
+            async for chunk in relay:
+                yield chunk
+            return
+
         stream = client.session.stream_content(
             url=self.url,
             headers=self.headers,
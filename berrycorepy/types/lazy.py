@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import types
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import Annotated
+
+from berrycorepy.types.base import DangerousObject
+
+if TYPE_CHECKING:
+    from berrycorepy.client.client import Client
+
+DangerousObjectType = TypeVar("DangerousObjectType", bound=DangerousObject)
+
+_FieldValidator = Callable[[Any, Optional["Client"]], Any]
+
+_ALLOWED_MODEL_VALIDATORS = frozenset({"remove_unset"})
+
+_lazy_types: Dict[Type[DangerousObject], Type[DangerousObject]] = {}
+_field_validators: Dict[Tuple[Type[DangerousObject], str], _FieldValidator] = {}
+
+
+def supports_lazy(model: Any) -> bool:
+    """
+    Check that fields of the model can be validated separately
+
+    Models with field validators or custom model validators need the whole object,
+    so they are always validated eagerly.
+    """
+    if not isinstance(model, type) or not issubclass(model, DangerousObject):
+        return False
+    decorators = model.__pydantic_decorators__
+    return not (
+        decorators.field_validators
+        or decorators.validators
+        or decorators.root_validators
+        or decorators.model_validators.keys() - _ALLOWED_MODEL_VALIDATORS
+    )
+
+
+def _optional_arg(annotation: Any) -> Any:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _lazy_item_type(annotation: Any) -> Optional[Type[DangerousObject]]:
+    annotation = _optional_arg(annotation)
+    if get_origin(annotation) in (list, List):
+        args = get_args(annotation)
+        if args and supports_lazy(args[0]):
+            return args[0]  # type: ignore[no-any-return]
+    return None
+
+
+def supports_lazy_result(annotation: Any) -> bool:
+    """
+    Check that result of the type can be validated lazily,
+    it's an object or a list of objects supporting it
+    """
+    return supports_lazy(_optional_arg(annotation)) or _lazy_item_type(annotation) is not None
+
+
+def lazy_validate(annotation: Any, value: Any, client: Optional[Client] = None) -> Any:
+    """
+    Build lazy result of the type from decoded JSON
+
+    :param annotation: returning type of the method
+    :param value: decoded JSON
+    :param client: Client instance to bind objects to
+    :return: lazy object, list of lazy objects,
+        or value validated eagerly when the type doesn't support lazy validation
+    """
+    target = _optional_arg(annotation)
+    if value is None:
+        return TypeAdapter(annotation).validate_python(value, context={"client": client})
+    if supports_lazy(target) and isinstance(value, dict):
+        return construct_lazy(target, value, client=client)
+    item_type = _lazy_item_type(annotation)
+    if item_type is not None and isinstance(value, list):
+        return [
+            construct_lazy(item_type, item, client=client) if isinstance(item, dict) else item
+            for item in value
+        ]
+    return TypeAdapter(annotation).validate_python(value, context={"client": client})
+
+
+def construct_lazy(
+    model: Type[DangerousObjectType], data: Dict[str, Any], client: Optional[Client] = None
+) -> DangerousObjectType:
+    """
+    Create object whose fields are validated on first access
+
+    :param model: object class
+    :param data: decoded JSON of the object
+    :param client: Client instance to bind object to
+    :return: instance of lazy subclass of the model
+    """
+    lazy_model = lazy_type(model)
+    names = _field_keys(model)
+    fields_set = {name for name, key in names.items() if key in data or name in data}
+    extra = None
+    if model.model_config.get("extra") == "allow":
+        known = set(names) | set(names.values())
+        extra = {key: value for key, value in data.items() if key not in known}
+        fields_set.update(extra)
+    elif model.model_config.get("extra") == "forbid":
+        known = set(names) | set(names.values())
+        if data.keys() - known:
+            # Let pydantic report unexpected fields
+            return model.model_validate(data, context={"client": client})
+
+    obj = lazy_model.__new__(lazy_model)
+    object.__setattr__(obj, "__dict__", {})
+    object.__setattr__(obj, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(obj, "__pydantic_extra__", extra)
+    object.__setattr__(obj, "__pydantic_private__", None)
+    object.__setattr__(obj, "__lazy_data__", data)
+    obj.model_post_init({"client": client})
+    return obj  # type: ignore[return-value]
+
+
+def materialize(obj: Any) -> Any:
+    """
+    Validate all fields of lazy object and its nested lazy objects
+
+    :return: the same object
+    """
+    if isinstance(obj, LazyObject):
+        obj._materialize()
+    elif isinstance(obj, list):
+        for item in obj:
+            materialize(item)
+    return obj
+
+
+@lru_cache(maxsize=None)
+def _field_keys(model: Type[DangerousObject]) -> Dict[str, str]:
+    keys = {}
+    for name, field in model.model_fields.items():
+        alias = field.validation_alias if isinstance(field.validation_alias, str) else None
+        keys[name] = alias or field.alias or name
+    return keys
+
+
+def _field_validator(model: Type[DangerousObject], name: str) -> _FieldValidator:
+    try:
+        return _field_validators[model, name]
+    except KeyError:
+        pass
+    field = model.model_fields[name]
+    annotation = field.annotation
+    adapter: TypeAdapter[Any] = TypeAdapter(
+        Annotated[(annotation, *field.metadata)] if field.metadata else annotation  # type: ignore
+    )
+    target = _optional_arg(annotation)
+    item_type = _lazy_item_type(annotation)
+
+    def validate(value: Any, client: Optional[Client]) -> Any:
+        if isinstance(value, dict) and supports_lazy(target):
+            return construct_lazy(target, value, client=client)
+        if isinstance(value, list) and item_type is not None:
+            return [
+                construct_lazy(item_type, item, client=client) if isinstance(item, dict)
+                # Anything else is invalid or already validated, pydantic decides
+                else adapter.validate_python([item], context={"client": client})[0]
+                for item in value
+            ]
+        return adapter.validate_python(value, context={"client": client})
+
+    _field_validators[model, name] = validate
+    return validate
+
+
+class LazyObject:
+    """
+    Mixin of lazy subclasses of :class:`berrycorepy.types.base.DangerousObject`
+
+    Decoded JSON is kept as is, each field is validated on first access and memoized.
+    Nested objects and lists of objects become lazy objects too.
+    Serialization, comparison and copying validate all remaining fields first,
+    so lazy object behaves as the eagerly validated one. Invalid field is reported
+    by :class:`pydantic.ValidationError` on its first access.
+    """
+
+    __slots__ = ()
+
+    if TYPE_CHECKING:
+        __lazy_data__: Optional[Dict[str, Any]]
+        __lazy_model__: Type[DangerousObject]
+
+    def __getattr__(self, item: str) -> Any:
+        model = self.__lazy_model__
+        if item in model.model_fields:
+            data = self._lazy_data()
+            if data is not None:
+                value = self._validate_field(model, item, data)
+                self.__dict__[item] = value
+                return value
+        return super().__getattr__(item)  # type: ignore[misc]
+
+    def _lazy_data(self) -> Optional[Dict[str, Any]]:
+        # Copies are made without __init__, so the slot may be left unset
+        try:
+            return object.__getattribute__(self, "__lazy_data__")  # type: ignore[no-any-return]
+        except AttributeError:
+            return None
+
+    def _validate_field(
+        self, model: Type[DangerousObject], name: str, data: Dict[str, Any]
+    ) -> Any:
+        field = model.model_fields[name]
+        key = _field_keys(model)[name]
+        if key in data:
+            value = data[key]
+        elif name in data:
+            value = data[name]
+        elif field.is_required():
+            # Let pydantic report missing field
+            model.model_validate(data)
+            raise AssertionError("unreachable")  # pragma: no cover
+        else:
+            return field.get_default(call_default_factory=True)
+        private = self.__pydantic_private__  # type: ignore[attr-defined]
+        client = private.get("_client") if private else None
+        return _field_validator(model, name)(value, client)
+
+    def _materialize(self) -> None:
+        model = self.__lazy_model__
+        fields = self.__dict__
+        if self._lazy_data() is not None:
+            for name in model.model_fields:
+                if name not in fields:
+                    getattr(self, name)
+            # Keep fields order of the model, it's visible in repr
+            ordered = {name: fields[name] for name in model.model_fields}
+            object.__setattr__(self, "__dict__", ordered)
+            object.__setattr__(self, "__lazy_data__", None)
+        for value in self.__dict__.values():
+            materialize(value)
+
+    def model_dump(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        self._materialize()
+        return super().model_dump(*args, **kwargs)  # type: ignore[misc, no-any-return]
+
+    def model_dump_json(self, *args: Any, **kwargs: Any) -> str:
+        self._materialize()
+        return super().model_dump_json(*args, **kwargs)  # type: ignore[misc, no-any-return]
+
+    def model_copy(self, *args: Any, **kwargs: Any) -> Any:
+        self._materialize()
+        return super().model_copy(*args, **kwargs)  # type: ignore[misc]
+
+    def __copy__(self) -> Any:
+        self._materialize()
+        return super().__copy__()  # type: ignore[misc]
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> Any:
+        self._materialize()
+        return super().__deepcopy__(memo)  # type: ignore[misc]
+
+    def __reduce__(self) -> Any:
+        # Lazy classes are created at runtime, so they are pickled as eager models
+        self._materialize()
+        return _restore, (self.__lazy_model__, super().__getstate__())  # type: ignore[misc]
+
+    def __iter__(self) -> Any:
+        self._materialize()
+        return super().__iter__()  # type: ignore[misc]
+
+    def __repr_name__(self) -> str:
+        return self.__lazy_model__.__name__
+
+    def __repr_args__(self) -> Any:
+        self._materialize()
+        return super().__repr_args__()  # type: ignore[misc]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        self._materialize()
+        materialize(other)
+        return (
+            self.__lazy_model__ is getattr(other, "__lazy_model__", type(other))
+            and self.__dict__ == other.__dict__
+            and self.__pydantic_extra__ == other.__pydantic_extra__  # type: ignore[attr-defined]
+            and self.__pydantic_private__  # type: ignore[attr-defined]
+            == other.__pydantic_private__  # type: ignore[attr-defined]
+        )
+
+    def __hash__(self) -> int:
+        self._materialize()
+        return super().__hash__()  # type: ignore[misc, no-any-return]
+
+
+def _restore(model: Type[BaseModel], state: Dict[str, Any]) -> BaseModel:
+    obj = model.__new__(model)
+    obj.__setstate__(state)
+    return obj
+
+
+def lazy_type(model: Type[DangerousObjectType]) -> Type[DangerousObjectType]:
+    """
+    Get lazy subclass of the model, it's created once per model
+    """
+    try:
+        return _lazy_types[model]  # type: ignore[return-value]
+    except KeyError:
+        pass
+    lazy_model = type(
+        f"Lazy{model.__name__}",
+        (LazyObject, model),
+        {
+            "__slots__": ("__lazy_data__",),
+            "__module__": model.__module__,
+            "__lazy_model__": model,
+        },
+    )
+    _lazy_types[model] = lazy_model
+    return lazy_model  # type: ignore[return-value]
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Tuple, Union
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.session.BaseSession import BaseSession
+from berrycorepy.methods.base import DangerousMethod, DangerousType
+
+USER: Dict[str, Any] = {
+    "id": 1,
+    "rate": 5,
+    "telegram_id": 7,
+    "name": "name",
+    "age": 30,
+    "sex": "m",
+    "country": "UA",
+    "is_deleted": False,
+    "is_premium": True,
+    "is_bot": False,
+    "create_at": "2024-01-01T00:00:00",
+    "game_profiles": [
+        {"id": i, "xbox": "x", "xuid": i, "uuid": "u", "create_at": "2024-01-02T00:00:00"}
+        for i in range(2)
+    ],
+}
+
+
+class MockedSession(BaseSession):
+    """
+    Session answering with queued responses instead of sending requests
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.responses: Deque[Tuple[int, Union[bytes, BaseException]]] = deque()
+        self.requests: List[DangerousMethod[Any]] = []
+        self.delay = 0.0
+        self.closed = False
+
+    def add_result(self, result: Any = None, **changes: Any) -> None:
+        """
+        Queue successful response, user payload with changes by default
+        """
+        if result is None:
+            result = {**USER, **changes}
+        self.add_response(200, {"ok": True, "result": result})
+
+    def add_error(self, status: int, description: str = "error", **fields: Any) -> None:
+        self.add_response(
+            status, {"ok": False, "error_code": status, "description": description, **fields}
+        )
+
+    def add_response(self, status: int, body: Union[bytes, Dict[str, Any]]) -> None:
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        self.responses.append((status, body))
+
+    def add_exception(self, error: BaseException) -> None:
+        self.responses.append((0, error))
+
+    async def make_request(
+        self,
+        client: Client,
+        method: DangerousMethod[DangerousType],
+        timeout: Optional[int] = None,
+    ) -> DangerousType:
+        self.requests.append(method)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        status, content = self.responses.popleft()
+        if isinstance(content, BaseException):
+            raise content
+        response = self.check_response(client, method, status, content)
+        return response.result  # type: ignore[return-value]
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:  # pragma: no cover
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class MockedClient(Client):
+    session: MockedSession
+
+    def __init__(self, token: str = "42:TEST", **kwargs: Any) -> None:
+        super().__init__(token, session=MockedSession(**kwargs))
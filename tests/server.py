@@ -0,0 +1,64 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from aiohttp import web
+
+from tests.mocked_session import USER
+
+
+@asynccontextmanager
+async def serve(app: web.Application) -> AsyncIterator[str]:
+    """
+    Run the application on a free local port
+
+    :return: base URL of the server
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+def content_range(request: web.Request, data: bytes) -> web.StreamResponse:
+    """
+    Answer GET and HEAD requests with the data, honouring single byte range
+    """
+    headers = {"Accept-Ranges": "bytes", "ETag": '"v1"'}
+    if request.http_range.start is None and request.http_range.stop is None:
+        return web.Response(body=data, headers=headers)
+    start, stop = request.http_range.start or 0, request.http_range.stop or len(data)
+    headers["Content-Range"] = f"bytes {start}-{stop - 1}/{len(data)}"
+    return web.Response(status=206, body=data[start:stop], headers=headers)
+
+
+def api_app(seen: List[Dict[str, Any]]) -> web.Application:
+    """
+    API stub answering every method with the user, received parameters are put into seen
+    """
+
+    async def handler(request: web.Request) -> web.Response:
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = {
+                # Uploaded files are read before the request is finished
+                key: value.file.read() if isinstance(value, web.FileField) else value
+                for key, value in (await request.post()).items()
+            }
+        method = request.match_info["method"]
+        seen.append({"method": method, "type": request.content_type, **params})
+        return web.json_response({"ok": True, "result": USER})
+
+    async def root(request: web.Request) -> web.Response:
+        # Empty answer to HEAD has no Content-Length, and the connection can't be reused
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_post("/client{token}/{method}", handler)
+    app.router.add_route("HEAD", "/", root)
+    return app
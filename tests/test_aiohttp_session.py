@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Dict, List
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from tests.server import api_app, serve
+
+
+def test_warm_up_and_pool_stats() -> None:
+    seen: List[Dict[str, Any]] = []
+
+    async def main() -> None:
+        async with serve(api_app(seen)) as base:
+            api = DangerousAPIServer.from_base(base)
+            session = AiohttpSession(api=api, warmup_connections=3)
+            async with session:
+                stats = session.pool_stats()
+                assert stats["created"] == 3
+                assert stats["idle"] == stats["open"] == 3
+                async with Client("42:TEST", session=session) as client:
+                    await client.get_me()
+                    await client.get_me()
+                stats = session.pool_stats()
+                assert stats["created"] == 3
+                assert stats["reused"] == 2
+                assert stats["in_use"] == 0
+            assert session.pool_stats()["open"] == 0
+            assert await session.warm_up(1) == 1
+            await session.close()
+
+    asyncio.run(main())
+
+
+def test_idle_connections_are_reaped() -> None:
+    seen: List[Dict[str, Any]] = []
+
+    async def main() -> None:
+        async with serve(api_app(seen)) as base:
+            session = AiohttpSession(api=DangerousAPIServer.from_base(base), idle_timeout=0.1)
+            async with Client("42:TEST", session=session) as client:
+                await client.get_me()
+                assert session.pool_stats()["open"] == 1
+                await asyncio.sleep(0.3)
+                assert session.pool_stats()["open"] == 0
+                await client.get_me()
+
+    asyncio.run(main())
+    assert len(seen) == 2
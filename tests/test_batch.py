@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, AsyncIterator, Optional
+
+from berrycorepy.exceptions import DangerousServerError
+from berrycorepy.methods import GetChat
+from berrycorepy.methods.base import DangerousMethod, DangerousType
+from tests.mocked_session import USER, MockedClient, MockedSession
+
+
+class EchoSession(MockedSession):
+    """
+    Session answering with the requested chat id, chat 0 fails
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.active = 0
+        self.max_active = 0
+
+    async def make_request(
+        self,
+        client: Any,
+        method: DangerousMethod[DangerousType],
+        timeout: Optional[int] = None,
+    ) -> DangerousType:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            chat_id = method.chat_id  # type: ignore[attr-defined]
+            # Later chats are answered faster
+            await asyncio.sleep(0.001 * (10 - chat_id % 10))
+            if chat_id == 0:
+                self.add_error(500)
+            else:
+                self.add_result({**USER, "id": chat_id})
+            return await super().make_request(client, method, timeout)
+        finally:
+            self.active -= 1
+
+
+def echo_client() -> MockedClient:
+    client = MockedClient()
+    client.session = EchoSession()
+    return client
+
+
+def test_gather_keeps_order_and_collects_errors() -> None:
+    client = echo_client()
+    results = asyncio.run(
+        client.gather([GetChat(chat_id=i) for i in range(20)], concurrency=4)
+    )
+    assert isinstance(results[0], DangerousServerError)
+    assert [user.id for user in results[1:]] == list(range(1, 20))
+    assert client.session.max_active == 4
+
+
+def test_map_unordered_with_async_source() -> None:
+    client = echo_client()
+
+    async def methods() -> AsyncIterator[GetChat]:
+        for i in range(1, 10):
+            yield GetChat(chat_id=i)
+
+    async def main() -> None:
+        results = [item async for item in client.map(methods(), concurrency=9, ordered=False)]
+        assert all(item.ok for item in results)
+        assert sorted(item.index for item in results) == list(range(9))
+        # Faster answers come first
+        assert results[0].unwrap().id == 9
+
+    asyncio.run(main())
+
+
+def test_map_stops_pending_calls_when_abandoned() -> None:
+    client = echo_client()
+
+    async def main() -> None:
+        batch = client.map((GetChat(chat_id=i) for i in range(1, 1000)), concurrency=5)
+        async for item in batch:
+            assert item.unwrap().id == 1
+            break
+        await batch.aclose()  # type: ignore[attr-defined]
+        await asyncio.sleep(0.02)
+        assert client.session.active == 0
+
+    asyncio.run(main())
+    assert len(client.session.requests) < 10
+
+
+def test_map_unordered_abandoned_closes_source() -> None:
+    client = echo_client()
+    closed = []
+
+    async def methods() -> AsyncIterator[GetChat]:
+        try:
+            for i in range(1, 1000):
+                yield GetChat(chat_id=i)
+        finally:
+            closed.append(True)
+
+    async def main() -> None:
+        batch = client.map(methods(), concurrency=5, ordered=False)
+        async for item in batch:
+            assert item.ok
+            break
+        await batch.aclose()  # type: ignore[attr-defined]
+        # Cancelled calls are finished before aclose() returns
+        assert client.session.active == 0
+        assert closed == [True]
+
+    asyncio.run(main())
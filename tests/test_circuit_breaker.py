@@ -0,0 +1,178 @@
+import asyncio
+import socket
+from typing import Any, Dict, List
+
+import pytest
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer, DangerousAPIServerPool
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.middlewares.circuit_breaker import (
+    Circuit,
+    CircuitBreaker,
+    CircuitState,
+)
+from berrycorepy.exceptions import DangerousBadRequest, DangerousCircuitOpen, DangerousServerError
+from tests.mocked_session import MockedClient
+from tests.server import api_app, serve
+
+
+def make_circuit(**kwargs: Any) -> Circuit:
+    params = dict(
+        failure_rate=0.5,
+        slow_call_rate=1.0,
+        slow_call_duration=10.0,
+        window=30.0,
+        min_calls=2,
+        recovery_timeout=5.0,
+        half_open_calls=1,
+    )
+    params.update(kwargs)
+    return Circuit(**params)  # type: ignore[arg-type]
+
+
+def open_circuit(circuit: Circuit, now: float = 0.0) -> None:
+    for _ in range(circuit.min_calls):
+        generation = circuit.allow(now)
+        assert generation is not None
+        circuit.record(now, generation, failed=True, duration=0.1)
+    assert circuit.state is CircuitState.OPEN
+
+
+def test_circuit_opens_and_recovers() -> None:
+    circuit = make_circuit()
+    open_circuit(circuit)
+    assert circuit.allow(1.0) is None
+    assert circuit.retry_in(1.0) == 4.0
+
+    probe = circuit.allow(5.0)
+    assert probe is not None
+    assert circuit.state is CircuitState.HALF_OPEN
+    assert circuit.allow(5.0) is None
+    circuit.record(5.5, probe, failed=False, duration=0.5)
+    assert circuit.state is CircuitState.CLOSED
+
+
+def test_failed_probe_reopens() -> None:
+    circuit = make_circuit()
+    open_circuit(circuit)
+    probe = circuit.allow(5.0)
+    assert probe is not None
+    circuit.record(5.5, probe, failed=True, duration=0.5)
+    assert circuit.state is CircuitState.OPEN
+    assert circuit.retry_in(5.5) == 5.0
+
+
+def test_slow_probe_reopens() -> None:
+    circuit = make_circuit(slow_call_duration=1.0)
+    open_circuit(circuit)
+    probe = circuit.allow(5.0)
+    assert probe is not None
+    circuit.record(7.0, probe, failed=False, duration=2.0)
+    assert circuit.state is CircuitState.OPEN
+
+
+def test_late_responses_are_ignored() -> None:
+    circuit = make_circuit()
+    late = circuit.allow(0.0)
+    assert late is not None
+    open_circuit(circuit)
+    probe = circuit.allow(5.0)
+    assert probe is not None
+
+    # Request sent before the circuit opened can't close it
+    circuit.record(5.1, late, failed=False, duration=5.1)
+    assert circuit.state is CircuitState.HALF_OPEN
+    circuit.cancel_trial(late)
+    assert circuit.allow(5.1) is None
+
+    circuit.record(5.2, probe, failed=False, duration=0.2)
+    assert circuit.state is CircuitState.CLOSED
+    # ...and can't open it again either
+    circuit.record(5.3, late, failed=True, duration=5.3)
+    circuit.record(5.3, late, failed=True, duration=5.3)
+    assert circuit.state is CircuitState.CLOSED
+
+
+def test_cancelled_probe_frees_slot() -> None:
+    circuit = make_circuit()
+    open_circuit(circuit)
+    probe = circuit.allow(5.0)
+    assert probe is not None
+    circuit.cancel_trial(probe)
+    assert circuit.allow(5.0) is not None
+
+
+def test_rate_below_threshold_keeps_closed() -> None:
+    circuit = make_circuit(min_calls=4)
+    for failed in (True, False, False, False, True):
+        generation = circuit.allow(0.0)
+        assert generation is not None
+        circuit.record(0.0, generation, failed=failed, duration=0.1)
+    assert circuit.state is CircuitState.CLOSED
+
+
+def test_breaker_counts_html_server_errors() -> None:
+    client = MockedClient()
+    breaker = CircuitBreaker(min_calls=2, recovery_timeout=0.1, half_open_calls=1)
+    client.session.middleware(breaker)
+    client.session.add_response(502, b"<html>Bad Gateway</html>")
+    client.session.add_response(503, b"<html>Unavailable</html>")
+
+    async def main() -> None:
+        for _ in range(2):
+            with pytest.raises(DangerousServerError):
+                await client.get_me()
+        with pytest.raises(DangerousCircuitOpen, match="next probe in 0.1 seconds"):
+            await client.get_me()
+        assert len(client.session.requests) == 2
+
+        await asyncio.sleep(0.1)
+        client.session.delay = 0.05
+        client.session.add_result()
+        probe = asyncio.ensure_future(client.get_me())
+        await asyncio.sleep(0.01)
+        with pytest.raises(DangerousCircuitOpen, match="waiting for trial requests") as error:
+            await client.get_me()
+        assert error.value.retry_in == 0.0
+        await probe
+        assert breaker.states() == {client.session.api: CircuitState.CLOSED}
+
+    asyncio.run(main())
+
+
+def test_breaker_api_errors_are_successes() -> None:
+    client = MockedClient()
+    client.session.middleware(CircuitBreaker(min_calls=2))
+    for _ in range(3):
+        client.session.add_error(400)
+
+    async def main() -> None:
+        for _ in range(3):
+            with pytest.raises(DangerousBadRequest):
+                await client.get_me()
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 3
+
+
+def test_mirror_failures_are_handled_by_pool() -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead = DangerousAPIServer.from_base(f"http://127.0.0.1:{sock.getsockname()[1]}")
+    breaker = CircuitBreaker(min_calls=2, failure_rate=0.5)
+    seen: List[Dict[str, Any]] = []
+
+    async def main() -> None:
+        async with serve(api_app(seen)) as base:
+            pool = DangerousAPIServerPool([dead, DangerousAPIServer.from_base(base)])
+            session = AiohttpSession(api=pool)
+            session.middleware(breaker)
+            async with Client("42:TEST", session=session) as client:
+                for _ in range(4):
+                    await client.get_me()
+            # Dead mirror is failed over, so the circuit of the pool stays closed
+            assert breaker.states() == {pool: CircuitState.CLOSED}
+
+    asyncio.run(main())
+    assert len(seen) == 4
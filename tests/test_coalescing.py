@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from berrycorepy.client.session.middlewares.coalescing import RequestCoalescing
+from berrycorepy.exceptions import DangerousServerError
+from berrycorepy.methods import GetChat, GetMe
+from tests.mocked_session import MockedClient
+
+
+def coalescing_client() -> MockedClient:
+    client = MockedClient()
+    client.session.middleware(RequestCoalescing())
+    client.session.delay = 0.01
+    return client
+
+
+def test_identical_calls_share_request() -> None:
+    client = coalescing_client()
+    client.session.add_result(name="shared")
+    client.session.add_result(name="other")
+
+    async def main() -> None:
+        results = await asyncio.gather(
+            client.get_me(), client.get_me(), client.get_me(), client(GetChat(chat_id=1))
+        )
+        assert [user.name for user in results] == ["shared"] * 3 + ["other"]
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 2
+
+
+def test_error_is_shared_and_not_remembered() -> None:
+    client = coalescing_client()
+    client.session.add_error(500)
+    client.session.add_result()
+    middleware = client.session.middleware[0]
+
+    async def main() -> None:
+        results = await asyncio.gather(client.get_me(), client.get_me(), return_exceptions=True)
+        assert all(isinstance(result, DangerousServerError) for result in results)
+        assert middleware.in_flight == 0
+        await client.get_me()
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 2
+
+
+def test_cancelled_caller_does_not_cancel_others() -> None:
+    client = coalescing_client()
+    client.session.add_result(name="shared")
+
+    async def main() -> None:
+        first = asyncio.ensure_future(client.get_me())
+        second = asyncio.ensure_future(client.get_me())
+        await asyncio.sleep(0)
+        first.cancel()
+        assert (await second).name == "shared"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 1
+
+
+def test_other_methods_are_not_coalesced() -> None:
+    client = MockedClient()
+    client.session.middleware(RequestCoalescing(methods=[GetChat]))
+    client.session.delay = 0.01
+    client.session.add_result()
+    client.session.add_result()
+
+    async def main() -> None:
+        await asyncio.gather(client(GetMe()), client(GetMe()))
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 2
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from berrycorepy.types.base import DangerousObject
+from berrycorepy.types.compact import CompactUser, RecordTable, compact_record
+from berrycorepy.types.GameProfile import GameProfile
+from berrycorepy.types.User import User
+
+
+class Item(DangerousObject):
+    id: Optional[int]
+    price: Optional[float]
+    active: Optional[bool]
+    seen: Optional[datetime]
+    country: Optional[str]
+    note: Optional[str]
+    tags: Optional[List[str]]
+    owner: Optional[GameProfile]
+    profiles: Optional[List[GameProfile]]
+
+
+PROFILE: Dict[str, Any] = {
+    "id": 1,
+    "xbox": "gamer",
+    "xuid": 2_535_000_000_000_000,
+    "uuid": "u",
+    "create_at": "2024-01-02T00:00:00",
+}
+ITEM: Dict[str, Any] = {
+    "id": 1,
+    "price": 1.5,
+    "active": True,
+    "seen": "2024-01-01T12:00:00+03:00",
+    "country": "UA",
+    "note": "note",
+    "tags": ["a", "b"],
+    "owner": PROFILE,
+    "profiles": [PROFILE, {**PROFILE, "id": 2}],
+}
+USER: Dict[str, Any] = {
+    "id": 1,
+    "rate": 5,
+    "telegram_id": 7,
+    "name": "name",
+    "age": 30,
+    "sex": "m",
+    "country": "UA",
+    "is_deleted": False,
+    "is_premium": True,
+    "is_bot": False,
+    "create_at": "2024-01-01T00:00:00",
+    "game_profiles": [PROFILE],
+}
+
+ITEMS = [
+    Item.model_validate(ITEM),
+    Item.model_validate({name: None for name in ITEM}),
+    Item.model_validate({**ITEM, "profiles": [], "tags": []}),
+    Item.model_validate({**ITEM, "seen": "2024-06-01T00:00:00", "owner": None}),
+]
+
+
+@pytest.mark.parametrize("item", ITEMS)
+def test_table_round_trip(item: Item) -> None:
+    table = RecordTable.from_models(Item, [ITEMS[0], item, ITEMS[0]])
+    assert table.to_model(1) == item
+    assert table.to_model(1).model_dump() == item.model_dump()
+    assert table.to_models() == [ITEMS[0], item, ITEMS[0]]
+
+
+@pytest.mark.parametrize("item", ITEMS)
+def test_record_round_trip(item: Item) -> None:
+    record = compact_record(Item).from_model(item)
+    assert record.to_model() == item
+    assert compact_record(Item).from_model(record.to_model()) == record
+
+
+def test_none_and_empty_lists_differ() -> None:
+    table = RecordTable.from_models(Item, ITEMS)
+    assert table.get(1, "profiles") is None
+    assert table.get(2, "profiles") == ()
+    assert table.to_model(1).profiles is None
+    assert table.to_model(2).profiles == []
+    assert table.get(1, "tags") is None
+    assert table.get(2, "tags") == []
+
+
+def test_aware_datetime_keeps_instant() -> None:
+    table = RecordTable.from_models(Item, ITEMS)
+    seen = table.get(0, "seen")
+    assert seen == datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    assert seen.utcoffset() == timedelta(0)
+    assert table.get(3, "seen").tzinfo is None
+
+
+def test_large_ints_are_kept() -> None:
+    big = Item.model_validate({**ITEM, "id": 2**70, "owner": {**PROFILE, "xuid": -(2**80)}})
+    table = RecordTable.from_models(Item, [ITEMS[0], big, ITEMS[1]])
+    assert table.to_models() == [ITEMS[0], big, ITEMS[1]]
+
+
+def test_failed_append_keeps_columns_aligned() -> None:
+    table = RecordTable.from_models(Item, ITEMS[:2])
+    broken = compact_record(Item).from_model(ITEMS[0])
+    broken.profiles = (
+        compact_record(GameProfile).from_model(GameProfile.model_validate(PROFILE)),
+        object(),
+    )
+    with pytest.raises(AttributeError):
+        table.append(broken)
+    broken.profiles = ()
+    broken.seen = "not a datetime"
+    with pytest.raises(AttributeError):
+        table.append(broken)
+    assert len(table) == 2
+    assert len(table.columns["profiles"].table) == 2  # type: ignore[attr-defined]
+    assert len(table.columns["owner"].table) == 1  # type: ignore[attr-defined]
+    table.append(ITEMS[2])
+    assert table.to_models() == ITEMS[:3]
+
+
+def test_users() -> None:
+    user = User.model_validate(USER)
+    record = CompactUser.from_model(user)
+    assert record.to_model() == user
+    assert record.as_dict()["game_profiles"][0]["xuid"] == PROFILE["xuid"]
+    table = RecordTable.from_models(User, [user, user])
+    assert table[1] == record
+    assert table.to_model(-1) == user
+    with pytest.raises(IndexError):
+        table[2]
@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+from typing import Any, Callable, List
+
+import pytest
+from aiohttp import web
+
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.compression import Compression
+from berrycorepy.client.session.streams import StreamsSession
+from tests.server import content_range, serve
+
+DATA = b"0123456789" * 1000
+SESSIONS: List[Callable[..., Any]] = [AiohttpSession, StreamsSession]
+
+
+def make_app(seen: List[List[str]]) -> web.Application:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        seen.append(request.headers.getall("Accept-Encoding", []))
+        if "Range" not in request.headers and "gzip" in request.headers.get(
+            "Accept-Encoding", ""
+        ):
+            return web.Response(body=gzip.compress(DATA), headers={"Content-Encoding": "gzip"})
+        return content_range(request, DATA)
+
+    app = web.Application()
+    app.router.add_get("/file", handler)
+    return app
+
+
+def fetch(session_factory: Callable[..., Any], headers: Any) -> Any:
+    seen: List[List[str]] = []
+
+    async def main() -> Any:
+        session = session_factory(compression=Compression(encodings=("gzip",)))
+        try:
+            async with serve(make_app(seen)) as base:
+                async with session.open_content(f"{base}/file", headers=headers) as (
+                    status,
+                    _,
+                    chunks,
+                ):
+                    return status, b"".join([chunk async for chunk in chunks])
+        finally:
+            await session.close()
+
+    status, body = asyncio.run(main())
+    return status, body, seen
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+@pytest.mark.parametrize("range_header", ["Range", "range", "RANGE"])
+def test_range_requests_identity(session_factory: Callable[..., Any], range_header: str) -> None:
+    status, body, seen = fetch(session_factory, {range_header: "bytes=10-19"})
+    assert status == 206
+    assert body == DATA[10:20]
+    assert seen == [["identity"]]
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_range_overrides_accept_encoding(session_factory: Callable[..., Any]) -> None:
+    status, body, seen = fetch(
+        session_factory, {"range": "bytes=0-9", "accept-encoding": "gzip"}
+    )
+    assert (status, body) == (206, DATA[:10])
+    assert seen == [["identity"]]
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_content_is_decompressed(session_factory: Callable[..., Any]) -> None:
+    status, body, seen = fetch(session_factory, None)
+    assert (status, body) == (200, DATA)
+    assert seen == [["gzip"]]
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_probe_asks_for_identity(session_factory: Callable[..., Any]) -> None:
+    seen: List[List[str]] = []
+
+    async def main() -> Any:
+        session = session_factory(compression=Compression(encodings=("gzip",)))
+        try:
+            async with serve(make_app(seen)) as base:
+                return await session.probe_content(f"{base}/file")
+        finally:
+            await session.close()
+
+    info = asyncio.run(main())
+    assert info.size == len(DATA)
+    assert info.accept_ranges
+    assert all(values == ["identity"] for values in seen)
@@ -0,0 +1,203 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+from aiohttp import web
+
+from berrycorepy.client import download
+from berrycorepy.client.download import Downloader
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.streams import StreamsSession
+from berrycorepy.exceptions import ClientDownloadError
+from tests.server import content_range, serve
+
+DATA = bytes(range(256)) * 1024
+SESSIONS: List[Callable[[], Any]] = [AiohttpSession, StreamsSession]
+
+
+def run_download(
+    session_factory: Callable[[], Any],
+    make_app: Callable[[], web.Application],
+    path: Path,
+    name: str = "file",
+    **kwargs: Any,
+) -> Any:
+    async def main() -> Any:
+        session = session_factory()
+        try:
+            async with serve(make_app()) as base:
+                downloader = Downloader(session, **{"chunk_size": 65536, "retries": 0, **kwargs})
+                return await downloader.download(f"{base}/{name}", path)
+        finally:
+            await session.close()
+
+    return asyncio.run(main())
+
+
+def ranged_app(
+    requests: List[str], fail: Optional[Dict[str, int]] = None
+) -> Callable[[], web.Application]:
+    fail = fail if fail is not None else {}
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        range_header = request.headers.get("Range", "")
+        if request.method == "GET":
+            requests.append(range_header)
+        if fail.get(range_header, 0):
+            fail[range_header] -= 1
+            raise web.HTTPInternalServerError()
+        return content_range(request, DATA)
+
+    return lambda: make_app(handler)
+
+
+def make_app(handler: Callable[[web.Request], Any]) -> web.Application:
+    app = web.Application()
+    app.router.add_get("/file", handler)
+    return app
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_range_download(session_factory: Callable[[], Any], tmp_path: Path) -> None:
+    requests: List[str] = []
+    result = run_download(session_factory, ranged_app(requests), tmp_path / "file")
+    assert (tmp_path / "file").read_bytes() == DATA
+    assert result.chunks == len(DATA) // 65536
+    assert "bytes=65536-131071" in requests
+    assert not list(tmp_path.glob("*.part*"))
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_resume_download(session_factory: Callable[[], Any], tmp_path: Path) -> None:
+    requests: List[str] = []
+    destination = tmp_path / "file"
+
+    async def main() -> Any:
+        session = session_factory()
+        try:
+            app = ranged_app(requests, fail={"bytes=131072-196607": 1})()
+            async with serve(app) as base:
+                downloader = Downloader(session, chunk_size=65536, concurrency=1, retries=0)
+                with pytest.raises(ClientDownloadError, match="HTTP 500"):
+                    await downloader.download(f"{base}/file", destination)
+                assert not destination.exists()
+                requests.clear()
+                return await downloader.download(f"{base}/file", destination)
+        finally:
+            await session.close()
+
+    result = asyncio.run(main())
+    assert destination.read_bytes() == DATA
+    # Only the failed chunk and chunks after it are requested again
+    assert [r for r in requests if r != "bytes=0-0"] == [
+        f"bytes={start}-{start + 65535}" for start in range(131072, len(DATA), 65536)
+    ]
+    assert result.resumed == 131072
+
+
+def test_state_saves_are_debounced(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    saved: List[Dict[str, Any]] = []
+    write_state = download._write_state
+
+    def record(path: Path, data: str) -> None:
+        saved.append(json.loads(data))
+        write_state(path, data)
+
+    monkeypatch.setattr(download, "_write_state", record)
+    app = ranged_app([], fail={"bytes=196608-262143": 1})
+    with pytest.raises(ClientDownloadError, match="HTTP 500"):
+        run_download(AiohttpSession, app, tmp_path / "file", concurrency=1, save_delay=10)
+    # Initial state and the final one, not a rewrite per chunk
+    assert [state["done"] for state in saved] == [[], [0, 1, 2]]
+    state = json.loads((tmp_path / "file.part.json").read_text())
+    assert state["done"] == [0, 1, 2]
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_unreachable_server_is_download_error(
+    session_factory: Callable[[], Any], tmp_path: Path
+) -> None:
+    async def main() -> None:
+        session = session_factory()
+        try:
+            async with serve(ranged_app([])()) as base:
+                pass
+            await Downloader(session, timeout=1).download(f"{base}/file", tmp_path / "file")
+        finally:
+            await session.close()
+
+    with pytest.raises(ClientDownloadError):
+        asyncio.run(main())
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_ignored_range_is_not_written(
+    session_factory: Callable[[], Any], tmp_path: Path
+) -> None:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        if request.headers.get("Range") == "bytes=0-0":
+            return content_range(request, DATA)
+        # Advertises ranges, but sends the whole file from the start
+        return web.Response(body=DATA, headers={"Accept-Ranges": "bytes"})
+
+    with pytest.raises(ClientDownloadError, match="got HTTP 200"):
+        run_download(session_factory, lambda: make_app(handler), tmp_path / "file")
+    state = json.loads((tmp_path / "file.part.json").read_text())
+    assert state["done"] == []
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_timeout_limits_reads(session_factory: Callable[[], Any], tmp_path: Path) -> None:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        if request.method == "HEAD":
+            return web.Response(body=b"x" * 8)
+        response = web.StreamResponse()
+        response.content_length = 8
+        await response.prepare(request)
+        for _ in range(8):
+            await asyncio.sleep(0.2)
+            await response.write(b"x")
+        return response
+
+    # Whole download takes longer than timeout, but each read doesn't
+    result = run_download(
+        session_factory, lambda: make_app(handler), tmp_path / "file", timeout=1
+    )
+    assert result.size == 8
+    assert (tmp_path / "file").read_bytes() == b"x" * 8
+
+
+@pytest.mark.parametrize("session_factory", SESSIONS)
+def test_stalled_read_is_download_error(
+    session_factory: Callable[[], Any], tmp_path: Path
+) -> None:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        if request.method == "HEAD":
+            return web.Response(body=b"x" * 8)
+        response = web.StreamResponse()
+        response.content_length = 8
+        await response.prepare(request)
+        await response.write(b"x")
+        await asyncio.sleep(2)
+        return response
+
+    with pytest.raises(ClientDownloadError, match="Timeout"):
+        run_download(
+            session_factory, lambda: make_app(handler), tmp_path / "file", timeout=0.5
+        )
+
+
+def test_checksum_mismatch(tmp_path: Path) -> None:
+    async def main() -> None:
+        session = AiohttpSession()
+        try:
+            async with serve(ranged_app([])()) as base:
+                downloader = Downloader(session, chunk_size=65536)
+                await downloader.download(f"{base}/file", tmp_path / "a", checksum="00")
+        finally:
+            await session.close()
+
+    with pytest.raises(ClientDownloadError, match="checksum mismatch"):
+        asyncio.run(main())
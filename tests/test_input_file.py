@@ -0,0 +1,76 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer
+from berrycorepy.client.session.streams import StreamsSession
+from berrycorepy.methods import GetChat
+from berrycorepy.types.input_file import BufferedInputFile, FSInputFile
+from tests.server import api_app, serve
+
+DATA = bytes(range(256)) * 1000
+
+
+async def read_all(file: Any) -> List[bytes]:
+    return [chunk async for chunk in file.read(None)]
+
+
+@pytest.fixture()
+def path(tmp_path: Path) -> Path:
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    return path
+
+
+def test_buffered_read_yields_views() -> None:
+    data = bytearray(DATA)
+    chunks = asyncio.run(read_all(BufferedInputFile(data, "a", chunk_size=1000)))
+    # Chunks are slices of the buffer, not copies
+    assert all(type(chunk) is memoryview and chunk.obj is data for chunk in chunks)
+    assert b"".join(chunks) == DATA
+    assert len(chunks) == 256
+
+
+def test_streams_session_uploads_views(path: Path) -> None:
+    seen: List[Dict[str, Any]] = []
+
+    async def main() -> None:
+        async with serve(api_app(seen)) as base:
+            session = StreamsSession(api=DangerousAPIServer.from_base(base))
+            async with Client("42:TEST", session=session) as client:
+                with BufferedInputFile.from_file(path, chunk_size=4096, mmap=True) as file:
+                    method = GetChat(chat_id=5)
+                    object.__setattr__(method, "chat_id", file)
+                    await client(method)
+
+    asyncio.run(main())
+    params = seen[0]
+    assert params[params["chat_id"][len("attach://") :]] == DATA
+
+
+def test_from_file_reads_bytes(path: Path) -> None:
+    file = BufferedInputFile.from_file(path)
+    assert file.data == DATA
+    assert isinstance(file.data, bytes)
+    assert file.filename == "data.bin"
+
+
+def test_from_file_mmap_is_closed(path: Path) -> None:
+    with BufferedInputFile.from_file(path, filename="b", mmap=True) as file:
+        assert not isinstance(file.data, bytes)
+        assert b"".join(asyncio.run(read_all(file))) == DATA
+        mapping = file.data
+    assert mapping.closed  # type: ignore[union-attr]
+
+
+def test_from_file_mmap_empty(tmp_path: Path) -> None:
+    (tmp_path / "empty").write_bytes(b"")
+    with BufferedInputFile.from_file(tmp_path / "empty", mmap=True) as file:
+        assert asyncio.run(read_all(file)) == []
+
+
+def test_fs_read(path: Path) -> None:
+    assert b"".join(asyncio.run(read_all(FSInputFile(path, chunk_size=4096)))) == DATA
@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.methods import GetChat
+from berrycorepy.types.input_file import BufferedInputFile
+from tests.mocked_session import USER, MockedClient
+from tests.server import api_app, serve
+
+
+def test_json_body() -> None:
+    client = MockedClient()
+    session = client.session
+    assert json.loads(session.build_json_body(client, GetChat(chat_id=5))) == {"chat_id": 5}
+    assert json.loads(session.build_json_body(client, GetChat(chat_id="@name"))) == {
+        "chat_id": "@name"
+    }
+    files: dict = {}
+    prepared = session.prepare_value(
+        {"when": datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc), "skip": None},
+        client=client,
+        files=files,
+        _dumps_json=False,
+    )
+    assert prepared == {"when": "1704067200"}
+    attached = session.prepare_value(BufferedInputFile(b"", "a"), client=client, files=files)
+    assert attached.startswith("attach://")
+    assert len(files) == 1
+
+
+@pytest.mark.parametrize("json_body", [False, True])
+def test_request_body(json_body: bool) -> None:
+    seen: List[Dict[str, Any]] = []
+
+    async def main() -> None:
+        async with serve(api_app(seen)) as base:
+            session = AiohttpSession(api=DangerousAPIServer.from_base(base), json_body=json_body)
+            async with Client("42:TEST", session=session) as client:
+                assert (await client(GetChat(chat_id=5))).name == USER["name"]
+
+    asyncio.run(main())
+    if json_body:
+        assert seen == [{"method": "getUser", "type": "application/json", "chat_id": 5}]
+    else:
+        form = "application/x-www-form-urlencoded"
+        assert seen == [{"method": "getUser", "type": form, "chat_id": "5"}]
+
+
+def test_json_body_with_files_is_multipart() -> None:
+    session = AiohttpSession(json_body=True)
+    client = Client("42:TEST", session=session)
+    method = GetChat(chat_id=5)
+    assert session.build_request_body(client, method)[1] == {"Content-Type": "application/json"}
+    object.__setattr__(method, "chat_id", BufferedInputFile(b"data", "file"))
+    body, headers = session.build_request_body(client, method)
+    assert headers == {}
+    assert type(body).__name__ == "FormData"
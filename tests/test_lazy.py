@@ -0,0 +1,95 @@
+import copy
+import pickle
+from typing import Any, Callable, Dict, List
+
+import pytest
+from pydantic import ValidationError
+
+from berrycorepy.types.lazy import LazyObject, lazy_validate, materialize
+from berrycorepy.types.User import User
+
+RAW: Dict[str, Any] = {
+    "id": 1,
+    "rate": 5,
+    "telegram_id": 7,
+    "name": "name",
+    "age": 30,
+    "sex": "m",
+    "country": "UA",
+    "is_deleted": False,
+    "is_premium": True,
+    "is_bot": False,
+    "create_at": "2024-01-01T00:00:00",
+    "game_profiles": [
+        {"id": i, "xbox": "x", "xuid": i, "uuid": "u", "create_at": "2024-01-02T00:00:00"}
+        for i in range(3)
+    ],
+}
+
+COPIES: List[Callable[[Any], Any]] = [
+    copy.copy,
+    copy.deepcopy,
+    lambda obj: obj.model_copy(),
+    lambda obj: obj.model_copy(deep=True),
+    lambda obj: pickle.loads(pickle.dumps(obj)),
+]
+
+
+def test_fields_are_validated_on_access() -> None:
+    user = lazy_validate(User, RAW)
+    assert isinstance(user, LazyObject)
+    assert isinstance(user, User)
+    assert "create_at" not in user.__dict__
+    assert user.create_at.year == 2024
+    assert "create_at" in user.__dict__
+    assert isinstance(user.game_profiles[0], LazyObject)
+
+
+def test_invalid_field_is_reported_on_access() -> None:
+    user = lazy_validate(User, {**RAW, "age": "old"})
+    assert user.id == 1
+    with pytest.raises(ValidationError):
+        user.age
+
+
+def test_matches_eager_model() -> None:
+    eager = User.model_validate(RAW)
+    assert lazy_validate(User, RAW) == eager
+    assert eager == lazy_validate(User, RAW)
+    assert repr(lazy_validate(User, RAW)) == repr(eager)
+    assert lazy_validate(User, RAW).model_dump() == eager.model_dump()
+    assert lazy_validate(User, RAW).model_dump_json() == eager.model_dump_json()
+    assert materialize(lazy_validate(List[User], [RAW, RAW])) == [eager, eager]
+
+
+@pytest.mark.parametrize("make_copy", COPIES)
+def test_copy_round_trip(make_copy: Callable[[Any], Any]) -> None:
+    eager = User.model_validate(RAW)
+    user = lazy_validate(User, RAW)
+    user.name  # partially validated
+    copied = make_copy(user)
+    assert copied == eager
+    assert eager == copied
+    assert copied == user
+    assert repr(copied) == repr(eager)
+    assert copied.model_dump() == eager.model_dump()
+    assert copied.game_profiles[1] == eager.game_profiles[1]
+
+
+@pytest.mark.parametrize("make_copy", COPIES)
+def test_copy_of_copy(make_copy: Callable[[Any], Any]) -> None:
+    copied = make_copy(make_copy(lazy_validate(User, RAW)))
+    assert copied == User.model_validate(RAW)
+
+
+def test_model_copy_update() -> None:
+    copied = lazy_validate(User, RAW).model_copy(update={"name": "other"})
+    assert copied.name == "other"
+    assert copied.model_dump() == {**User.model_validate(RAW).model_dump(), "name": "other"}
+
+
+def test_pickled_as_eager_model() -> None:
+    restored = pickle.loads(pickle.dumps(lazy_validate(User, RAW)))
+    assert type(restored) is User
+    assert not isinstance(restored.game_profiles[0], LazyObject)
+    assert restored == User.model_validate(RAW)
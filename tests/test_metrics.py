@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from berrycorepy.client.session.metrics import RequestMetrics
+from berrycorepy.exceptions import DangerousServerError
+from tests.mocked_session import MockedClient
+
+
+def test_metrics() -> None:
+    metrics = RequestMetrics(buckets=(0.5, 1.0))
+    client = MockedClient(metrics=metrics)
+    client.session.add_result()
+    client.session.add_error(500)
+
+    async def main() -> None:
+        await client.get_me()
+        with pytest.raises(DangerousServerError):
+            await client.get_me()
+
+    asyncio.run(main())
+    snapshot = metrics.snapshot()
+    assert set(snapshot["latency"]["getMe"]) == {"total", "decode", "validate"}
+    assert snapshot["latency"]["getMe"]["total"]["count"] == 2
+    assert snapshot["errors"] == {"getMe": {"DangerousServerError": 1}}
+    text = metrics.to_prometheus()
+    assert 'berrycore_request_phase_seconds_bucket{method="getMe",phase="total",le="+Inf"} 2' in (
+        text
+    )
+    assert 'berrycore_request_errors_total{method="getMe",error="DangerousServerError"} 1' in text
+    metrics.reset()
+    assert metrics.snapshot() == {"latency": {}, "errors": {}}
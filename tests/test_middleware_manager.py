@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, List, Optional
+
+from berrycorepy.client.session.middlewares.base import BaseRequestMiddleware
+from berrycorepy.client.session.middlewares.manager import RequestMiddlewareManager
+from berrycorepy.methods import GetChat, GetMe
+from tests.mocked_session import MockedClient
+
+
+class Recorder(BaseRequestMiddleware):
+    def __init__(self, name: str, calls: List[str], methods: Any = None) -> None:
+        self.name = name
+        self.calls = calls
+        if methods is not None:
+            self.methods = frozenset(methods)
+
+    async def __call__(self, make_request: Any, client: Any, method: Any) -> Any:
+        self.calls.append(self.name)
+        await asyncio.sleep(0)
+        return await make_request(client, method)
+
+
+async def callback(client: Any, method: Any, timeout: Optional[int] = None) -> Any:
+    await asyncio.sleep(0.01 if timeout == 1 else 0)
+    return timeout
+
+
+def test_chain_order_and_filter() -> None:
+    calls: List[str] = []
+    manager = RequestMiddlewareManager()
+    manager(Recorder("outer", calls))
+    manager.register(Recorder("me", calls, methods=[GetMe]))
+    manager(Recorder("inner", calls))
+
+    asyncio.run(manager.wrap_middlewares(callback, method_type=GetMe)(None, GetMe()))
+    assert calls == ["outer", "me", "inner"]
+    calls.clear()
+    asyncio.run(manager.wrap_middlewares(callback, method_type=GetChat)(None, GetChat(chat_id=1)))
+    assert calls == ["outer", "inner"]
+
+
+def test_chain_is_cached_regardless_of_kwargs() -> None:
+    manager = RequestMiddlewareManager()
+    manager(Recorder("a", []))
+
+    async def main() -> List[Any]:
+        return await asyncio.gather(
+            *(
+                manager.wrap_middlewares(callback, method_type=GetMe, timeout=timeout)(
+                    None, GetMe()
+                )
+                for timeout in (1, 2, None, 4)
+            )
+        )
+
+    assert asyncio.run(main()) == [1, 2, None, 4]
+    assert asyncio.run(main()) == [1, 2, None, 4]
+    assert len(manager._chains) == 1
+
+
+def test_chain_is_rebuilt_after_changes() -> None:
+    calls: List[str] = []
+    manager = RequestMiddlewareManager()
+    first = manager(Recorder("first", calls))
+    asyncio.run(manager.wrap_middlewares(callback, method_type=GetMe)(None, GetMe()))
+    manager.unregister(first)  # type: ignore[arg-type]
+    manager(Recorder("second", calls))
+    asyncio.run(manager.wrap_middlewares(callback, method_type=GetMe)(None, GetMe()))
+    assert calls == ["first", "second"]
+    assert len(manager) == 1
+
+
+def test_session_request_timeout() -> None:
+    client = MockedClient()
+    timeouts: List[Optional[int]] = []
+    make_request = client.session.make_request
+
+    async def record(client: Any, method: Any, timeout: Optional[int] = None) -> Any:
+        timeouts.append(timeout)
+        return await make_request(client, method, timeout)
+
+    client.session.make_request = record  # type: ignore[method-assign]
+    client.session.middleware(Recorder("a", []))
+    for _ in range(3):
+        client.session.add_result()
+
+    async def main() -> None:
+        await client.get_me(request_timeout=5)
+        await client.get_me()
+        await client.get_me(request_timeout=7)
+
+    asyncio.run(main())
+    assert timeouts == [5, None, 7]
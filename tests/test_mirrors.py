@@ -0,0 +1,112 @@
+import asyncio
+import json
+import socket
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+import pytest
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer, DangerousAPIServerPool
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.streams import StreamsSession
+from berrycorepy.exceptions import DangerousNetworkError
+from berrycorepy.methods import GetChat, GetMe
+from berrycorepy.methods.base import DangerousMethod
+from berrycorepy.types.User import User
+from tests.mocked_session import USER
+from tests.server import api_app, serve
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]  # type: ignore[no-any-return]
+
+
+def test_mirror_failover() -> None:
+    seen: List[Dict[str, Any]] = []
+    dead = DangerousAPIServer.from_base(f"http://127.0.0.1:{free_port()}")
+
+    async def main() -> None:
+        async with serve(api_app(seen)) as base:
+            live = DangerousAPIServer.from_base(base)
+            pool = DangerousAPIServerPool([dead, live], min_observations=1, error_threshold=0.3)
+            session = AiohttpSession(api=pool)
+            async with Client("42:TEST", session=session) as client:
+                assert (await client.get_me()).name == USER["name"]
+                assert not pool.is_healthy(dead)
+                assert pool.select() is live
+                await client.get_me()
+
+            strict = AiohttpSession(
+                api=DangerousAPIServerPool([dead, live]), failover_methods=[GetChat]
+            )
+            async with Client("42:TEST", session=strict) as client:
+                with pytest.raises(DangerousNetworkError):
+                    await client(GetMe())
+
+    asyncio.run(main())
+    assert len(seen) == 2
+
+
+def test_pool_prefers_faster_server() -> None:
+    first = DangerousAPIServer.from_base("http://first")
+    second = DangerousAPIServer.from_base("http://second")
+    pool = DangerousAPIServerPool([first, second])
+    assert pool.select() is first
+    pool.finished(first, 0.5, failed=False)
+    pool.finished(second, 0.1, failed=False)
+    assert pool.select() is second
+    pool.started(second)
+    pool.started(second)
+    pool.started(second)
+    pool.started(second)
+    pool.started(second)
+    assert pool.select() is first
+    assert pool.stats()["http://second/client{token}/{method}"]["outstanding"] == 5
+    assert json.dumps(pool.stats())
+
+
+def test_cold_burst_is_spread() -> None:
+    servers = [DangerousAPIServer.from_base(f"http://mirror{i}") for i in range(3)]
+    pool = DangerousAPIServerPool(servers)
+    chosen = []
+    for _ in range(6):
+        server = pool.select()
+        pool.started(server)
+        chosen.append(servers.index(server))
+    assert chosen == [0, 1, 2, 0, 1, 2]
+    with pytest.raises(ValueError):
+        DangerousAPIServerPool(servers, initial_latency=0)
+
+
+class ListUsers(DangerousMethod[List[User]]):
+    __returning__ = List[User]
+    __api_method__ = "listUsers"
+
+
+@pytest.mark.parametrize("session_factory", [AiohttpSession, StreamsSession])
+def test_streamed_requests_are_routed(session_factory: Any) -> None:
+    dead = DangerousAPIServer.from_base(f"http://127.0.0.1:{free_port()}")
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({"ok": True, "result": [USER, USER]})
+
+    async def main() -> None:
+        app = web.Application()
+        app.router.add_post("/client{token}/{method}", handler)
+        async with serve(app) as base:
+            live = DangerousAPIServer.from_base(base)
+            pool = DangerousAPIServerPool([dead, live], min_observations=1, error_threshold=0.3)
+            session = session_factory(api=pool, failover_methods=[ListUsers])
+            async with Client("42:TEST", session=session) as client:
+                users = [user async for user in client.stream(ListUsers())]
+            assert len(users) == 2
+            stats = pool.stats()
+            assert not stats[dead.base]["healthy"]
+            assert stats[live.base]["outstanding"] == 0
+            assert pool._states[live].observations == 1
+
+    asyncio.run(main())
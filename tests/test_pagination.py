@@ -0,0 +1,114 @@
+import asyncio
+import json
+from typing import Any, List, Optional
+
+import pytest
+
+from berrycorepy.client.pagination import CursorPagination, OffsetPagination
+from berrycorepy.methods import GetMe
+from berrycorepy.methods.base import DangerousMethod, DangerousType
+from berrycorepy.types.User import User
+from tests.mocked_session import USER, MockedClient, MockedSession
+
+
+class ListUsers(DangerousMethod[List[User]]):
+    __returning__ = List[User]
+    __api_method__ = "listUsers"
+
+    offset: int = 0
+    limit: int = 10
+
+
+class ListPages(DangerousMethod[List[User]]):
+    __returning__ = List[User]
+    __api_method__ = "listPages"
+
+    page: int = 1
+
+
+class PagedSession(MockedSession):
+    """
+    Session answering with pages of :code:`total` users
+    """
+
+    def __init__(self, total: int) -> None:
+        super().__init__()
+        self.total = total
+
+    async def make_request(
+        self,
+        client: Any,
+        method: DangerousMethod[DangerousType],
+        timeout: Optional[int] = None,
+    ) -> DangerousType:
+        self.requests.append(method)
+        await asyncio.sleep(0)
+        if isinstance(method, ListPages):
+            start, stop = (method.page - 1) * 3, method.page * 3
+        else:
+            start, stop = method.offset, method.offset + method.limit  # type: ignore[attr-defined]
+        users = [{**USER, "id": i} for i in range(start, min(stop, self.total))]
+        content = json.dumps({"ok": True, "result": users}).encode()
+        return self.check_response(client, method, 200, content).result  # type: ignore
+
+
+def paged_client(total: int) -> MockedClient:
+    client = MockedClient()
+    client.session = PagedSession(total)
+    return client
+
+
+async def collect(iterator: Any) -> List[int]:
+    return [item.id async for item in iterator]
+
+
+@pytest.mark.parametrize("total", [0, 7, 10, 25, 30])
+def test_offset_pages_end_on_short_page(total: int) -> None:
+    client = paged_client(total)
+    ids = asyncio.run(collect(client.paginate(ListUsers(), prefetch=3)))
+    assert ids == list(range(total))
+
+
+def test_page_numbers() -> None:
+    client = paged_client(7)
+    strategy = OffsetPagination(offset_field="page", limit_field=None, step=1)
+    paginator = client.paginate(ListPages(), strategy=strategy, prefetch=1, max_prefetch=1)
+    assert asyncio.run(collect(paginator)) == list(range(7))
+    assert paginator.pages == 4
+
+
+def test_max_pages() -> None:
+    client = paged_client(100)
+    assert asyncio.run(collect(client.paginate(ListUsers(limit=5), max_pages=2))) == list(
+        range(10)
+    )
+
+
+def test_cursor_pages() -> None:
+    client = paged_client(25)
+
+    def next_cursor(result: List[User]) -> Optional[int]:
+        return result[-1].id + 1 if len(result) == 10 else None
+
+    strategy = CursorPagination(next_cursor, cursor_field="offset")
+    ids = asyncio.run(collect(client.paginate(ListUsers(), strategy=strategy)))
+    assert ids == list(range(25))
+
+
+@pytest.mark.parametrize(
+    "method,strategy,match",
+    [
+        (GetMe(), OffsetPagination(), "no field 'offset', set `offset_field`"),
+        (ListPages(), OffsetPagination("page"), "no field 'limit', set `limit_field`"),
+        (ListUsers(), CursorPagination(lambda result: None), "no field 'cursor'"),
+    ],
+)
+def test_missing_fields_are_rejected(
+    method: DangerousMethod[Any], strategy: Any, match: str
+) -> None:
+    client = paged_client(1)
+    with pytest.raises(ValueError, match=match):
+        client.paginate(method, strategy=strategy)
+    with pytest.raises(ValueError, match=match):
+        strategy.first(method)
+    assert not client.session.requests
@@ -0,0 +1,125 @@
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+
+from berrycorepy.client.pool import ClientPool, FairLimiter, token_hash
+from tests.mocked_session import MockedSession
+
+
+class RecordingSession(MockedSession):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.delay = 0.01
+        self.tokens: List[str] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def make_request(self, client: Any, method: Any, timeout: Optional[int] = None) -> Any:
+        self.tokens.append(client.token)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.add_result()
+        try:
+            return await super().make_request(client, method, timeout)
+        finally:
+            self.active -= 1
+
+
+def test_tokens_are_served_in_turn() -> None:
+    async def main() -> RecordingSession:
+        pool = ClientPool(session_factory=RecordingSession, concurrency=2)
+        busy, quiet = pool.get("busy"), pool.get("quiet")
+        calls = [asyncio.ensure_future(busy.get_me()) for _ in range(10)]
+        await asyncio.sleep(0)
+        calls += [asyncio.ensure_future(quiet.get_me()) for _ in range(2)]
+        await asyncio.gather(*calls)
+        await pool.close()
+        return pool.sessions[0]  # type: ignore[return-value]
+
+    session = asyncio.run(main())
+    assert session.max_active == 2
+    # Both requests of the quiet token are sent before the busy token's backlog
+    assert session.tokens.index("quiet") <= 3
+    assert [i for i, token in enumerate(session.tokens) if token == "quiet"][-1] <= 5
+
+
+def test_per_token_concurrency() -> None:
+    async def main() -> RecordingSession:
+        pool = ClientPool(session_factory=RecordingSession, per_token_concurrency=1)
+        client = pool.get("token")
+        await asyncio.gather(*(client.get_me() for _ in range(3)))
+        return pool.sessions[0]  # type: ignore[return-value]
+
+    assert asyncio.run(main()).max_active == 1
+
+
+def test_fair_limiter_cancelled_waiters() -> None:
+    async def main() -> None:
+        limiter = FairLimiter(1)
+        await limiter.acquire("a")
+        waiting = asyncio.ensure_future(limiter.acquire("b"))
+        granted = asyncio.ensure_future(limiter.acquire("c"))
+        await asyncio.sleep(0)
+        assert limiter.waiting == 2
+        waiting.cancel()
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        limiter.release()
+        # Slot handed over to the cancelled waiter is passed on
+        granted.cancel()
+        await asyncio.gather(granted, return_exceptions=True)
+        assert limiter.active == 0
+        await limiter.acquire("d")
+        assert limiter.active == 1
+
+    asyncio.run(main())
+
+
+def test_fair_limiter_cancel_during_release() -> None:
+    async def main() -> None:
+        limiter = FairLimiter(1)
+        await limiter.acquire("a")
+        waiting = asyncio.ensure_future(limiter.acquire("b"))
+        await asyncio.sleep(0)
+        # Release in the same iteration drops the cancelled waiter with its queue
+        waiting.cancel()
+        limiter.release()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.active == 0
+        assert limiter.waiting == 0
+        await limiter.acquire("c")
+        assert limiter.active == 1
+
+    asyncio.run(main())
+
+
+def test_fair_limiter_validation() -> None:
+    with pytest.raises(ValueError):
+        FairLimiter(0)
+
+
+def test_clients_share_shards() -> None:
+    pool = ClientPool(session_factory=MockedSession, shards=4)
+    client = pool.get("token")
+    assert pool.get("token") is client
+    assert "token" in pool
+    assert pool.get_by_hash(token_hash("token")) is client
+    assert client.session is pool.shard("token")
+    assert len({id(pool.shard(f"token{i}")) for i in range(100)}) == 4
+
+
+def test_close_waits_for_release() -> None:
+    async def main() -> None:
+        pool = ClientPool(session_factory=MockedSession)
+        session = pool.sessions[0]
+        async with pool.acquire("token") as client:
+            await pool.close()
+            assert not session.closed  # type: ignore[attr-defined]
+            assert client.session is session
+            with pytest.raises(RuntimeError):
+                pool.get("other")
+        assert session.closed  # type: ignore[attr-defined]
+
+    asyncio.run(main())
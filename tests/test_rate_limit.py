@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Any, List
+
+import pytest
+
+from berrycorepy.client.session.middlewares.base import token_hash
+from berrycorepy.client.session.middlewares.rate_limit import (
+    RateLimit,
+    RequestRateLimiter,
+    TokenBucket,
+)
+from berrycorepy.exceptions import DangerousRetryAfter
+from berrycorepy.methods import GetChat, GetMe
+from tests.mocked_session import MockedClient
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (-1, 1), (1, 0)])
+def test_invalid_limits(rate: float, burst: int) -> None:
+    with pytest.raises(ValueError):
+        RateLimit(rate=rate, burst=burst)
+
+
+def test_bucket_spaces_requests() -> None:
+    async def main() -> List[float]:
+        bucket = TokenBucket(RateLimit(rate=50, burst=2))
+        started = time.monotonic()
+        times = []
+        for _ in range(5):
+            await bucket.acquire()
+            times.append(time.monotonic() - started)
+        return times
+
+    times = asyncio.run(main())
+    assert times[1] < 0.01
+    assert times[4] == pytest.approx(0.06, abs=0.02)
+
+
+def test_bucket_adapts_rate() -> None:
+    bucket = TokenBucket(RateLimit(rate=10), decrease_factor=0.5, increase_step=0.1)
+    bucket.penalize(0)
+    assert bucket.rate == 5
+    bucket.penalize(0)
+    bucket.penalize(0)
+    bucket.penalize(0)
+    assert bucket.rate == 1  # min_rate_factor
+    for _ in range(20):
+        bucket.reward()
+    assert bucket.rate == 10
+
+
+def run(client: MockedClient, *calls: Any) -> List[Any]:
+    async def main() -> List[Any]:
+        return await asyncio.gather(*(client(call) for call in calls), return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_limits_and_stats() -> None:
+    client = MockedClient()
+    limiter = RequestRateLimiter(
+        limit=RateLimit(rate=100, burst=10),
+        per_token=RateLimit(rate=100, burst=5),
+        per_method={GetChat: RateLimit(rate=100, burst=1)},
+    )
+    client.session.middleware(limiter)
+    for _ in range(3):
+        client.session.add_result()
+    run(client, GetMe(), GetChat(chat_id=1), GetChat(chat_id=2))
+
+    key = token_hash(client.token)
+    stats = limiter.stats()
+    assert set(stats) == {"global", f"token:{key}", f"method:{key}:getUser"}
+    assert stats["global"]["acquired"] == 3
+    assert stats[f"method:{key}:getUser"]["acquired"] == 2
+    assert stats[f"method:{key}:getUser"]["max_wait"] > 0.005
+    assert client.token not in str(stats)
+
+
+def test_flood_control_penalizes() -> None:
+    client = MockedClient()
+    limiter = RequestRateLimiter(per_token=RateLimit(rate=100, burst=5))
+    client.session.middleware(limiter)
+    client.session.add_error(429, parameters={"retry_after": 1})
+    (error,) = run(client, GetMe())
+    assert isinstance(error, DangerousRetryAfter)
+    stats = limiter.stats()[f"token:{token_hash(client.token)}"]
+    assert stats["rate"] == 50
+    assert limiter.evict() == 0
+
+
+def test_idle_buckets_are_evicted() -> None:
+    client = MockedClient()
+    limiter = RequestRateLimiter(
+        limit=RateLimit(rate=1000, burst=1), per_token=RateLimit(rate=1000, burst=1)
+    )
+    client.session.middleware(limiter)
+    client.session.add_result()
+    run(client, GetMe())
+    assert len(limiter.stats()) == 2
+    time.sleep(0.01)
+    assert limiter.evict() == 1
+    assert list(limiter.stats()) == ["global"]
+
+
+def test_eviction_keeps_buckets_in_use() -> None:
+    client = MockedClient()
+    client.session.delay = 0.05
+    limiter = RequestRateLimiter(per_token=RateLimit(rate=1000, burst=1))
+    client.session.middleware(limiter)
+    client.session.add_result()
+
+    async def main() -> int:
+        call = asyncio.ensure_future(client.get_me())
+        await asyncio.sleep(0.02)
+        evicted = limiter.evict()
+        await call
+        return evicted
+
+    assert asyncio.run(main()) == 0
+    assert limiter.evict() == 1
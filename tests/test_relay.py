@@ -0,0 +1,164 @@
+import asyncio
+import os
+from typing import Any, List
+
+import pytest
+from aiohttp import web
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.relay import Relay, RelayBuffer
+from berrycorepy.types.input_file import URLInputFile
+from tests.server import content_range, serve
+
+DATA = os.urandom(100_000)
+
+
+def make_app(requests: List[Any], ranges: bool = True) -> web.Application:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        requests.append((request.method, request.headers.get("Range")))
+        if not ranges:
+            return web.Response(body=DATA)
+        return content_range(request, DATA)
+
+    app = web.Application()
+    app.router.add_route("*", "/file", handler)
+    return app
+
+
+def relay(ranges: bool = True, **kwargs: Any) -> Any:
+    requests: List[Any] = []
+
+    async def main() -> bytes:
+        async with serve(make_app(requests, ranges=ranges)) as base:
+            async with AiohttpSession() as session:
+                chunks = Relay(session, f"{base}/file", chunk_size=4096, **kwargs)
+                return b"".join([chunk async for chunk in chunks])
+
+    return asyncio.run(main()), requests
+
+
+def test_relay_single_stream() -> None:
+    data, requests = relay(buffer_size=10_000)
+    assert data == DATA
+    assert requests == [("GET", None)]
+
+
+def test_relay_segments() -> None:
+    data, requests = relay(buffer_size=30_000, segments=3, segment_size=16_384)
+    assert data == DATA
+    assert requests[0] == ("HEAD", None)
+    ranges = sorted(header for method, header in requests[1:])
+    assert len(ranges) == 7
+    assert "bytes=98304-99999" in ranges
+
+
+def test_relay_without_range_support() -> None:
+    data, requests = relay(ranges=False, segments=3, segment_size=16_384)
+    assert data == DATA
+    assert requests == [("HEAD", None), ("GET", None)]
+
+
+@pytest.mark.parametrize("answer", ["whole", "shifted"])
+def test_relay_rejects_wrong_ranges(answer: str) -> None:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        headers = {"Accept-Ranges": "bytes"}
+        if request.method == "HEAD" or answer == "whole":
+            # Mirror advertises ranges, but sends the whole file
+            return web.Response(body=DATA, headers=headers)
+        start, stop = request.http_range.start + 1, request.http_range.stop + 1
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{len(DATA)}"
+        return web.Response(status=206, body=DATA[start:stop], headers=headers)
+
+    received = bytearray()
+
+    async def main() -> None:
+        app = web.Application()
+        app.router.add_route("*", "/file", handler)
+        async with serve(app) as base:
+            async with AiohttpSession() as session:
+                chunks = Relay(session, f"{base}/file", segments=2, segment_size=16_384)
+                async for chunk in chunks:
+                    received.extend(chunk)
+
+    with pytest.raises(ValueError, match="Expected partial content for range"):
+        asyncio.run(main())
+    assert DATA.startswith(received)
+
+
+def test_relay_stops_download_when_consumer_leaves() -> None:
+    requests: List[Any] = []
+
+    async def main() -> None:
+        async with serve(make_app(requests)) as base:
+            async with AiohttpSession() as session:
+                chunks = Relay(
+                    session,
+                    f"{base}/file",
+                    chunk_size=1024,
+                    buffer_size=4096,
+                    segments=2,
+                    segment_size=8192,
+                )
+                iterator = chunks.__aiter__()
+                assert len(await iterator.__anext__()) == 1024
+                await iterator.aclose()
+
+    asyncio.run(main())
+    # Buffer doesn't let more than two segments be started
+    assert len(requests) <= 3
+
+
+def test_url_input_file_relay() -> None:
+    requests: List[Any] = []
+
+    async def main() -> bytes:
+        async with serve(make_app(requests)) as base:
+            async with Client("42:TEST", session=AiohttpSession()) as client:
+                file = URLInputFile(f"{base}/file", relay=True, chunk_size=8192, segments=2)
+                return b"".join([chunk async for chunk in file.read(client)])
+
+    assert asyncio.run(main()) == DATA
+
+
+def test_buffer_orders_out_of_order_writes() -> None:
+    async def main() -> None:
+        buffer = RelayBuffer(capacity=8)
+        # Later range waits until earlier data is consumed
+        later = asyncio.ensure_future(buffer.write(6, b"ghij"))
+        await asyncio.sleep(0)
+        assert not later.done()
+        await buffer.write(0, b"abcdef")
+        assert buffer.buffered == 6
+        assert await buffer.read(4) == b"abcd"
+        await later
+        assert buffer.buffered == 6
+        assert await buffer.read(100) == b"efghij"
+        await buffer.finish(10)
+        assert await buffer.read(100) == b""
+        assert buffer.consumed == 10
+
+    asyncio.run(main())
+
+
+def test_buffer_reports_errors() -> None:
+    async def main() -> None:
+        incomplete = RelayBuffer(capacity=8)
+        await incomplete.write(0, b"abc")
+        await incomplete.finish(5)
+        with pytest.raises(ValueError, match="Relayed 3 bytes instead of 5 bytes"):
+            await incomplete.read(10)
+
+        failed = RelayBuffer(capacity=8)
+        await failed.fail(ConnectionError("lost"))
+        with pytest.raises(ConnectionError):
+            await failed.read(10)
+
+        closed = RelayBuffer(capacity=2)
+        await closed.close()
+        with pytest.raises(RuntimeError, match="closed"):
+            await closed.write(0, b"abc")
+
+    asyncio.run(main())
+    with pytest.raises(ValueError):
+        RelayBuffer(capacity=0)
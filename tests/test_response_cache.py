@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from berrycorepy.client.session.middlewares.response_cache import ResponseCache
+from berrycorepy.exceptions import DangerousServerError
+from berrycorepy.methods import GetChat, GetMe
+from tests.mocked_session import MockedClient
+
+
+def test_fresh_result_is_cached() -> None:
+    client = MockedClient()
+    cache = ResponseCache(ttl=60)
+    client.session.middleware(cache)
+    client.session.add_result(name="first")
+
+    async def main() -> None:
+        assert (await client.get_me()).name == "first"
+        assert (await client.get_me()).name == "first"
+        client.session.add_result(name="other")
+        assert (await client(GetChat(chat_id=1))).name == "other"
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 2
+    assert cache.stats() == {"size": 2, "hits": 1, "misses": 2, "stale_hits": 0}
+
+
+def test_expired_result_is_requested_again() -> None:
+    client = MockedClient()
+    cache = ResponseCache(ttl=0.02)
+    client.session.middleware(cache)
+    client.session.add_result(name="first")
+    client.session.add_result(name="second")
+
+    async def main() -> None:
+        assert (await client.get_me()).name == "first"
+        await asyncio.sleep(0.03)
+        assert (await client.get_me()).name == "second"
+
+    asyncio.run(main())
+    assert cache.misses == 2
+
+
+def test_method_ttl_and_invalidate() -> None:
+    client = MockedClient()
+    cache = ResponseCache(method_ttl={GetMe: 0})
+    client.session.middleware(cache)
+    for _ in range(4):
+        client.session.add_result()
+
+    async def main() -> None:
+        await client.get_me()
+        await client.get_me()
+        await client(GetChat(chat_id=1))
+        assert cache.invalidate(cache.key(client, GetChat(chat_id=1)))
+        await client(GetChat(chat_id=1))
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 4
+
+
+def test_lru_eviction() -> None:
+    client = MockedClient()
+    cache = ResponseCache(maxsize=2, methods=[GetChat])
+    client.session.middleware(cache)
+    for _ in range(4):
+        client.session.add_result()
+
+    async def main() -> None:
+        for chat_id in (1, 2, 1, 3, 1):
+            await client(GetChat(chat_id=chat_id))
+
+    asyncio.run(main())
+    assert len(cache) == 2
+    assert cache.hits == 2
+
+
+def test_stale_while_revalidate() -> None:
+    client = MockedClient()
+    cache = ResponseCache(ttl=0.1, stale_while_revalidate=10)
+    client.session.middleware(cache)
+    client.session.add_result(name="first")
+    client.session.add_result(name="second")
+
+    async def main() -> None:
+        await client.get_me()
+        await asyncio.sleep(0.11)
+        client.session.delay = 0.01
+        # Stale result is returned at once and refreshed only once
+        assert (await client.get_me()).name == "first"
+        assert (await client.get_me()).name == "first"
+        assert len(cache._tasks) == 1
+        await asyncio.sleep(0.03)
+        assert not cache._tasks
+        assert (await client.get_me()).name == "second"
+
+    asyncio.run(main())
+    assert len(client.session.requests) == 2
+    assert cache.stale_hits == 2
+
+
+def test_failed_refresh_is_logged(caplog: pytest.LogCaptureFixture) -> None:
+    client = MockedClient()
+    cache = ResponseCache(ttl=0.01, stale_while_revalidate=0.1)
+    client.session.middleware(cache)
+    client.session.add_result(name="first")
+    client.session.add_error(500)
+    client.session.add_error(500)
+
+    async def main() -> None:
+        await client.get_me()
+        await asyncio.sleep(0.02)
+        with caplog.at_level(logging.WARNING, logger="berrycore.middlewares"):
+            assert (await client.get_me()).name == "first"
+            await asyncio.sleep(0.01)
+        time.sleep(0.1)
+        with pytest.raises(DangerousServerError):
+            await client.get_me()
+
+    asyncio.run(main())
+    assert "Failed to refresh cached result of method='GetMe'" in caplog.text
+
+
+def test_maxsize_validation() -> None:
+    with pytest.raises(ValueError, match="Cache size should be positive"):
+        ResponseCache(maxsize=0)
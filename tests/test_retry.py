@@ -0,0 +1,152 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+from aiohttp import web
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.middlewares.retry import RequestRetry, RetryBudget
+from berrycorepy.exceptions import (
+    ClientDecodeError,
+    DangerousBadRequest,
+    DangerousRetryAfter,
+    DangerousServerError,
+)
+from berrycorepy.methods import GetMe
+from berrycorepy.methods.base import DangerousMethod
+from berrycorepy.types.User import User
+from tests.mocked_session import USER, MockedClient
+from tests.server import serve
+
+HTML = b"<html><body>502 Bad Gateway</body></html>"
+
+
+class GetUsers(DangerousMethod[List[User]]):
+    __returning__ = List[User]
+    __api_method__ = "getUsers"
+
+
+def test_html_server_error_is_server_error() -> None:
+    client = MockedClient()
+    client.session.add_response(502, HTML)
+    with pytest.raises(DangerousServerError, match="HTTP 502"):
+        asyncio.run(client.get_me())
+
+
+def test_html_client_error_is_decode_error() -> None:
+    client = MockedClient()
+    client.session.add_response(400, HTML)
+    with pytest.raises(ClientDecodeError):
+        asyncio.run(client.get_me())
+
+
+def test_status_errors() -> None:
+    client = MockedClient()
+    client.session.add_error(400)
+    client.session.add_error(503, "restart")
+    client.session.add_error(429, parameters={"retry_after": 3})
+    with pytest.raises(DangerousBadRequest):
+        asyncio.run(client.get_me())
+    with pytest.raises(DangerousServerError):
+        asyncio.run(client.get_me())
+    with pytest.raises(DangerousRetryAfter) as error:
+        asyncio.run(client.get_me())
+    assert error.value.retry_after == 3
+
+
+def test_retry_html_server_error() -> None:
+    client = MockedClient()
+    client.session.middleware(RequestRetry(base_delay=0))
+    client.session.add_response(502, HTML)
+    client.session.add_response(503, HTML)
+    client.session.add_result(name="third")
+    assert asyncio.run(client.get_me()).name == "third"
+    assert len(client.session.requests) == 3
+
+
+def test_retry_gives_up() -> None:
+    client = MockedClient()
+    client.session.middleware(RequestRetry(max_attempts=2, base_delay=0))
+    client.session.add_response(502, HTML)
+    client.session.add_response(502, HTML)
+    with pytest.raises(DangerousServerError):
+        asyncio.run(client.get_me())
+    assert len(client.session.requests) == 2
+
+
+def test_no_retry_of_not_idempotent_methods() -> None:
+    client = MockedClient()
+    client.session.middleware(RequestRetry(base_delay=0, idempotent_methods=()))
+    client.session.add_response(502, HTML)
+    with pytest.raises(DangerousServerError):
+        asyncio.run(client.get_me())
+    assert len(client.session.requests) == 1
+
+
+def test_no_retry_of_client_errors() -> None:
+    client = MockedClient()
+    client.session.middleware(RequestRetry(base_delay=0))
+    client.session.add_error(400)
+    with pytest.raises(DangerousBadRequest):
+        asyncio.run(client.get_me())
+    assert len(client.session.requests) == 1
+
+
+def test_retry_budget() -> None:
+    budget = RetryBudget(ratio=0.5, min_retries=1, max_tokens=2)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.available == 2
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.available == 1
+
+
+def test_retry_budget_validation() -> None:
+    with pytest.raises(ValueError):
+        RetryBudget(min_retries=10, max_tokens=5)
+    with pytest.raises(ValueError):
+        RetryBudget(ratio=-1)
+
+
+def test_retries_limited_by_budget() -> None:
+    client = MockedClient()
+    client.session.middleware(
+        RequestRetry(base_delay=0, budget=RetryBudget(ratio=0, min_retries=1, max_tokens=1))
+    )
+    for _ in range(3):
+        client.session.add_response(502, HTML)
+    with pytest.raises(DangerousServerError):
+        asyncio.run(client.get_me())
+    with pytest.raises(DangerousServerError):
+        asyncio.run(client.get_me())
+    assert len(client.session.requests) == 3
+
+
+def test_stream_html_server_error() -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(status=502, body=HTML, content_type="text/html")
+
+    async def main() -> Any:
+        app = web.Application()
+        app.router.add_post("/client{token}/{method}", handler)
+        async with serve(app) as base:
+            session = AiohttpSession(api=DangerousAPIServer.from_base(base))
+            async with Client("42:TEST", session=session) as client:
+                return [user async for user in client.stream(GetUsers())]
+
+    with pytest.raises(DangerousServerError, match="HTTP 502"):
+        asyncio.run(main())
+
+
+def test_get_me_method() -> None:
+    client = MockedClient()
+    client.session.add_result()
+    assert asyncio.run(client.get_me()).model_dump() == User.model_validate(USER).model_dump()
+    assert isinstance(client.session.requests[0], GetMe)
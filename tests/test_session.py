@@ -0,0 +1,38 @@
+import json
+from typing import Any, List
+
+import pytest
+
+from berrycorepy.exceptions import ClientDecodeError, DangerousServerError
+from berrycorepy.methods import GetMe
+from tests.mocked_session import USER, MockedClient, MockedSession
+
+BODY = json.dumps({"ok": True, "result": USER}).encode()
+
+
+@pytest.mark.parametrize("validate_json", [False, True])
+def test_decode_bytes(validate_json: bool) -> None:
+    loaded: List[Any] = []
+
+    def json_loads(content: Any) -> Any:
+        loaded.append(content)
+        return json.loads(content)
+
+    client = MockedClient()
+    session = MockedSession(validate_json=validate_json, json_loads=json_loads)
+    response = session.check_response(client, GetMe(), 200, BODY)
+    assert response.result.name == USER["name"]
+    assert response.result.game_profiles[1].id == 1
+    assert loaded == ([] if validate_json else [BODY])
+
+
+@pytest.mark.parametrize("validate_json", [False, True])
+def test_decode_errors(validate_json: bool) -> None:
+    client = MockedClient()
+    session = MockedSession(validate_json=validate_json)
+    with pytest.raises(ClientDecodeError, match="Failed to decode object"):
+        session.check_response(client, GetMe(), 200, b"{not json")
+    with pytest.raises(ClientDecodeError, match="Failed to deserialize object"):
+        session.check_response(client, GetMe(), 200, b'{"ok": true, "result": {"id": "x"}}')
+    with pytest.raises(DangerousServerError, match="HTTP 502"):
+        session.check_response(client, GetMe(), 502, b"<html>Bad gateway</html>")
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from typing import Any, List
+
+import pytest
+from aiohttp import web
+
+from berrycorepy.client.client import Client
+from berrycorepy.client.dangerous import DangerousAPIServer
+from berrycorepy.client.session.aiohttp import AiohttpSession
+from berrycorepy.client.session.streaming import ResultScanner
+from berrycorepy.exceptions import ClientDecodeError, DangerousBadRequest, DangerousServerError
+from berrycorepy.methods.base import DangerousMethod
+from berrycorepy.types.User import User
+from tests.mocked_session import USER
+from tests.server import serve
+
+RESULT = [{"a": 'x]"}{,'}, [1, [2]], 3, "s", None]
+
+
+class ListUsers(DangerousMethod[List[User]]):
+    __returning__ = List[User]
+    __api_method__ = "listUsers"
+
+
+def scan(document: bytes, chunk_size: int) -> ResultScanner:
+    scanner = ResultScanner()
+    items: List[bytes] = []
+    for offset in range(0, len(document), chunk_size):
+        items += scanner.feed(document[offset : offset + chunk_size])
+    scanner.close()
+    scanner.result = [json.loads(item) for item in items]  # type: ignore[attr-defined]
+    return scanner
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_items_are_split_in_any_chunks(chunk_size: int) -> None:
+    document = json.dumps({"ok": True, "result": RESULT, "description": "d"}).encode()
+    scanner = scan(document, chunk_size)
+    assert scanner.result == RESULT  # type: ignore[attr-defined]
+    assert scanner.fields == {"ok": True, "description": "d"}
+    assert scanner.items == len(RESULT)
+    assert scanner.done
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        b'{"ok": true, "result": []}',
+        b'{"ok": true, "result": null}',
+        b'{"ok": false, "error_code": 400, "description": "no"}',
+    ],
+)
+def test_documents_without_items(document: bytes) -> None:
+    scanner = scan(document, 2)
+    assert scanner.result == []  # type: ignore[attr-defined]
+    fields = json.loads(document)
+    if fields.get("result") == []:
+        # Array is split into items and never decoded as a field
+        del fields["result"]
+    assert scanner.fields == fields
+
+
+@pytest.mark.parametrize(
+    "document,message",
+    [
+        (b'{"ok": true, "result": 5}', "'result' is not an array"),
+        (b'{"ok": true, "result": [1,', "Unexpected end of JSON document"),
+        (b"[1]", "Response is not a JSON object"),
+        (b'{"ok": true} x', "Extra data after the end of JSON document"),
+        (b'{"ok": true}\n', None),
+    ],
+)
+def test_malformed_documents(document: bytes, message: Any) -> None:
+    for chunk_size in (1, len(document)):
+        if message is None:
+            scan(document, chunk_size)
+            continue
+        with pytest.raises(ValueError, match=message):
+            scan(document, chunk_size)
+
+
+def stream_users(status: int, body: bytes, **kwargs: Any) -> List[Any]:
+    received: List[Any] = []
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(status=status)
+        await response.prepare(request)
+        for offset in range(0, len(body), 100):
+            await response.write(body[offset : offset + 100])
+        await response.write_eof()
+        return response
+
+    async def main() -> None:
+        app = web.Application()
+        app.router.add_post("/client{token}/{method}", handler)
+        async with serve(app) as base:
+            session = AiohttpSession(api=DangerousAPIServer.from_base(base), **kwargs)
+            async with Client("42:TEST", session=session) as client:
+                async for user in client.stream(ListUsers()):
+                    received.append(user)
+
+    asyncio.run(main())
+    return received
+
+
+@pytest.mark.parametrize("lazy_results", [False, True])
+def test_stream(lazy_results: bool) -> None:
+    users = [{**USER, "id": i} for i in range(10)]
+    body = json.dumps({"ok": True, "result": users}).encode()
+    received = stream_users(200, body, lazy_results=lazy_results)
+    assert [user.id for user in received] == list(range(10))
+    assert all(isinstance(user, User) for user in received)
+
+
+def test_stream_error_after_items() -> None:
+    body = json.dumps({"ok": False, "error_code": 400, "description": "bad"}).encode()
+    with pytest.raises(DangerousBadRequest, match="bad"):
+        stream_users(400, body)
+
+
+def test_stream_server_error_page() -> None:
+    with pytest.raises(DangerousServerError, match="HTTP 502"):
+        stream_users(502, b"<html>Bad gateway</html>")
+
+
+def test_stream_invalid_item() -> None:
+    body = json.dumps({"ok": True, "result": [USER, {"id": "x"}]}).encode()
+    with pytest.raises(ClientDecodeError, match="Failed to deserialize object"):
+        stream_users(200, body)
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List
+
+import pytest
+
+from berrycorepy.client.session.streams import StreamsSession
+
+Handler = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+
+
+async def read_request(reader: asyncio.StreamReader) -> bytes:
+    head = await reader.readuntil(b"\r\n\r\n")
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            return head + await reader.readexactly(int(line.split(b":")[1]))
+    if b"chunked" in head.lower():
+        body = bytearray()
+        while (line := await reader.readuntil(b"\r\n")) != b"0\r\n":
+            body += await reader.readexactly(int(line, 16) + 2)
+        await reader.readexactly(2)
+        return head + body
+    return head
+
+
+def run(handler: Handler, client: Callable[[StreamsSession, str], Awaitable[Any]]) -> Any:
+    async def main() -> Any:
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        session = StreamsSession()
+        try:
+            return await client(session, f"http://127.0.0.1:{port}/")
+        finally:
+            await session.close()
+            server.close()
+
+    return asyncio.run(main())
+
+
+async def fetch(session: StreamsSession, url: str, body: Any = None) -> bytes:
+    response = await session.request("POST", url, body=body)
+    return await response.read()
+
+
+def test_connection_is_reused() -> None:
+    connections: List[int] = []
+
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connections.append(1)
+        while not reader.at_eof():
+            try:
+                await read_request(reader)
+            except asyncio.IncompleteReadError:
+                break
+            writer.write(RESPONSE)
+
+    async def client(session: StreamsSession, url: str) -> List[bytes]:
+        return [await fetch(session, url, b"x") for _ in range(3)]
+
+    assert run(handler, client) == [b"ok"] * 3
+    assert len(connections) == 1
+
+
+def test_closed_idle_connection_is_replaced() -> None:
+    requests: List[bytes] = []
+
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        requests.append(await read_request(reader))
+        writer.write(RESPONSE)
+        writer.close()
+
+    async def client(session: StreamsSession, url: str) -> List[bytes]:
+        first = await fetch(session, url, b"x")
+        await asyncio.sleep(0.1)
+        return [first, await fetch(session, url, b"x")]
+
+    assert run(handler, client) == [b"ok", b"ok"]
+    assert len(requests) == 2
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_flushed_request_is_not_repeated(streamed: bool) -> None:
+    requests: List[bytes] = []
+
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while not reader.at_eof():
+            try:
+                requests.append(await read_request(reader))
+            except asyncio.IncompleteReadError:
+                break
+            if len(requests) == 1:
+                writer.write(RESPONSE)
+            else:
+                # Request is received, but connection is lost before the response
+                writer.close()
+                break
+
+    async def body() -> AsyncIterator[bytes]:
+        yield b"x"
+
+    async def client(session: StreamsSession, url: str) -> Any:
+        await fetch(session, url, b"x")
+        return await fetch(session, url, body() if streamed else b"x")
+
+    with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+        run(handler, client)
+    assert len(requests) == 2
+
+
+def test_close_aborts_requests_in_progress() -> None:
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await read_request(reader)
+        await asyncio.sleep(10)
+
+    async def client(session: StreamsSession, url: str) -> Any:
+        task = asyncio.ensure_future(fetch(session, url, b"x"))
+        await asyncio.sleep(0.1)
+        await session.close()
+        return await asyncio.wait_for(task, 1)
+
+    with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+        run(handler, client)
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from concurrent.futures import CancelledError
+from typing import Any, AsyncGenerator, List
+
+import pytest
+
+from berrycorepy.client.sync import SyncClient
+from berrycorepy.methods import GetChat, GetMe
+from tests.mocked_session import MockedSession
+
+
+def test_calls_from_threads() -> None:
+    session = MockedSession()
+    for index in range(8):
+        session.add_result(name=f"user{index}")
+    with SyncClient("42:TEST", session=session) as client:
+        assert client.get_me().name == "user0"
+        results: List[Any] = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client(GetChat(chat_id=1))))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 3
+        assert len(client.gather([GetMe(), GetMe()])) == 2
+    assert session.closed
+    assert client.closed
+
+
+def test_close_cancels_pending_calls() -> None:
+    session = MockedSession()
+    session.delay = 10
+    session.add_result()
+    client = SyncClient("42:TEST", session=session)
+    future = client.submit(GetMe())
+    while not session.requests:
+        pass
+    client.close(timeout=5)
+    with pytest.raises(CancelledError):
+        future.result(0)
+    assert session.closed
+    assert client._loop.is_closed()
+    with pytest.raises(RuntimeError, match="closed"):
+        client.get_me()
+
+
+def test_close_finalizes_async_generators() -> None:
+    finalized = threading.Event()
+    session = MockedSession()
+    client = SyncClient("42:TEST", session=session)
+
+    async def generator() -> AsyncGenerator[int, None]:
+        try:
+            yield 1
+            await asyncio.sleep(10)
+        finally:
+            finalized.set()
+
+    async def start() -> AsyncGenerator[int, None]:
+        iterator = generator()
+        await iterator.__anext__()
+        return iterator
+
+    iterator = client._submit(start()).result(5)
+    client.close(timeout=5)
+    assert finalized.is_set()
+    del iterator
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from pydantic import ConfigDict
+
+from berrycorepy.client.session.middlewares.base import token_hash
+from berrycorepy.client.session.middlewares.upload_deduplication import (
+    UploadCache,
+    UploadDeduplication,
+)
+from berrycorepy.methods.base import DangerousMethod
+from berrycorepy.types.input_file import BufferedInputFile, InputFile
+from berrycorepy.types.User import User
+from tests.mocked_session import MockedClient
+
+
+class SendAvatar(DangerousMethod[User]):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    __returning__ = User
+    __api_method__ = "sendAvatar"
+
+    avatar: Union[InputFile, str]
+
+
+def resolve_file_id(method: DangerousMethod[Any], field: str, result: Any) -> Optional[str]:
+    return result.name
+
+
+def client_with(cache: UploadCache, token: str = "42:TEST") -> MockedClient:
+    client = MockedClient(token)
+    client.session.middleware(UploadDeduplication(resolve_file_id, cache=cache))
+    return client
+
+
+def test_uploaded_file_id_is_reused() -> None:
+    cache = UploadCache()
+    client = client_with(cache)
+    client.session.add_result(name="file-1")
+    client.session.add_result(name="file-1")
+
+    async def main() -> None:
+        await client(SendAvatar(avatar=BufferedInputFile(b"avatar", "a.png")))
+        await client(SendAvatar(avatar=BufferedInputFile(b"avatar", "b.png")))
+
+    asyncio.run(main())
+    first, second = client.session.requests
+    assert isinstance(first.avatar, InputFile)
+    assert second.avatar == "file-1"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_file_ids_are_not_shared_between_tokens() -> None:
+    cache = UploadCache()
+    first = client_with(cache, "1:FIRST")
+    second = client_with(cache, "2:SECOND")
+    first.session.add_result(name="file-1")
+    second.session.add_result(name="file-2")
+
+    async def main() -> None:
+        await first(SendAvatar(avatar=BufferedInputFile(b"avatar", "a.png")))
+        await second(SendAvatar(avatar=BufferedInputFile(b"avatar", "a.png")))
+
+    asyncio.run(main())
+    assert isinstance(second.session.requests[0].avatar, InputFile)
+    assert len(cache) == 2
+    assert all("FIRST" not in key and "SECOND" not in key for key in cache._file_ids)
+
+
+def test_rejected_file_id_is_uploaded_again() -> None:
+    cache = UploadCache()
+    client = client_with(cache)
+    client.session.add_error(400, "wrong file identifier")
+    client.session.add_result(name="file-2")
+
+    async def main() -> None:
+        file = BufferedInputFile(b"avatar", "a.png")
+        cache.set(client.token, await cache.digest(file), "stale")
+        await client(SendAvatar(avatar=file))
+
+    asyncio.run(main())
+    stale, upload = client.session.requests
+    assert stale.avatar == "stale"
+    assert isinstance(upload.avatar, InputFile)
+    assert list(cache._file_ids.values()) == ["file-2"]
+
+
+def test_saves_are_debounced(tmp_path: Path) -> None:
+    path = tmp_path / "uploads.json"
+    cache = UploadCache(path=path, save_delay=0.02)
+
+    async def main() -> None:
+        cache.set("42:TEST", "a", "file-a")
+        cache.set("42:TEST", "b", "file-b")
+        assert not path.exists()
+        await asyncio.sleep(0.05)
+        assert path.exists()
+        cache.discard("42:TEST", "a")
+        await cache.flush()
+        assert not cache._tasks
+
+    asyncio.run(main())
+    state = json.loads(path.read_text())
+    assert state["file_ids"] == {f"{token_hash('42:TEST')}:b": "file-b"}
+
+    restored = UploadCache(path=path)
+    assert restored.get("42:TEST", "b") == "file-b"
+    assert restored.get("1:OTHER", "b") is None
+
+
+def test_saves_without_event_loop(tmp_path: Path) -> None:
+    path = tmp_path / "uploads.json"
+    cache = UploadCache(path=path)
+    cache.set("42:TEST", "a", "file-a")
+    assert UploadCache(path=path).get("42:TEST", "a") == "file-a"
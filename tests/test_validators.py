@@ -0,0 +1,37 @@
+from typing import List
+
+import pytest
+
+from berrycorepy.methods import GetChat, GetMe
+from berrycorepy.methods.base import DangerousMethod, Response
+from berrycorepy.methods.validators import ResponseValidatorRegistry
+from berrycorepy.types.User import User
+
+
+class ListUsers(DangerousMethod[List[User]]):
+    __returning__ = List[User]
+    __api_method__ = "listUsers"
+
+
+def test_response_model_is_built_once() -> None:
+    registry = ResponseValidatorRegistry()
+    response_type = registry.get(GetMe)
+    assert registry.get(GetMe) is response_type
+    assert response_type is Response[User]
+    assert GetMe in registry
+    assert GetChat not in registry
+
+
+def test_warm_up_compiles_imported_methods() -> None:
+    registry = ResponseValidatorRegistry()
+    assert registry.warm_up([GetMe]) == 1
+    assert registry.warm_up() >= 3
+    assert {GetMe, GetChat, ListUsers} <= set(registry._response_types)
+
+
+def test_list_item_validator() -> None:
+    registry = ResponseValidatorRegistry()
+    adapter = registry.get_item(ListUsers)
+    assert registry.get_item(ListUsers) is adapter
+    with pytest.raises(TypeError, match="GetMe doesn't return list"):
+        registry.get_item(GetMe)